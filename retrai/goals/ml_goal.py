@@ -185,10 +185,10 @@ class MlOptimizeGoal(GoalBase):
             "5. Log each experiment with `experiment_log` for comparison.\n\n"
             "**Available models** (use with `ml_train`):\n"
             "- Classification: `logistic_regression`, `random_forest`, "
-            "`gradient_boosting`, `svm`, `knn`, `decision_tree`, "
+            "`hist_gradient_boosting`, `svm`, `knn`, `decision_tree`, "
             "`ada_boost`, `extra_trees`, `xgboost`, `lightgbm`\n"
             "- Regression: `random_forest_regressor`, "
-            "`gradient_boosting_regressor`, `svr`, `knn_regressor`, "
+            "`hist_gradient_boosting_regressor`, `svr`, `knn_regressor`, "
             "`ridge`, `lasso`, `elastic_net`, `xgboost_regressor`, "
             "`lightgbm_regressor`\n\n"
             "**Optimization tactics**:\n"
@@ -116,7 +116,7 @@ class SqlBenchmarkGoal(GoalBase):
         try:
             import asyncio
 
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
 
             # Run the query benchmark
             qresult: QueryResult = await loop.run_in_executor(
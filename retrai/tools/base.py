@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import importlib.metadata
+import json
 import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
@@ -11,6 +12,23 @@ from typing import Any, ClassVar
 logger = logging.getLogger(__name__)
 
 
+def dump_json(obj: Any, *, indent: bool = False) -> str:
+    """Serialize a tool response to JSON, with orjson when it is installed.
+
+    Values neither encoder understands are rendered with ``str``.
+    """
+    try:
+        import orjson  # type: ignore[import-not-found]
+    except ImportError:
+        return json.dumps(obj, indent=2 if indent else None, default=str)
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+    try:
+        return orjson.dumps(obj, default=str, option=option).decode()
+    except orjson.JSONEncodeError:
+        # e.g. integers beyond 64 bits, which the stdlib encoder handles
+        return json.dumps(obj, indent=2 if indent else None, default=str)
+
+
 @dataclass
 class ToolSchema:
     """JSON-schema description of a tool for the LLM.
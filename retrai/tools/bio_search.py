@@ -360,7 +360,7 @@ async def bio_search(
         return f"Unknown source '{source}'. Available: {available}"
 
     # Run in executor to avoid blocking the event loop
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
     result = await loop.run_in_executor(
         None, dispatch[source], query, max_results
     )
@@ -592,7 +592,7 @@ class RunPytestTool(BaseTool):
 
         from retrai.tools.pytest_runner import run_pytest
 
-        result = await asyncio.get_event_loop().run_in_executor(
+        result = await asyncio.get_running_loop().run_in_executor(
             None,
             run_pytest,
             cwd,
@@ -917,7 +917,7 @@ class VisualizeTool(BaseTool):
         return ToolSchema(
             name=self.name,
             description=(
-                "Generate a chart from a data file (CSV/JSON/Excel) and "
+                "Generate a chart from a data file (CSV/JSON/Excel/Parquet/Feather) and "
                 "save as PNG. Supports scatter, bar, histogram, heatmap, "
                 "boxplot, line, and correlation_matrix charts."
             ),
@@ -1214,6 +1214,14 @@ class SqlBenchTool(BaseTool):
                         "description": "Warmup run before timing (default false)",
                         "default": False,
                     },
+                    "concurrency": {
+                        "type": "integer",
+                        "description": (
+                            "Iterations kept in flight at once (default 1 = latency; "
+                            ">1 measures throughput_qps under concurrent load)"
+                        ),
+                        "default": 1,
+                    },
                 },
                 "required": ["action"],
             },
@@ -1229,6 +1237,7 @@ class SqlBenchTool(BaseTool):
             table=args.get("table", ""),
             iterations=int(args.get("iterations", 1)),
             warmup=bool(args.get("warmup", False)),
+            concurrency=int(args.get("concurrency", 1)),
         )
         return result, False
 
@@ -1449,6 +1458,24 @@ class OptimizeTool(BaseTool):
                         "description": "Start/end city index (tsp, default 0)",
                         "default": 0,
                     },
+                    "first_solution_strategy": {
+                        "type": "string",
+                        "description": (
+                            "Initial tour heuristic, e.g. 'PATH_CHEAPEST_ARC', "
+                            "'CHRISTOFIDES', 'SAVINGS' (tsp)"
+                        ),
+                    },
+                    "metaheuristic": {
+                        "type": "string",
+                        "description": (
+                            "Local search metaheuristic, e.g. 'GUIDED_LOCAL_SEARCH', "
+                            "'TABU_SEARCH'; null for greedy descent only (tsp)"
+                        ),
+                    },
+                    "time_limit_s": {
+                        "type": "number",
+                        "description": "Search time limit in seconds (tsp, default 5)",
+                    },
                     "values": {
                         "type": "array",
                         "items": {"type": "integer"},
@@ -1463,6 +1490,13 @@ class OptimizeTool(BaseTool):
                         "type": "integer",
                         "description": "Knapsack weight capacity (knapsack)",
                     },
+                    "solver_type": {
+                        "type": "string",
+                        "description": (
+                            "'dynamic_programming' or 'branch_and_bound' "
+                            "(knapsack, auto-selected by default)"
+                        ),
+                    },
                     "cost_matrix": {
                         "type": "array",
                         "description": "N×M integer cost matrix (assignment)",
@@ -1494,6 +1528,12 @@ class OptimizeTool(BaseTool):
                         ),
                         "default": True,
                     },
+                    "num_workers": {
+                        "type": "integer",
+                        "description": (
+                            "Parallel CP-SAT search workers (integer_program, default: all cores)"
+                        ),
+                    },
                 },
                 "required": ["action"],
             },
@@ -1508,7 +1548,7 @@ class OptimizeTool(BaseTool):
 
 
 class ProfilerTool(BaseTool):
-    """Profile Python code with cProfile or timeit."""
+    """Profile Python code with cProfile, pyinstrument, yappi or timeit."""
 
     name = "profiler"
     parallel_safe = False
@@ -1521,6 +1561,7 @@ class ProfilerTool(BaseTool):
                 "Actions: 'profile_code' (cProfile on inline snippet), "
                 "'profile_file' (cProfile on a .py file), "
                 "'timeit' (micro-benchmark an expression). "
+                "Set profiler='pyinstrument' (sampling) for code running over a second. "
                 "Returns top hotspots with cumtime/tottime in ms."
             ),
             parameters={
@@ -1567,6 +1608,14 @@ class ProfilerTool(BaseTool):
                         "description": "Timeout in seconds (default 60)",
                         "default": 60,
                     },
+                    "profiler": {
+                        "type": "string",
+                        "enum": ["cprofile", "pyinstrument", "yappi"],
+                        "description": (
+                            "Profiler for profile_code/profile_file (default 'cprofile')"
+                        ),
+                        "default": "cprofile",
+                    },
                 },
                 "required": ["action"],
             },
@@ -1586,6 +1635,7 @@ class ProfilerTool(BaseTool):
             number=int(args.get("number", 0)),
             packages=args.get("packages"),
             timeout=float(args.get("timeout", 60)),
+            profiler=args.get("profiler", "cprofile"),
         )
         return result, False
 
@@ -38,4 +38,4 @@ async def file_delete(path: str, cwd: str) -> str:
         full_path.unlink()
         return f"Deleted file: {full_path}"
 
-    return await asyncio.get_event_loop().run_in_executor(None, _delete)
+    return await asyncio.get_running_loop().run_in_executor(None, _delete)
@@ -50,4 +50,4 @@ async def file_insert(path: str, line: int, content: str, cwd: str) -> str:
         display_line = insert_at + 1
         return f"Inserted {len(text)} chars at line {display_line} in {path}"
 
-    return await asyncio.get_event_loop().run_in_executor(None, _insert)
+    return await asyncio.get_running_loop().run_in_executor(None, _insert)
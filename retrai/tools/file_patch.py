@@ -86,4 +86,4 @@ async def file_patch(
         full_path.write_text(patched, encoding="utf-8")
         return f"Patched {path} at line {line_number} ({len(old)} chars → {len(new)} chars)"
 
-    return await asyncio.get_event_loop().run_in_executor(None, _patch)
+    return await asyncio.get_running_loop().run_in_executor(None, _patch)
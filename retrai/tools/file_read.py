@@ -36,7 +36,7 @@ async def file_read(path: str, cwd: str, max_bytes: int = 200_000) -> str:
             text += f"\n\n[... truncated at {max_bytes} bytes ...]"
         return text
 
-    return await asyncio.get_event_loop().run_in_executor(None, _read)
+    return await asyncio.get_running_loop().run_in_executor(None, _read)
 
 
 async def file_list(path: str, cwd: str) -> list[str]:
@@ -55,4 +55,4 @@ async def file_list(path: str, cwd: str) -> list[str]:
             entries.append(rel + suffix)
         return entries
 
-    return await asyncio.get_event_loop().run_in_executor(None, _list)
+    return await asyncio.get_running_loop().run_in_executor(None, _list)
@@ -34,4 +34,4 @@ async def file_rename(old_path: str, new_path: str, cwd: str) -> str:
         src.rename(dst)
         return f"Renamed {old_path} → {new_path}"
 
-    return await asyncio.get_event_loop().run_in_executor(None, _rename)
+    return await asyncio.get_running_loop().run_in_executor(None, _rename)
@@ -27,4 +27,4 @@ async def file_write(path: str, content: str, cwd: str) -> str:
         full_path.write_text(content, encoding="utf-8")
         return str(full_path)
 
-    return await asyncio.get_event_loop().run_in_executor(None, _write)
+    return await asyncio.get_running_loop().run_in_executor(None, _write)
@@ -52,7 +52,7 @@ async def find_files(
     Returns:
         Formatted list of matching paths with sizes.
     """
-    entries = await asyncio.get_event_loop().run_in_executor(
+    entries = await asyncio.get_running_loop().run_in_executor(
         None, _find_sync, pattern, cwd, max_results, include_dirs
     )
 
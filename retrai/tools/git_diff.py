@@ -110,7 +110,7 @@ async def _run_git(cmd: list[str], cwd: str) -> GitResult:
                 is_git_repo=True,
             )
 
-    result = await asyncio.get_event_loop().run_in_executor(None, _run)
+    result = await asyncio.get_running_loop().run_in_executor(None, _run)
 
     # Detect "not a git repository" from stderr
     if "not a git repository" in result.error.lower():
@@ -109,7 +109,7 @@ async def grep_search(
     Returns:
         Formatted string of matches, one per line.
     """
-    matches = await asyncio.get_event_loop().run_in_executor(
+    matches = await asyncio.get_running_loop().run_in_executor(
         None,
         _search_sync,
         pattern,
@@ -84,7 +84,7 @@ class LSPClient:
         # Real LSP servers might send notifications or log messages interleaved
         # with responses. We need to handle that.
         
-        return await asyncio.get_event_loop().run_in_executor(
+        return await asyncio.get_running_loop().run_in_executor(
             None, self._send_and_receive, method, params
         )
 
@@ -165,6 +165,6 @@ class LSPClient:
         body = json.dumps(payload).encode("utf-8")
         header = f"Content-Length: {len(body)}\r\n\r\n".encode("ascii")
         
-        await asyncio.get_event_loop().run_in_executor(
+        await asyncio.get_running_loop().run_in_executor(
             None, lambda: self.process.stdin.write(header + body) or self.process.stdin.flush() # type: ignore
         )
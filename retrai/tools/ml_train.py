@@ -2,9 +2,14 @@
 
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
 import logging
 import textwrap
+import types
+import warnings
+from pathlib import Path
 from typing import Any
 
 from retrai.tools.python_exec import python_exec
@@ -29,15 +34,31 @@ MODEL_REGISTRY: dict[str, dict[str, str]] = {
         "class": "RandomForestRegressor",
         "task": "regression",
     },
+    "hist_gradient_boosting": {
+        "module": "sklearn.ensemble",
+        "class": "HistGradientBoostingClassifier",
+        "task": "classification",
+        "extra_params": 'categorical_features="from_dtype"',
+    },
+    "hist_gradient_boosting_regressor": {
+        "module": "sklearn.ensemble",
+        "class": "HistGradientBoostingRegressor",
+        "task": "regression",
+        "extra_params": 'categorical_features="from_dtype"',
+    },
+    # Classic GBMs are kept for compatibility; the histogram variants above
+    # are much faster and handle categoricals natively.
     "gradient_boosting": {
         "module": "sklearn.ensemble",
         "class": "GradientBoostingClassifier",
         "task": "classification",
+        "superseded_by": "hist_gradient_boosting",
     },
     "gradient_boosting_regressor": {
         "module": "sklearn.ensemble",
         "class": "GradientBoostingRegressor",
         "task": "regression",
+        "superseded_by": "hist_gradient_boosting_regressor",
     },
     "svm": {
         "module": "sklearn.svm",
@@ -125,6 +146,18 @@ VALID_CLASSIFICATION_METRICS = {"auc", "f1", "accuracy", "precision", "recall"}
 VALID_REGRESSION_METRICS = {"r2", "rmse", "mae", "mse"}
 VALID_METRICS = VALID_CLASSIFICATION_METRICS | VALID_REGRESSION_METRICS
 
+# Estimators that upcast to float64 internally (liblinear/libsvm) — feeding them
+# float32 would only add a conversion copy, so they keep the scaler's float64.
+_FLOAT64_ONLY_CLASSES: frozenset[str] = frozenset({"LogisticRegression", "SVC", "SVR"})
+
+# Module name of the namespace in-process training code runs in
+_IN_PROCESS_MODULE = "__retrai_ml_train__"
+
+# The sandbox script ignores every warning itself. In-process training runs on
+# worker threads, where warnings.catch_warnings() would race on the global
+# filter list, so the estimator libraries' noise is silenced once, here.
+warnings.filterwarnings("ignore", module=rf"({_IN_PROCESS_MODULE}|sklearn|xgboost|lightgbm)(\.|$)")
+
 
 async def ml_train(
     data_file: str,
@@ -138,6 +171,7 @@ async def ml_train(
     scoring_metric: str = "auc",
     cross_validate: bool = True,
     cv_folds: int = 5,
+    in_process: bool = False,
 ) -> str:
     """Train a sklearn-compatible ML model in the sandbox.
 
@@ -153,6 +187,9 @@ async def ml_train(
         scoring_metric: Primary metric: auc, f1, accuracy, etc.
         cross_validate: Whether to run k-fold CV (default True).
         cv_folds: Number of CV folds (default 5).
+        in_process: Run the training code in the current interpreter instead
+            of the sandbox. Skips the subprocess and JSON round-trip, but
+            requires scikit-learn et al. on the host — trusted callers only.
 
     Returns:
         JSON string with model metrics, feature importance, etc.
@@ -179,6 +216,12 @@ async def ml_train(
         )
 
     model_info = MODEL_REGISTRY[model_type]
+    if "superseded_by" in model_info:
+        logger.warning(
+            "model_type '%s' is deprecated, use '%s' instead",
+            model_type,
+            model_info["superseded_by"],
+        )
 
     # Determine packages to install
     packages = ["scikit-learn", "pandas", "numpy"]
@@ -186,10 +229,12 @@ async def ml_train(
     if extra_pkg:
         packages.append(extra_pkg)
 
-    code = _build_training_code(
+    if in_process:
+        data_file = str(Path(cwd).resolve() / data_file)
+
+    params = _build_training_params(
         data_file=data_file,
         target_column=target_column,
-        model_info=model_info,
         task_type=task_type,
         hyperparams=hyperparams or {},
         test_size=test_size,
@@ -199,6 +244,14 @@ async def ml_train(
         cv_folds=cv_folds,
     )
 
+    if in_process:
+        try:
+            output = await asyncio.to_thread(_run_training_in_process, model_info, params)
+        except Exception as e:
+            return json.dumps({"error": f"Training failed: {type(e).__name__}: {e}"})
+        return json.dumps(output, indent=2, default=str)
+
+    code = _render_params(params) + _training_body(*_body_key(model_info))
     result = await python_exec(
         code=code,
         cwd=cwd,
@@ -217,17 +270,72 @@ async def ml_train(
             }
         )
 
+    # The script prints its output pre-indented; pass it through unless some
+    # library wrote to stdout around it (e.g. LightGBM's info logging).
     stdout = result.stdout.strip()
-    try:
-        parsed = json.loads(stdout)
-        return json.dumps(parsed, indent=2, default=str)
-    except json.JSONDecodeError:
-        return json.dumps(
-            {
-                "model_type": model_type,
-                "raw_output": stdout[:5000],
-            }
-        )
+    if stdout.startswith("{") and stdout.endswith("}"):
+        return stdout
+    return json.dumps(
+        {
+            "model_type": model_type,
+            "raw_output": stdout[:5000],
+        }
+    )
+
+
+def _run_training_in_process(model_info: dict[str, str], params: dict[str, Any]) -> dict[str, Any]:
+    """Execute the cached training code object in this interpreter."""
+    namespace: dict[str, Any] = {"__name__": _IN_PROCESS_MODULE, **params}
+    exec(_compiled_training_body(*_body_key(model_info)), namespace)
+    return namespace["output"]
+
+
+def _build_training_params(
+    data_file: str,
+    target_column: str,
+    task_type: str | None,
+    hyperparams: dict[str, Any],
+    test_size: float,
+    feature_columns: list[str] | None,
+    scoring_metric: str,
+    cross_validate: bool,
+    cv_folds: int,
+) -> dict[str, Any]:
+    """Collect the per-call values the training body reads as globals."""
+    return {
+        "path": data_file,
+        "target_col": target_column,
+        "feature_cols": feature_columns or None,
+        "task_override": task_type or None,
+        "hyperparams": hyperparams,
+        "test_size": test_size,
+        "scoring_metric": scoring_metric,
+        "cross_validate": cross_validate,
+        "cv_folds": cv_folds,
+    }
+
+
+def _render_params(params: dict[str, Any]) -> str:
+    """Render the sandbox script's preamble: silence warnings, assign the params."""
+    lines = ["import warnings\n", 'warnings.filterwarnings("ignore")\n']
+    for name, value in params.items():
+        if name == "hyperparams":
+            rendered = "dict(" + ", ".join(f"{k}={v!r}" for k, v in value.items()) + ")"
+        else:
+            rendered = repr(value)
+        lines.append(f"{name} = {rendered}\n")
+    return "".join(lines)
+
+
+def _body_key(model_info: dict[str, str]) -> tuple[str, str, str, str, str]:
+    """Return the fields of a registry entry that shape the training body."""
+    return (
+        model_info["module"],
+        model_info["class"],
+        model_info["task"],
+        model_info.get("extra_params", ""),
+        model_info.get("package", ""),
+    )
 
 
 def _build_training_code(
@@ -243,25 +351,91 @@ def _build_training_code(
     cv_folds: int,
 ) -> str:
     """Build the Python code that runs inside the sandbox."""
-    module = model_info["module"]
-    cls_name = model_info["class"]
-    default_task = model_info["task"]
-    extra_params = model_info.get("extra_params", "")
+    params = _build_training_params(
+        data_file=data_file,
+        target_column=target_column,
+        task_type=task_type,
+        hyperparams=hyperparams,
+        test_size=test_size,
+        feature_columns=feature_columns,
+        scoring_metric=scoring_metric,
+        cross_validate=cross_validate,
+        cv_folds=cv_folds,
+    )
+    return _render_params(params) + _training_body(*_body_key(model_info))
+
+
+@functools.lru_cache(maxsize=64)
+def _compiled_training_body(
+    module: str, cls_name: str, default_task: str, extra_params: str, package: str
+) -> types.CodeType:
+    """Compile the training body once per model shape."""
+    return compile(
+        _training_body(module, cls_name, default_task, extra_params, package),
+        "<ml_train>",
+        "exec",
+    )
 
-    hp_str = ", ".join(f"{k}={v!r}" for k, v in hyperparams.items())
-    if extra_params and hp_str:
-        hp_str = f"{extra_params}, {hp_str}"
-    elif extra_params:
-        hp_str = extra_params
 
-    feature_cols_repr = repr(feature_columns) if feature_columns else "None"
-    task_type_repr = repr(task_type) if task_type else "None"
+def _snippet(code: str) -> str:
+    """Indent a template fragment to sit on a placeholder line of the training body.
+
+    The placeholder line already supplies the first line's indentation.
+    """
+    return textwrap.indent(textwrap.dedent(code).strip(), " " * 8).lstrip()
+
+
+@functools.lru_cache(maxsize=64)
+def _training_body(
+    module: str, cls_name: str, default_task: str, extra_params: str, package: str
+) -> str:
+    """Render the training script for one model shape.
+
+    Only the estimator choice is baked into the source; every per-call value
+    (data path, hyperparams, metric, folds, …) is read from globals set by
+    ``_render_params`` or the in-process namespace.
+    """
+    ctor_args = f"{extra_params}, **hyperparams" if extra_params else "**hyperparams"
+    # Histogram GBMs bin raw values and take pandas categoricals directly
+    if cls_name.startswith("HistGradientBoosting"):
+        encode_categoricals = """
+            X[cat_cols] = X[cat_cols].astype("category")
+        """
+        scale_features = """
+            # Binning is scale-invariant; keep the category dtypes intact
+            X_train_scaled, X_test_scaled = X_train, X_test
+        """
+        downcast = downcast_target = ""
+    else:
+        encode_categoricals = """
+            # Sorted-category codes match LabelEncoder without its object-array
+            # sort; missing values stay missing and get code -1
+            for col in cat_cols:
+                values = X[col]
+                X[col] = values.astype(str).where(values.notna()).astype("category").cat.codes
+        """
+        scale_features = """
+            # Estimators take the scaler's ndarrays directly — no re-wrapping
+            scaler = StandardScaler()
+            X_train_scaled = scaler.fit_transform(X_train)
+            X_test_scaled = scaler.transform(X_test)
+        """
+        downcast = downcast_target = ""
+        if cls_name not in _FLOAT64_ONLY_CLASSES:
+            downcast = """
+                # Halve memory traffic for estimators that preserve float32
+                X_train_scaled = X_train_scaled.astype(np.float32, copy=False)
+                X_test_scaled = X_test_scaled.astype(np.float32, copy=False)
+            """
+            if package in ("xgboost", "lightgbm"):
+                downcast_target = """
+                    if task_type == "regression":
+                        y_train = np.asarray(y_train, dtype=np.float32)
+                """
 
     return textwrap.dedent(f"""\
         import json
         import time
-        import warnings
-        warnings.filterwarnings("ignore")
 
         import numpy as np
         import pandas as pd
@@ -269,14 +443,13 @@ def _build_training_code(
         from sklearn.model_selection import train_test_split, cross_val_score
         from sklearn.preprocessing import LabelEncoder, StandardScaler
         from sklearn.metrics import (
-            roc_auc_score, f1_score, accuracy_score, precision_score,
-            recall_score, r2_score, mean_squared_error, mean_absolute_error,
+            roc_auc_score, accuracy_score, precision_recall_fscore_support,
+            r2_score, mean_squared_error, mean_absolute_error,
         )
 
         start = time.monotonic()
 
         # ── Load data ──
-        path = {data_file!r}
         if path.endswith(".csv"):
             df = pd.read_csv(path)
         elif path.endswith(".json") or path.endswith(".jsonl"):
@@ -288,10 +461,6 @@ def _build_training_code(
         else:
             df = pd.read_csv(path)
 
-        target_col = {target_column!r}
-        feature_cols = {feature_cols_repr}
-        task_override = {task_type_repr}
-
         # ── Determine task type ──
         if task_override:
             task_type = task_override
@@ -309,6 +478,7 @@ def _build_training_code(
             X = df.drop(columns=[target_col]).copy()
 
         y = df[target_col].copy()
+        feature_names = list(X.columns)
 
         # Encode target if categorical
         label_enc = None
@@ -318,17 +488,20 @@ def _build_training_code(
 
         # Handle categorical features
         cat_cols = X.select_dtypes(include=["object", "category"]).columns.tolist()
-        for col in cat_cols:
-            le = LabelEncoder()
-            X[col] = le.fit_transform(X[col].astype(str))
-
-        # Handle missing values
-        for col in X.columns:
+        {_snippet(encode_categoricals)}
+
+        # Handle missing values — numeric block imputed in one vectorized pass
+        num_cols = X.select_dtypes(include="number").columns
+        has_nan = X[num_cols].isna().any()
+        nan_num_cols = has_nan.index[has_nan].tolist()
+        if nan_num_cols:
+            block = X[nan_num_cols].to_numpy(dtype=np.float64, copy=True)
+            nan_mask = np.isnan(block)
+            block[nan_mask] = np.take(np.nanmedian(block, axis=0), np.nonzero(nan_mask)[1])
+            X[nan_num_cols] = block
+        for col in X.columns.difference(num_cols, sort=False):
             if X[col].isnull().any():
-                if X[col].dtype in ["float64", "int64"]:
-                    X[col] = X[col].fillna(X[col].median())
-                else:
-                    X[col] = X[col].fillna(X[col].mode().iloc[0] if len(X[col].mode()) > 0 else 0)
+                X[col] = X[col].fillna(X[col].mode().iloc[0] if len(X[col].mode()) > 0 else 0)
 
         if y.isnull().any():
             mask = ~y.isnull()
@@ -338,21 +511,18 @@ def _build_training_code(
         # ── Train/test split ──
         strat = y if task_type == "classification" else None
         X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size={test_size}, random_state=42,
+            X, y, test_size=test_size, random_state=42,
             stratify=strat,
         )
 
         # ── Scale features ──
-        scaler = StandardScaler()
-        X_train_scaled = pd.DataFrame(
-            scaler.fit_transform(X_train), columns=X_train.columns,
-        )
-        X_test_scaled = pd.DataFrame(
-            scaler.transform(X_test), columns=X_test.columns,
-        )
+        {_snippet(scale_features)}
+
+        {_snippet(downcast)}
+        {_snippet(downcast_target)}
 
         # ── Train model ──
-        model = {cls_name}({hp_str})
+        model = {cls_name}({ctor_args})
         model.fit(X_train_scaled, y_train)
 
         # ── Compute metrics ──
@@ -363,18 +533,16 @@ def _build_training_code(
             metrics["accuracy"] = round(
                 float(accuracy_score(y_test, y_pred)), 4,
             )
-            n_classes = len(np.unique(y))
+            n_classes = len(label_enc.classes_) if label_enc is not None else y.nunique()
             avg = "binary" if n_classes == 2 else "weighted"
 
-            metrics["f1"] = round(float(
-                f1_score(y_test, y_pred, average=avg, zero_division=0),
-            ), 4)
-            metrics["precision"] = round(float(
-                precision_score(y_test, y_pred, average=avg, zero_division=0),
-            ), 4)
-            metrics["recall"] = round(float(
-                recall_score(y_test, y_pred, average=avg, zero_division=0),
-            ), 4)
+            # One confusion-matrix pass for precision, recall and F1
+            prec, rec, f1, _ = precision_recall_fscore_support(
+                y_test, y_pred, average=avg, zero_division=0,
+            )
+            metrics["f1"] = round(float(f1), 4)
+            metrics["precision"] = round(float(prec), 4)
+            metrics["recall"] = round(float(rec), 4)
 
             # AUC
             try:
@@ -403,10 +571,10 @@ def _build_training_code(
 
         # ── Cross-validation ──
         cv_result = None
-        if {cross_validate!r}:
+        if cross_validate:
             try:
                 if task_type == "classification":
-                    sm = {scoring_metric!r}
+                    sm = scoring_metric
                     scoring = "roc_auc" if sm == "auc" else sm
                     if scoring == "roc_auc" and n_classes > 2:
                         scoring = "roc_auc_ovr_weighted"
@@ -417,14 +585,14 @@ def _build_training_code(
                         "mae": "neg_mean_absolute_error",
                         "mse": "neg_mean_squared_error",
                     }}
-                    scoring = score_map.get({scoring_metric!r}, "r2")
+                    scoring = score_map.get(scoring_metric, "r2")
 
                 scores = cross_val_score(
                     model, X_train_scaled, y_train,
-                    cv={cv_folds}, scoring=scoring,
+                    cv=cv_folds, scoring=scoring,
                 )
                 cv_result = {{
-                    "metric": {scoring_metric!r},
+                    "metric": scoring_metric,
                     "mean": round(float(np.mean(scores)), 4),
                     "std": round(float(np.std(scores)), 4),
                     "folds": [round(float(s), 4) for s in scores],
@@ -435,14 +603,15 @@ def _build_training_code(
         # ── Feature importance ──
         feature_importance = {{}}
         try:
-            if hasattr(model, "feature_importances_"):
-                imp = model.feature_importances_
-                for fname, fval in sorted(zip(X.columns, imp), key=lambda x: -x[1]):
-                    feature_importance[fname] = round(float(fval), 4)
-            elif hasattr(model, "coef_"):
-                coef = model.coef_.flatten() if model.coef_.ndim > 1 else model.coef_
-                for fname, fval in sorted(zip(X.columns, np.abs(coef)), key=lambda x: -x[1]):
-                    feature_importance[fname] = round(float(fval), 4)
+            imp = getattr(model, "feature_importances_", None)
+            if imp is None and hasattr(model, "coef_"):
+                imp = np.abs(np.ravel(model.coef_)[: len(feature_names)])
+            if imp is not None:
+                # C-level sort, descending; stable so ties keep column order
+                order = np.argsort(-imp, kind="stable")
+                feature_importance = {{
+                    feature_names[i]: round(float(imp[i]), 4) for i in order
+                }}
         except Exception:
             pass
 
@@ -451,19 +620,20 @@ def _build_training_code(
         output = {{
             "model_type": {cls_name!r},
             "task_type": task_type,
-            "scoring_metric": {scoring_metric!r},
+            "scoring_metric": scoring_metric,
             "metrics": metrics,
             "cv_scores": cv_result,
             "feature_importance": feature_importance,
-            "hyperparams_used": {hyperparams!r},
+            "hyperparams_used": hyperparams,
             "training_time_seconds": round(elapsed, 2),
             "n_samples": len(df),
-            "n_features": len(X.columns),
+            "n_features": len(feature_names),
             "n_train": len(X_train),
             "n_test": len(X_test),
-            "feature_names": list(X.columns),
+            "feature_names": feature_names,
             "target_column": target_col,
         }}
 
-        print(json.dumps(output, default=str))
+        if __name__ == "__main__":
+            print(json.dumps(output, indent=2, default=str))
     """)
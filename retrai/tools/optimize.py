@@ -11,9 +11,22 @@ Supports:
 
 from __future__ import annotations
 
-import json
+import array
+import ast
+import base64
+import concurrent.futures
+import functools
+import importlib.util
 import logging
-from typing import Any
+import math
+import multiprocessing
+import operator
+import os
+import types
+from collections.abc import Callable, Sequence
+from typing import TYPE_CHECKING, Any
+
+from retrai.tools.base import dump_json
 
 logger = logging.getLogger(__name__)
 
@@ -24,33 +37,103 @@ _SCIPY_INSTALL_HINT = (
     "scipy is not installed. Install with: uv pip install 'retrai[optimize]'"
 )
 
+# numpy and scipy are bound once here when installed, so the hot solver paths
+# test a flag instead of going through the import machinery on every call.
+# OR-Tools stays imported per solver: each one needs a different submodule.
+_HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+_HAS_SCIPY = _HAS_NUMPY and importlib.util.find_spec("scipy") is not None
+
+# TYPE_CHECKING keeps the names bound for the type checker; at runtime they
+# exist only when installed, and every use sits behind the flags.
+if TYPE_CHECKING or _HAS_NUMPY:
+    import numpy as np  # type: ignore[import-untyped]
+if TYPE_CHECKING:
+    from numpy.typing import ArrayLike  # type: ignore[import-untyped]
+if TYPE_CHECKING or _HAS_SCIPY:
+    from scipy.optimize import linprog, minimize  # type: ignore[import-untyped]
+    from scipy.sparse import csr_matrix  # type: ignore[import-untyped]
+
+
+# ── Input / output encoding ───────────────────────────────────────────────────
+
+
+def _to_int_matrix(x: Any) -> Any:
+    """Decode a square matrix passed as raw int64 bytes or base64 text.
+
+    Nested lists and ndarrays are returned unchanged; a binary payload skips
+    parsing n² JSON integers for large TSP / assignment instances. It decodes
+    to an ndarray, or to nested lists when numpy is not installed.
+    """
+    if isinstance(x, str):
+        x = base64.b64decode(x, validate=True)
+    if not isinstance(x, (bytes, bytearray, memoryview)):
+        return x
+
+    if _HAS_NUMPY:
+        flat: Any = np.frombuffer(x, dtype=np.int64)
+    else:
+        flat = array.array("q")
+        if len(x) % flat.itemsize:
+            raise ValueError(f"Matrix buffer of {len(x)} bytes is not whole int64 values")
+        flat.frombytes(x)
+    size = len(flat)
+    n = math.isqrt(size)
+    if n * n != size:
+        raise ValueError(f"Matrix buffer holds {size} int64 values, not a square")
+    if _HAS_NUMPY:
+        return flat.reshape(n, n)
+    return [flat[i * n : (i + 1) * n].tolist() for i in range(n)]
+
 
 # ── Linear Programming (scipy) ────────────────────────────────────────────────
 
 
+# Constraint matrices at least this large and at most this dense go to HiGHS
+# as CSR, which skips scanning the zeros during presolve.
+_SPARSE_MIN_SIZE = 10_000
+_SPARSE_MAX_DENSITY = 0.1
+
+
+def _to_arr(x: Any) -> Any:
+    """Return ``x`` as a float64 ndarray (no copy if it already is one), or None."""
+    if x is None or len(x) == 0:
+        return None
+    return np.asarray(x, dtype=np.float64)
+
+
+def _to_constraint_matrix(x: Any) -> Any:
+    """Like ``_to_arr``, but hand large, mostly-zero matrices over as CSR."""
+    arr = _to_arr(x)
+    if arr is None or arr.size < _SPARSE_MIN_SIZE:
+        return arr
+
+    if np.count_nonzero(arr) <= _SPARSE_MAX_DENSITY * arr.size:
+        return csr_matrix(arr)
+    return arr
+
+
 def _linear_program(
-    c: list[float],
-    a_ub: list[list[float]] | None,
-    b_ub: list[float] | None,
-    a_eq: list[list[float]] | None,
-    b_eq: list[float] | None,
-    bounds: list[tuple[float | None, float | None]] | None,
+    c: ArrayLike,
+    a_ub: ArrayLike | None,
+    b_ub: ArrayLike | None,
+    a_eq: ArrayLike | None,
+    b_eq: ArrayLike | None,
+    bounds: Sequence[tuple[float | None, float | None]] | None,
     method: str,
 ) -> dict[str, Any]:
-    """Minimize c·x subject to A_ub·x ≤ b_ub, A_eq·x = b_eq."""
-    try:
-        from scipy.optimize import linprog  # type: ignore[import-untyped]
-    except ImportError:
-        return {"error": _SCIPY_INSTALL_HINT}
+    """Minimize c·x subject to A_ub·x ≤ b_ub, A_eq·x = b_eq.
 
-    import numpy as np  # type: ignore[import-untyped]
+    Vectors and matrices may be nested lists or ndarrays.
+    """
+    if not _HAS_SCIPY:
+        return {"error": _SCIPY_INSTALL_HINT}
 
     result = linprog(
-        c=np.array(c),
-        A_ub=np.array(a_ub) if a_ub else None,
-        b_ub=np.array(b_ub) if b_ub else None,
-        A_eq=np.array(a_eq) if a_eq else None,
-        b_eq=np.array(b_eq) if b_eq else None,
+        c=_to_arr(c),
+        A_ub=_to_constraint_matrix(a_ub),
+        b_ub=_to_arr(b_ub),
+        A_eq=_to_constraint_matrix(a_eq),
+        b_eq=_to_arr(b_eq),
         bounds=bounds,
         method=method,
     )
@@ -65,6 +148,101 @@ def _linear_program(
 
 # ── Nonlinear Minimization (scipy) ────────────────────────────────────────────
 
+_OBJECTIVE_NAMES: frozenset[str] = frozenset({"x", "np"})
+
+# scipy methods that accept an analytic ``jac``
+_GRADIENT_METHODS: frozenset[str] = frozenset(
+    {
+        "CG",
+        "BFGS",
+        "NEWTON-CG",
+        "L-BFGS-B",
+        "TNC",
+        "SLSQP",
+        "DOGLEG",
+        "TRUST-NCG",
+        "TRUST-KRYLOV",
+        "TRUST-EXACT",
+        "TRUST-CONSTR",
+    }
+)
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_objective(expression: str, backend: str = "numpy") -> Callable[[Any], Any]:
+    """Compile ``expression`` into a function of ``x``, once per expression.
+
+    The expression is validated up front (its only free names may be ``x``
+    and ``np``, no private attributes) and wrapped in a lambda, so each
+    objective evaluation is a plain function call instead of an ``eval``.
+    With ``backend="jax"``, ``np`` is bound to ``jax.numpy`` so the function
+    can be traced for autodiff.
+
+    Raises:
+        SyntaxError: If the expression does not parse.
+        ValueError: If a free name is anything other than ``x``/``np``.
+    """
+    if backend == "jax":
+        import jax.numpy as jnp  # type: ignore[import-untyped]
+
+        namespace = jnp
+    else:
+        namespace = np
+
+    tree = ast.parse(expression.strip(), mode="eval")
+    # Comprehension targets and lambda parameters are bound by the expression
+    # itself, so they are allowed alongside the free names
+    allowed = set(_OBJECTIVE_NAMES)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.comprehension):
+            allowed.update(n.id for n in ast.walk(node.target) if isinstance(n, ast.Name))
+        elif isinstance(node, ast.Lambda):
+            params = node.args
+            allowed.update(a.arg for a in (*params.posonlyargs, *params.args, *params.kwonlyargs))
+            allowed.update(a.arg for a in (params.vararg, params.kwarg) if a is not None)
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id not in allowed:
+            raise ValueError(f"unknown name '{node.id}' (only x and np are available)")
+        if isinstance(node, ast.Attribute) and node.attr.startswith("_"):
+            raise ValueError(f"access to '{node.attr}' is not allowed")
+
+    func = ast.Expression(
+        body=ast.Lambda(
+            args=ast.arguments(
+                posonlyargs=[], args=[ast.arg(arg="x")], kwonlyargs=[], kw_defaults=[], defaults=[]
+            ),
+            body=tree.body,
+        )
+    )
+    ast.fix_missing_locations(func)
+    code = compile(func, "<optimize>", "eval")
+    return eval(code, {"np": namespace, "__builtins__": {}})  # noqa: S307
+
+
+@functools.lru_cache(maxsize=128)
+def _jax_gradient(expression: str) -> Callable[[Any], Any] | None:
+    """Return a jitted JAX gradient of ``expression``, or None without JAX.
+
+    BFGS tolerances assume float64 gradients, so each call traces and runs in
+    a scoped x64 context instead of flipping JAX's process-wide flag.
+    """
+    if importlib.util.find_spec("jax") is None:
+        return None
+    import jax  # type: ignore[import-untyped]
+
+    if hasattr(jax, "enable_x64"):
+        enable_x64: Callable[[], Any] = functools.partial(jax.enable_x64, True)
+    else:
+        from jax.experimental import enable_x64  # type: ignore[import-untyped,no-redef]
+
+    grad = jax.jit(jax.grad(_compile_objective(expression, backend="jax")))
+
+    def gradient(x: Any) -> Any:  # noqa: ANN001
+        with enable_x64():
+            return grad(x)
+
+    return gradient
+
 
 def _minimize(
     expression: str,
@@ -77,26 +255,42 @@ def _minimize(
     The expression is evaluated with ``x`` as a numpy array.
     Example: ``"x[0]**2 + (x[1]-1)**2"``
     """
-    try:
-        import numpy as np  # type: ignore[import-untyped]
-        from scipy.optimize import minimize  # type: ignore[import-untyped]
-    except ImportError:
+    if not _HAS_SCIPY:
         return {"error": _SCIPY_INSTALL_HINT}
 
-    # Build a safe function from the expression
-    safe_globals: dict[str, Any] = {"np": np, "__builtins__": {}}
     try:
-        code = compile(expression, "<optimize>", "eval")
-    except SyntaxError as e:
+        objective = _compile_objective(expression)
+    except (SyntaxError, ValueError) as e:
         return {"error": f"Invalid expression: {e}"}
 
     def f(x: Any) -> float:  # noqa: ANN001
-        return float(eval(code, safe_globals, {"x": x}))  # noqa: S307
+        return float(objective(x))
+
+    x0_arr = np.asarray(x0, dtype=np.float64)
+
+    # Analytic gradient via JAX when available: O(1) gradient evaluations
+    # per iteration instead of the n+1 finite-difference stencil.
+    jac: Callable[[Any], Any] | None = None
+    uses_gradient = method.upper() in _GRADIENT_METHODS
+    if uses_gradient:
+        grad = _jax_gradient(expression)
+        if grad is not None:
+            try:
+                grad(x0_arr)  # trace once; untraceable expressions fall back to FD
+            except Exception as e:
+                logger.debug("JAX gradient unavailable for %r: %s", expression, e)
+            else:
+
+                def jax_jac(x: Any) -> Any:  # noqa: ANN001
+                    return np.asarray(grad(x), dtype=np.float64)
+
+                jac = jax_jac
 
     result = minimize(
         f,
-        x0=np.array(x0),
+        x0=x0_arr,
         method=method,
+        jac=jac,
         bounds=bounds,
     )
     return {
@@ -108,6 +302,9 @@ def _minimize(
             "method": method,
             "iterations": int(result.nit),
             "function_evaluations": int(result.nfev),
+            "gradient": (
+                "jax" if jac is not None else "finite-difference" if uses_gradient else "none"
+            ),
         },
     }
 
@@ -115,11 +312,25 @@ def _minimize(
 # ── Travelling Salesman Problem (OR-Tools) ────────────────────────────────────
 
 
+# Below this many cities the first-solution heuristic plus greedy descent is
+# already optimal in practice; a metaheuristic would just burn its time limit.
+_TSP_SMALL_INSTANCE = 12
+
+
 def _tsp(
-    distance_matrix: list[list[int]],
+    distance_matrix: Any,
     depot: int,
+    first_solution_strategy: str = "PATH_CHEAPEST_ARC",
+    metaheuristic: str | None = "GUIDED_LOCAL_SEARCH",
+    time_limit_s: float = 5.0,
 ) -> dict[str, Any]:
-    """Solve TSP on a symmetric distance matrix using OR-Tools routing."""
+    """Solve TSP on a symmetric distance matrix using OR-Tools routing.
+
+    ``first_solution_strategy`` and ``metaheuristic`` take OR-Tools enum names
+    (e.g. ``"CHRISTOFIDES"``, ``"SAVINGS"``, ``"TABU_SEARCH"``); pass
+    ``metaheuristic=None`` for plain greedy descent. ``distance_matrix`` may be
+    nested lists or an integer ndarray.
+    """
     try:
         from ortools.constraint_solver import (  # type: ignore[import-untyped]
             pywrapcp,
@@ -128,26 +339,53 @@ def _tsp(
     except ImportError:
         return {"error": _ORTOOLS_INSTALL_HINT}
 
+    if hasattr(distance_matrix, "tolist"):
+        # Both transit registrations below want plain Python rows
+        distance_matrix = distance_matrix.tolist()
     n = len(distance_matrix)
+    if n <= _TSP_SMALL_INSTANCE:
+        metaheuristic = None
+        time_limit_s = min(0.5, time_limit_s)
+
+    try:
+        strategy = getattr(
+            routing_enums_pb2.FirstSolutionStrategy, first_solution_strategy.upper()
+        )
+        meta = (
+            getattr(routing_enums_pb2.LocalSearchMetaheuristic, metaheuristic.upper())
+            if metaheuristic
+            else None
+        )
+    except AttributeError as e:
+        return {"error": f"Unknown TSP search option: {e}"}
+
     manager = pywrapcp.RoutingIndexManager(n, 1, depot)
     routing = pywrapcp.RoutingModel(manager)
 
-    def distance_callback(from_index: int, to_index: int) -> int:
-        from_node = manager.IndexToNode(from_index)
-        to_node = manager.IndexToNode(to_index)
-        return distance_matrix[from_node][to_node]
-
-    transit_callback_index = routing.RegisterTransitCallback(distance_callback)
+    if hasattr(routing, "RegisterTransitMatrix"):
+        # Matrix lives in C++ — arc costs never cross into Python during search
+        transit_callback_index = routing.RegisterTransitMatrix(distance_matrix)
+    else:
+        # Older OR-Tools: row-major flat buffer, one index computation per arc
+        # query instead of two nested list lookups.
+        flat = array.array("q")
+        for row in distance_matrix:
+            flat.extend(row)
+        get = flat.__getitem__
+        to_node = manager.IndexToNode
+
+        def distance_callback(from_index: int, to_index: int) -> int:
+            return get(to_node(from_index) * n + to_node(to_index))
+
+        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
     routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
 
     search_params = pywrapcp.DefaultRoutingSearchParameters()
-    search_params.first_solution_strategy = (
-        routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
-    )
-    search_params.local_search_metaheuristic = (
-        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
-    )
-    search_params.time_limit.seconds = 5
+    search_params.first_solution_strategy = strategy
+    if meta is not None:
+        search_params.local_search_metaheuristic = meta
+    search_params.log_search = False
+    search_params.time_limit.FromMilliseconds(int(time_limit_s * 1000))
 
     solution = routing.SolveWithParameters(search_params)
     if not solution:
@@ -167,33 +405,62 @@ def _tsp(
         "success": True,
         "objective_value": int(total_distance),
         "solution": {"route": route, "total_distance": int(total_distance)},
-        "solver_info": {"solver": "OR-Tools routing", "cities": n},
+        "solver_info": {
+            "solver": "OR-Tools routing",
+            "cities": n,
+            "first_solution_strategy": first_solution_strategy.upper(),
+            "metaheuristic": metaheuristic.upper() if metaheuristic else None,
+        },
     }
 
 
 # ── 0/1 Knapsack (OR-Tools) ───────────────────────────────────────────────────
 
 
+_KNAPSACK_SOLVERS: dict[str, str] = {
+    "dynamic_programming": "KNAPSACK_DYNAMIC_PROGRAMMING_SOLVER",
+    "branch_and_bound": "KNAPSACK_MULTIDIMENSION_BRANCH_AND_BOUND_SOLVER",
+}
+
+# The DP table is O(items × capacity); past this size branch-and-bound,
+# which scales with the item count only, is the safer choice.
+_KNAPSACK_DP_MAX_CELLS = 10_000_000
+
+
 def _knapsack(
     values: list[int],
     weights: list[int],
     capacity: int,
+    solver_type: str | None = None,
 ) -> dict[str, Any]:
-    """Solve 0/1 knapsack: maximize sum(values[i]) s.t. sum(weights[i]) ≤ capacity."""
+    """Solve 0/1 knapsack: maximize sum(values[i]) s.t. sum(weights[i]) ≤ capacity.
+
+    ``solver_type`` is ``"dynamic_programming"`` or ``"branch_and_bound"``;
+    by default DP is used unless ``capacity × items`` would make its table huge.
+    """
     try:
         from ortools.algorithms.python import knapsack_solver  # type: ignore[import-untyped]
     except ImportError:
         return {"error": _ORTOOLS_INSTALL_HINT}
 
+    if solver_type is None:
+        too_big = capacity * len(values) >= _KNAPSACK_DP_MAX_CELLS
+        solver_type = "branch_and_bound" if too_big else "dynamic_programming"
+    if solver_type not in _KNAPSACK_SOLVERS:
+        return {
+            "error": f"Unknown solver_type '{solver_type}'. "
+            f"Use: {', '.join(_KNAPSACK_SOLVERS)}"
+        }
+
     solver = knapsack_solver.KnapsackSolver(
-        knapsack_solver.SolverType.KNAPSACK_DYNAMIC_PROGRAMMING_SOLVER,
+        getattr(knapsack_solver.SolverType, _KNAPSACK_SOLVERS[solver_type]),
         "knapsack",
     )
     solver.init(values, [weights], [capacity])
     total_value = solver.solve()
 
     selected = [i for i in range(len(values)) if solver.best_solution_contains(i)]
-    total_weight = sum(weights[i] for i in selected)
+    total_weight = int(np.asarray(weights, dtype=np.int64)[selected].sum())
 
     return {
         "status": "optimal",
@@ -205,7 +472,7 @@ def _knapsack(
             "total_weight": total_weight,
             "capacity": capacity,
         },
-        "solver_info": {"solver": "OR-Tools knapsack (DP)"},
+        "solver_info": {"solver": f"OR-Tools knapsack ({solver_type})"},
     }
 
 
@@ -213,7 +480,7 @@ def _knapsack(
 
 
 def _assignment(
-    cost_matrix: list[list[int]],
+    cost_matrix: Any,
 ) -> dict[str, Any]:
     """Solve linear assignment problem: minimize total cost of worker-task pairs."""
     try:
@@ -221,21 +488,16 @@ def _assignment(
     except ImportError:
         return {"error": _ORTOOLS_INSTALL_HINT}
 
-    n_workers = len(cost_matrix)
-    n_tasks = len(cost_matrix[0]) if cost_matrix else 0
-
-    end_nodes: list[int] = []
-    start_nodes: list[int] = []
-    arc_costs: list[int] = []
-
-    for w in range(n_workers):
-        for t in range(n_tasks):
-            start_nodes.append(w)
-            end_nodes.append(t)
-            arc_costs.append(cost_matrix[w][t])
+    # One dense arc per (worker, task) pair, as three contiguous int64 buffers;
+    # an int64 ndarray is used as is
+    given = np.atleast_2d(np.asarray(cost_matrix))
+    cost = given.astype(np.int64, copy=False)
+    if cost is not given and not np.array_equal(cost, given):
+        return {"error": "Assignment costs must be integers; scale fractional costs first"}
+    start_nodes, end_nodes = np.indices(cost.shape)
 
     assignment = linear_sum_assignment.SimpleLinearSumAssignment()
-    assignment.add_arcs_with_cost(start_nodes, end_nodes, arc_costs)
+    assignment.add_arcs_with_cost(start_nodes.ravel(), end_nodes.ravel(), cost.ravel())
     status = assignment.solve()
 
     status_map = {
@@ -266,16 +528,114 @@ def _assignment(
 # ── Integer / Constraint Programming (OR-Tools CP-SAT) ───────────────────────
 
 
+# Checked in order, so two-character operators win over their prefixes
+_CONSTRAINT_OPS: dict[str, Callable[[Any, Any], Any]] = {
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "<": operator.lt,
+    ">": operator.gt,
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_constraint(expr: str) -> tuple[str, str, int] | None:
+    """Split a constraint like ``"x + y <= 6"``; the constant RHS is evaluated once."""
+    for op in _CONSTRAINT_OPS:
+        if op in expr:
+            lhs_str, rhs_str = expr.split(op, 1)
+            rhs = int(eval(_compile_expr(rhs_str), {"__builtins__": {}}, {}))  # noqa: S307
+            return lhs_str.strip(), op, rhs
+    return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _compile_expr(expr: str) -> types.CodeType:
+    """Compile an integer-program expression once per distinct string."""
+    return compile(expr.strip(), "<integer_program>", "eval")
+
+
+class _NonLinearError(ValueError):
+    """Raised by the linear-expression walker on terms it cannot fold."""
+
+
+def _fold_linear(node: ast.AST) -> tuple[dict[str, int], int]:
+    """Fold an AST into ``({var: coeff}, constant)`` or raise ``_NonLinearError``."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, int | float):
+        if isinstance(node.value, bool) or not float(node.value).is_integer():
+            raise _NonLinearError(f"non-integer constant {node.value!r}")
+        return {}, int(node.value)
+    if isinstance(node, ast.Name):
+        return {node.id: 1}, 0
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub | ast.UAdd):
+        coeffs, const = _fold_linear(node.operand)
+        if isinstance(node.op, ast.UAdd):
+            return coeffs, const
+        return {k: -c for k, c in coeffs.items()}, -const
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Add | ast.Sub):
+        left, left_const = _fold_linear(node.left)
+        right, right_const = _fold_linear(node.right)
+        sign = 1 if isinstance(node.op, ast.Add) else -1
+        for name, coeff in right.items():
+            left[name] = left.get(name, 0) + sign * coeff
+        return left, left_const + sign * right_const
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mult):
+        left, left_const = _fold_linear(node.left)
+        right, right_const = _fold_linear(node.right)
+        if left and right:
+            raise _NonLinearError("product of variables")
+        terms, scale = (right, left_const) if not left else (left, right_const)
+        const = left_const * right_const
+        return {k: c * scale for k, c in terms.items()}, const
+    raise _NonLinearError(f"unsupported syntax {type(node).__name__}")
+
+
+@functools.lru_cache(maxsize=1024)
+def _linear_terms(expr: str) -> tuple[tuple[tuple[str, int], ...], int] | None:
+    """Return the folded ``((name, coeff), ...), constant`` of ``expr``, or None."""
+    try:
+        coeffs, const = _fold_linear(ast.parse(expr.strip(), mode="eval").body)
+    except (SyntaxError, _NonLinearError) as e:
+        logger.debug("Falling back to eval for %r: %s", expr, e)
+        return None
+    return tuple((name, c) for name, c in coeffs.items() if c), const
+
+
+def _linearize(
+    expr: str, var_map: dict[str, Any], safe_globals: dict[str, Any]
+) -> tuple[Any, int]:
+    """Build a CP-SAT expression for ``expr``, split as ``(linear_part, constant)``.
+
+    Unit coefficients become one ``LinearExpr.sum`` and mixed ones one
+    ``weighted_sum``, so each expression is a single object. Falls back to
+    ``eval`` (one operator-overload object per term, constant 0) for
+    expressions the walker cannot fold or that reference unknown names.
+    """
+    terms = _linear_terms(expr)
+    if terms is None or any(name not in var_map for name, _ in terms[0]):
+        return eval(_compile_expr(expr), safe_globals, var_map), 0  # noqa: S307
+
+    from ortools.sat.python import cp_model  # type: ignore[import-untyped]
+
+    coeffs, const = terms
+    variables = [var_map[name] for name, _ in coeffs]
+    if all(c == 1 for _, c in coeffs):
+        return cp_model.LinearExpr.sum(variables), const
+    return cp_model.LinearExpr.weighted_sum(variables, [c for _, c in coeffs]), const
+
+
 def _integer_program(
     variables: list[dict[str, Any]],
     constraints: list[str],
     objective: str,
     maximize: bool,
+    num_workers: int | None = None,
 ) -> dict[str, Any]:
     """Solve an integer/constraint program using OR-Tools CP-SAT.
 
     Variables are declared as ``{"name": "x", "lb": 0, "ub": 10}``.
     Constraints and objective are Python expressions using variable names.
+    The portfolio search runs ``num_workers`` threads (default: all cores).
 
     Example::
 
@@ -303,22 +663,17 @@ def _integer_program(
 
     # Add constraints (evaluated as linear expressions)
     for constraint_expr in constraints:
-        # Parse simple constraints like "x + y <= 6"
-        for op in ["<=", ">=", "==", "<", ">"]:
-            if op in constraint_expr:
-                lhs_str, rhs_str = constraint_expr.split(op, 1)
-                lhs = eval(lhs_str.strip(), safe_globals, var_map)  # noqa: S307
-                rhs = int(eval(rhs_str.strip(), safe_globals, {}))  # noqa: S307
-                if op == "<=":
-                    model.add(lhs <= rhs)
-                elif op == ">=":
-                    model.add(lhs >= rhs)
-                elif op == "==":
-                    model.add(lhs == rhs)
-                break
+        parsed = _parse_constraint(constraint_expr)
+        if parsed is None:
+            continue
+        lhs_str, op, rhs = parsed
+        lhs, lhs_const = _linearize(lhs_str, var_map, safe_globals)
+        # Move the LHS constant across rather than adding an offset term
+        model.add(_CONSTRAINT_OPS[op](lhs, rhs - lhs_const))
 
     # Set objective
-    obj_expr = eval(objective, safe_globals, var_map)  # noqa: S307
+    obj_linear, obj_const = _linearize(objective, var_map, safe_globals)
+    obj_expr = obj_linear + obj_const if obj_const else obj_linear
     if maximize:
         model.maximize(obj_expr)
     else:
@@ -326,6 +681,8 @@ def _integer_program(
 
     solver = cp_model.CpSolver()
     solver.parameters.max_time_in_seconds = 10.0
+    solver.parameters.num_workers = max(1, num_workers or os.cpu_count() or 1)
+    solver.parameters.log_search_progress = False
     status = solver.solve(model)
 
     status_map = {
@@ -349,6 +706,7 @@ def _integer_program(
         "solver_info": {
             "solver": "OR-Tools CP-SAT",
             "wall_time_s": round(solver.wall_time, 4),
+            "num_workers": solver.parameters.num_workers,
         },
     }
 
@@ -356,6 +714,107 @@ def _integer_program(
 # ── Public async API ──────────────────────────────────────────────────────────
 
 
+# Problems with fewer decision variables than this stay on the default thread
+# pool: pickling arguments to a worker process costs more than the solve.
+_PROCESS_POOL_MIN_SIZE = 100
+
+# Solver processes kept by the pool. CP-SAT runs in them get an equal share
+# of the cores, so concurrent solves never add up to more threads than cores.
+_PROCESS_POOL_WORKERS = min(4, os.cpu_count() or 1)
+_POOL_SOLVER_THREADS = max(1, (os.cpu_count() or 1) // _PROCESS_POOL_WORKERS)
+
+_PROBLEM_SIZE_KEYS = {
+    "linear_program": "c",
+    "minimize": "x0",
+    "tsp": "distance_matrix",
+    "knapsack": "values",
+    "assignment": "cost_matrix",
+    "integer_program": "variables",
+}
+
+
+@functools.cache
+def _process_pool() -> concurrent.futures.ProcessPoolExecutor:
+    """Return the shared solver process pool, created on first use.
+
+    Workers are spawned rather than forked so they never inherit the event
+    loop's threads, and they stay alive so solver imports are paid once.
+    """
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=_PROCESS_POOL_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def _executor_for(action: str, kwargs: dict[str, Any]) -> concurrent.futures.Executor | None:
+    """Pick the process pool for large problems, the default executor otherwise."""
+    value = kwargs.get(_PROBLEM_SIZE_KEYS.get(action, ""), ())
+    try:
+        if isinstance(value, (str, bytes, bytearray, memoryview)):
+            # A binary matrix's length counts bytes or characters, not rows
+            value = _to_int_matrix(value)
+        size = len(value)
+    except (TypeError, ValueError):
+        size = 0
+    return _process_pool() if size >= _PROCESS_POOL_MIN_SIZE else None
+
+
+def _solver_call(action: str, kwargs: dict[str, Any]) -> functools.partial[dict[str, Any]] | None:
+    """Bind ``kwargs`` to the solver for ``action``.
+
+    Returns a ``functools.partial`` (picklable, unlike a lambda) or None for an
+    unknown action. Raises ``KeyError`` for a missing required parameter.
+    """
+    if action == "linear_program":
+        return functools.partial(
+            _linear_program,
+            c=kwargs["c"],
+            a_ub=kwargs.get("a_ub"),
+            b_ub=kwargs.get("b_ub"),
+            a_eq=kwargs.get("a_eq"),
+            b_eq=kwargs.get("b_eq"),
+            bounds=kwargs.get("bounds"),
+            method=kwargs.get("method", "highs"),
+        )
+    if action == "minimize":
+        return functools.partial(
+            _minimize,
+            expression=kwargs["expression"],
+            x0=kwargs["x0"],
+            method=kwargs.get("method", "BFGS"),
+            bounds=kwargs.get("bounds"),
+        )
+    if action == "tsp":
+        return functools.partial(
+            _tsp,
+            distance_matrix=_to_int_matrix(kwargs["distance_matrix"]),
+            depot=kwargs.get("depot", 0),
+            first_solution_strategy=kwargs.get("first_solution_strategy", "PATH_CHEAPEST_ARC"),
+            metaheuristic=kwargs.get("metaheuristic", "GUIDED_LOCAL_SEARCH"),
+            time_limit_s=kwargs.get("time_limit_s", 5.0),
+        )
+    if action == "knapsack":
+        return functools.partial(
+            _knapsack,
+            values=kwargs["values"],
+            weights=kwargs["weights"],
+            capacity=kwargs["capacity"],
+            solver_type=kwargs.get("solver_type"),
+        )
+    if action == "assignment":
+        return functools.partial(_assignment, cost_matrix=_to_int_matrix(kwargs["cost_matrix"]))
+    if action == "integer_program":
+        return functools.partial(
+            _integer_program,
+            variables=kwargs["variables"],
+            constraints=kwargs.get("constraints", []),
+            objective=kwargs["objective"],
+            maximize=kwargs.get("maximize", True),
+            num_workers=kwargs.get("num_workers"),
+        )
+    return None
+
+
 async def optimize(
     action: str,
     cwd: str,
@@ -376,74 +835,27 @@ async def optimize(
     import asyncio
 
     action = action.lower().strip()
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
 
     try:
-        if action == "linear_program":
-            result = await loop.run_in_executor(
-                None,
-                lambda: _linear_program(
-                    c=kwargs["c"],
-                    a_ub=kwargs.get("a_ub"),
-                    b_ub=kwargs.get("b_ub"),
-                    a_eq=kwargs.get("a_eq"),
-                    b_eq=kwargs.get("b_eq"),
-                    bounds=kwargs.get("bounds"),
-                    method=kwargs.get("method", "highs"),
-                ),
-            )
-        elif action == "minimize":
-            result = await loop.run_in_executor(
-                None,
-                lambda: _minimize(
-                    expression=kwargs["expression"],
-                    x0=kwargs["x0"],
-                    method=kwargs.get("method", "BFGS"),
-                    bounds=kwargs.get("bounds"),
-                ),
-            )
-        elif action == "tsp":
-            result = await loop.run_in_executor(
-                None,
-                lambda: _tsp(
-                    distance_matrix=kwargs["distance_matrix"],
-                    depot=kwargs.get("depot", 0),
-                ),
-            )
-        elif action == "knapsack":
-            result = await loop.run_in_executor(
-                None,
-                lambda: _knapsack(
-                    values=kwargs["values"],
-                    weights=kwargs["weights"],
-                    capacity=kwargs["capacity"],
-                ),
-            )
-        elif action == "assignment":
-            result = await loop.run_in_executor(
-                None,
-                lambda: _assignment(cost_matrix=kwargs["cost_matrix"]),
-            )
-        elif action == "integer_program":
-            result = await loop.run_in_executor(
-                None,
-                lambda: _integer_program(
-                    variables=kwargs["variables"],
-                    constraints=kwargs.get("constraints", []),
-                    objective=kwargs["objective"],
-                    maximize=kwargs.get("maximize", True),
-                ),
-            )
-        else:
+        call = _solver_call(action, kwargs)
+        if call is None:
             result = {
                 "error": (
                     f"Unknown action '{action}'. "
                     "Use: linear_program, minimize, tsp, knapsack, assignment, integer_program"
                 )
             }
+        else:
+            # Sized from the bound call, whose matrices are already decoded
+            executor = _executor_for(action, call.keywords)
+            pooled_cp_sat = executor is not None and action == "integer_program"
+            if pooled_cp_sat and call.keywords["num_workers"] is None:
+                call = functools.partial(call, num_workers=_POOL_SOLVER_THREADS)
+            result = await loop.run_in_executor(executor, call)
     except KeyError as e:
         result = {"error": f"Missing required parameter: {e}"}
     except Exception as e:
         result = {"error": f"Optimization failed: {type(e).__name__}: {e}"}
 
-    return json.dumps(result, default=str)
+    return dump_json(result)
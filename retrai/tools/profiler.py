@@ -1,4 +1,4 @@
-"""Profiler tool — profile Python code with cProfile or timeit.
+"""Profiler tool — profile Python code with cProfile, pyinstrument, yappi or timeit.
 
 Supports:
 - ``profile_code``: Profile an inline Python snippet, return top hotspots.
@@ -8,6 +8,7 @@ Supports:
 
 from __future__ import annotations
 
+import base64
 import json
 import logging
 import textwrap
@@ -20,94 +21,155 @@ logger = logging.getLogger(__name__)
 # ── Code builders ─────────────────────────────────────────────────────────────
 
 
-def _build_profile_code(code: str, top_n: int) -> str:
-    """Build sandbox code that profiles ``code`` with cProfile."""
-    # Dedent user code to avoid IndentationError if passed with leading whitespace
-    dedented = textwrap.dedent(code).strip()
-    escaped = dedented.replace("\\", "\\\\").replace('"""', '\\"\\"\\"')
+# Profilers the sandbox can run. Only cProfile ships with Python; the others
+# are pip-installed into the sandbox on demand.
+_PROFILERS = ("cprofile", "pyinstrument", "yappi")
+
+
+def _stats_summary_code(top_n: int, profiler: str) -> str:
+    """Build the sandbox code that turns ``stats`` into the JSON result.
+
+    ``stats`` is a pstats-shaped dict (``(file, line, func) -> (cc, nc, tt, ct,
+    callers)``). Only the ``top_n`` entries by cumulative time are turned into
+    rows, via a bounded heap; the total is summed straight from the raw tuples
+    with a C-level ``itemgetter`` rather than a generator.
+    """
     return (
-        "import cProfile\n"
-        "import pstats\n"
-        "import io\n"
-        "import json\n"
-        "\n"
-        f'code_to_profile = """{escaped}"""\n'
-        "\n"
-        "pr = cProfile.Profile()\n"
-        "pr.enable()\n"
-        'exec(compile(code_to_profile, "<profiled>", "exec"))\n'
-        "pr.disable()\n"
-        "\n"
-        "stream = io.StringIO()\n"
-        'ps = pstats.Stats(pr, stream=stream).sort_stats("cumulative")\n'
-        f"ps.print_stats({top_n})\n"
+        "import heapq\n"
+        "import operator\n"
         "\n"
-        "stats = ps.stats\n"
-        "rows = []\n"
-        "for (filename, lineno, funcname), (cc, nc, tt, ct, _callers) in stats.items():\n"
-        "    rows.append({\n"
+        "total_ms = sum(map(operator.itemgetter(2), stats.values())) * 1000\n"
+        f"top = heapq.nlargest({top_n}, stats.items(), key=lambda item: item[1][3])\n"
+        "rows = [\n"
+        "    {\n"
         '        "name": funcname,\n'
         '        "file": filename,\n'
         '        "line": lineno,\n'
         '        "ncalls": nc,\n'
         '        "tottime_ms": round(tt * 1000, 3),\n'
         '        "cumtime_ms": round(ct * 1000, 3),\n'
-        "    })\n"
-        "\n"
-        'rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)\n'
-        'total_ms = sum(r["tottime_ms"] for r in rows)\n'
+        "    }\n"
+        "    for (filename, lineno, funcname), (cc, nc, tt, ct, _callers) in top\n"
+        "]\n"
         "\n"
         "result = {\n"
-        f'    "top_functions": rows[:{top_n}],\n'
+        f'    "profiler": {profiler!r},\n'
+        '    "top_functions": rows,\n'
         '    "total_time_ms": round(total_ms, 3),\n'
-        '    "raw_output": stream.getvalue()[-3000:],\n'
+        '    "raw_output": raw_output[-3000:],\n'
         "}\n"
         "print(json.dumps(result, default=str))\n"
     )
 
 
-def _build_profile_file(file_path: str, top_n: int) -> str:
-    """Build sandbox code that profiles a .py file."""
+def _profiled_run_code(run: str, top_n: int, profiler: str) -> str:
+    """Build sandbox code that executes ``run`` under ``profiler``.
+
+    Each profiler's output is normalized into the pstats-shaped ``stats`` dict
+    plus a ``raw_output`` text report, so the summary code is shared.
+    """
+    body = textwrap.indent(run, "    ")
+    if profiler == "pyinstrument":
+        # Statistical sampler: no call counts, but near-zero overhead on long
+        # runs. Flatten the call tree, counting recursive frames' cumulative
+        # time once per stack.
+        return (
+            "from pyinstrument import Profiler\n"
+            "\n"
+            "profiler = Profiler(interval=0.001)\n"
+            "profiler.start()\n"
+            "try:\n"
+            f"{body}\n"
+            "finally:\n"
+            "    profiler.stop()\n"
+            "\n"
+            "raw_output = profiler.output_text()\n"
+            "stats = {}\n"
+            "root = profiler.last_session.root_frame()\n"
+            "pending = [(root, frozenset())] if root is not None else []\n"
+            "while pending:\n"
+            "    frame, active = pending.pop()\n"
+            "    if frame.is_synthetic:\n"
+            "        continue\n"
+            '    key = (frame.file_path or "", frame.line_no or 0, frame.function)\n'
+            "    entry = stats.setdefault(key, [None, None, 0.0, 0.0, None])\n"
+            "    entry[2] += frame.total_self_time\n"
+            "    if key not in active:\n"
+            "        entry[3] += frame.time\n"
+            "    pending.extend((child, active | {key}) for child in frame.children)\n"
+            "\n" + _stats_summary_code(top_n, profiler)
+        )
+    if profiler == "yappi":
+        return (
+            "import yappi\n"
+            "\n"
+            'yappi.set_clock_type("wall")\n'
+            "yappi.start(builtins=True)\n"
+            "try:\n"
+            f"{body}\n"
+            "finally:\n"
+            "    yappi.stop()\n"
+            "\n"
+            "func_stats = yappi.get_func_stats()\n"
+            "stream = io.StringIO()\n"
+            "func_stats.print_all(out=stream)\n"
+            "raw_output = stream.getvalue()\n"
+            "stats = {\n"
+            "    (s.module, s.lineno, s.name): (s.ncall, s.ncall, s.tsub, s.ttot, None)\n"
+            "    for s in func_stats\n"
+            "}\n"
+            "\n" + _stats_summary_code(top_n, profiler)
+        )
     return (
         "import cProfile\n"
         "import pstats\n"
-        "import io\n"
-        "import json\n"
-        "import runpy\n"
         "\n"
         "pr = cProfile.Profile()\n"
         "pr.enable()\n"
         "try:\n"
-        f"    runpy.run_path({file_path!r}, run_name='__main__')\n"
-        "except SystemExit:\n"
-        "    pass\n"
-        "pr.disable()\n"
+        f"{body}\n"
+        "finally:\n"
+        "    pr.disable()\n"
         "\n"
         "stream = io.StringIO()\n"
         'ps = pstats.Stats(pr, stream=stream).sort_stats("cumulative")\n'
         f"ps.print_stats({top_n})\n"
-        "\n"
+        "raw_output = stream.getvalue()\n"
         "stats = ps.stats\n"
-        "rows = []\n"
-        "for (filename, lineno, funcname), (cc, nc, tt, ct, _callers) in stats.items():\n"
-        "    rows.append({\n"
-        '        "name": funcname,\n'
-        '        "file": filename,\n'
-        '        "line": lineno,\n'
-        '        "ncalls": nc,\n'
-        '        "tottime_ms": round(tt * 1000, 3),\n'
-        '        "cumtime_ms": round(ct * 1000, 3),\n'
-        "    })\n"
-        "\n"
-        'rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)\n'
-        'total_ms = sum(r["tottime_ms"] for r in rows)\n'
+        "\n" + _stats_summary_code(top_n, "cprofile")
+    )
+
+
+def _build_profile_code(code: str, top_n: int, profiler: str = "cprofile") -> str:
+    """Build sandbox code that profiles ``code`` with ``profiler`` (cProfile by default)."""
+    # Dedent user code to avoid IndentationError if passed with leading whitespace.
+    # Shipping it as base64 sidesteps quoting entirely — any backslash or
+    # triple quote in the snippet survives untouched.
+    encoded = base64.b64encode(textwrap.dedent(code).strip().encode("utf-8")).decode("ascii")
+    run = 'exec(compile(code_to_profile, "<profiled>", "exec"))'
+    return (
+        "import base64\n"
+        "import io\n"
+        "import json\n"
         "\n"
-        "result = {\n"
-        f'    "top_functions": rows[:{top_n}],\n'
-        '    "total_time_ms": round(total_ms, 3),\n'
-        '    "raw_output": stream.getvalue()[-3000:],\n'
-        "}\n"
-        "print(json.dumps(result, default=str))\n"
+        f"code_to_profile = base64.b64decode({encoded!r}).decode('utf-8')\n"
+        "\n" + _profiled_run_code(run, top_n, profiler)
+    )
+
+
+def _build_profile_file(file_path: str, top_n: int, profiler: str = "cprofile") -> str:
+    """Build sandbox code that profiles a .py file."""
+    run = (
+        "try:\n"
+        f"    runpy.run_path({file_path!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+    return (
+        "import io\n"
+        "import json\n"
+        "import runpy\n"
+        "\n" + _profiled_run_code(run, top_n, profiler)
     )
 
 
@@ -156,6 +218,7 @@ async def profile_code(
     number: int = 0,
     packages: list[str] | None = None,
     timeout: float = 60.0,
+    profiler: str = "cprofile",
 ) -> str:
     """Profile Python code or run timeit benchmarks.
 
@@ -170,20 +233,32 @@ async def profile_code(
         number: Iterations for timeit (0 = auto-calibrate).
         packages: Extra pip packages to install in sandbox.
         timeout: Sandbox timeout in seconds.
+        profiler: ``cprofile`` (default, deterministic, exact call counts),
+            ``pyinstrument`` (sampling, low overhead — preferred for code that
+            runs longer than a second) or ``yappi`` (wall-clock, thread-aware).
+            Non-default profilers are installed into the sandbox on demand.
 
     Returns:
         JSON string with profiling results.
     """
     action = action.lower().strip()
+    profiler = profiler.lower().strip()
+
+    if profiler not in _PROFILERS:
+        return json.dumps(
+            {"error": f"Unknown profiler '{profiler}'. Use: {', '.join(_PROFILERS)}"}
+        )
+    if action in ("profile_code", "profile_file") and profiler != "cprofile":
+        packages = [*(packages or []), profiler]
 
     if action == "profile_code":
         if not code:
             return json.dumps({"error": "No code provided for profile_code"})
-        sandbox_code = _build_profile_code(code, top_n)
+        sandbox_code = _build_profile_code(code, top_n, profiler)
     elif action == "profile_file":
         if not file_path:
             return json.dumps({"error": "No file_path provided for profile_file"})
-        sandbox_code = _build_profile_file(file_path, top_n)
+        sandbox_code = _build_profile_file(file_path, top_n, profiler)
     elif action == "timeit":
         if not expression:
             return json.dumps({"error": "No expression provided for timeit"})
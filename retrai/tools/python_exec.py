@@ -3,9 +3,13 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import functools
+import hashlib
+import json
 import os
 import shutil
-import tempfile
+import signal
 from dataclasses import dataclass
 from pathlib import Path
 
@@ -33,9 +37,104 @@ _SAFE_ENV_KEYS: frozenset[str] = frozenset(
 )
 
 
+# Sandbox dir -> its python binary, for venvs already known to exist.
+_VENV_CACHE: dict[Path, Path] = {}
+
+# Sandbox dir -> requirement strings already installed into it this process.
+_INSTALLED: dict[Path, set[str]] = {}
+
+# (sandbox dir, cwd) -> long-lived interpreter used by ``persistent=True`` calls.
+_WORKERS: dict[tuple[Path, str], _Worker] = {}
+
+# (sandbox dir, cwd) -> the loop and lock serializing worker spawns for that key,
+# so concurrent first calls share one worker instead of each starting their own.
+_SPAWN_LOCKS: dict[tuple[Path, str], tuple[asyncio.AbstractEventLoop, asyncio.Lock]] = {}
+
+_WORKER_LINE_LIMIT = 64 << 20  # largest single JSON reply accepted from a worker
+
+# Runs inside the sandbox: one JSON request per stdin line, one JSON reply per
+# stdout line. The protocol writes to a private dup of fd 1; fd 1 itself is
+# pointed at stderr (/dev/null) so stray C-level or child-process output
+# cannot corrupt the stream.
+_WORKER_SCRIPT = """\
+import contextlib, io, json, os, sys, traceback
+reply = os.fdopen(os.dup(1), "w")
+os.dup2(2, 1)
+for line in sys.stdin:
+    code = json.loads(line)["code"]
+    out, err, rc = io.StringIO(), io.StringIO(), 0
+    with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+        try:
+            exec(compile(code, "<stdin>", "exec"), {"__name__": "__main__"})
+        except SystemExit as e:
+            rc = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except BaseException:
+            traceback.print_exc()
+            rc = 1
+    reply.write(json.dumps({"stdout": out.getvalue(), "stderr": err.getvalue(), "rc": rc}))
+    reply.write("\\n")
+    reply.flush()
+"""
+
+
+@dataclass
+class _Worker:
+    """A sandbox interpreter that stays alive between ``persistent`` calls."""
+
+    proc: asyncio.subprocess.Process
+    loop: asyncio.AbstractEventLoop
+    lock: asyncio.Lock
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.returncode is None and self.loop is asyncio.get_running_loop()
+
+    async def run(self, code: str) -> PythonResult:
+        if self.proc.stdin is None or self.proc.stdout is None:
+            raise RuntimeError("Worker process has no stdin/stdout pipe")
+        self.proc.stdin.write(json.dumps({"code": code}).encode("utf-8") + b"\n")
+        await self.proc.stdin.drain()
+        line = await self.proc.stdout.readline()
+        if not line:
+            raise ConnectionError("Worker exited without replying")
+        reply = json.loads(line)
+        return PythonResult(stdout=reply["stdout"], stderr=reply["stderr"], returncode=reply["rc"])
+
+    def kill(self) -> None:
+        # Signal by pid: the process transport may belong to a loop that is already closed
+        if self.proc.returncode is None:
+            with contextlib.suppress(ProcessLookupError):
+                os.kill(self.proc.pid, signal.SIGKILL)
+
+
+def _spawn_lock(key: tuple[Path, str]) -> asyncio.Lock:
+    """Return the spawn lock for ``key`` on the running loop.
+
+    A lock is tied to the loop it is first contended on, so one left by an
+    earlier loop (e.g. a previous ``asyncio.run``) is replaced.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _SPAWN_LOCKS.get(key)
+    if entry is None or entry[0] is not loop:
+        entry = _SPAWN_LOCKS[key] = (loop, asyncio.Lock())
+    return entry[1]
+
+
 def _sandbox_dir(cwd: str) -> Path:
-    """Return the sandbox venv path inside the project."""
-    return Path(cwd).resolve() / ".retrai" / "sandbox"
+    """Return the sandbox venv path for the project at ``cwd``.
+
+    Defaults to ``<cwd>/.retrai/sandbox``. Setting ``RETRAI_SANDBOX_ROOT``
+    (e.g. to ``/dev/shm`` or ``$XDG_RUNTIME_DIR``) moves sandboxes onto that
+    filesystem instead — a RAM-backed root makes venv creation and cold
+    imports much faster — keyed by a hash of the project path so projects
+    never share a venv.
+    """
+    project = Path(cwd).resolve()
+    root = os.environ.get("RETRAI_SANDBOX_ROOT")
+    if root:
+        key = hashlib.sha1(str(project).encode()).hexdigest()[:16]
+        return Path(root) / "retrai" / key / "sandbox"
+    return project / ".retrai" / "sandbox"
 
 
 def _has_uv() -> bool:
@@ -67,6 +166,7 @@ def _auto_install_uv() -> bool:
     return False
 
 
+@functools.lru_cache(maxsize=1)
 def _find_uv() -> str | None:
     """Find uv binary, checking common install locations."""
     found = shutil.which("uv")
@@ -85,9 +185,17 @@ def _find_uv() -> str | None:
 
 
 def _ensure_venv(sandbox: Path) -> Path:
-    """Create the sandbox venv if it doesn't exist. Returns the python binary path."""
+    """Create the sandbox venv if it doesn't exist. Returns the python binary path.
+
+    The result is memoized per sandbox, so repeat calls skip the filesystem.
+    """
+    cached = _VENV_CACHE.get(sandbox)
+    if cached is not None:
+        return cached
+
     python = sandbox / "bin" / "python"
     if python.exists():
+        _VENV_CACHE[sandbox] = python
         return python
 
     sandbox.parent.mkdir(parents=True, exist_ok=True)
@@ -96,6 +204,7 @@ def _ensure_venv(sandbox: Path) -> Path:
     if uv is None:
         # Auto-install uv
         if _auto_install_uv():
+            _find_uv.cache_clear()
             uv = _find_uv()
 
     if uv:
@@ -116,6 +225,7 @@ def _ensure_venv(sandbox: Path) -> Path:
     if not python.exists():
         raise RuntimeError(f"Failed to create sandbox venv at {sandbox}")
 
+    _VENV_CACHE[sandbox] = python
     return python
 
 
@@ -125,12 +235,21 @@ async def _install_packages(
     cwd: str,
     timeout: float = 120.0,
 ) -> tuple[str, bool]:
-    """Install packages into the sandbox venv. Returns (output, had_error)."""
+    """Install packages into the sandbox venv. Returns (output, had_error).
+
+    Requirements already installed into ``sandbox`` by this process are
+    skipped, so repeat calls with the same ``packages`` never reach the resolver.
+    """
+    installed = _INSTALLED.setdefault(sandbox, set())
+    missing = [p for p in dict.fromkeys(packages) if p not in installed]
+    if not missing:
+        return "", False
+
     uv = _find_uv()
     if uv:
-        cmd = [uv, "pip", "install", "--python", str(sandbox / "bin" / "python"), *packages]
+        cmd = [uv, "pip", "install", "--python", str(sandbox / "bin" / "python"), *missing]
     else:
-        cmd = [str(sandbox / "bin" / "python"), "-m", "pip", "install", "--quiet", *packages]
+        cmd = [str(sandbox / "bin" / "python"), "-m", "pip", "install", "--quiet", *missing]
 
     proc = await asyncio.create_subprocess_exec(
         *cmd,
@@ -146,9 +265,13 @@ async def _install_packages(
         return "Package installation timed out", True
 
     if proc.returncode != 0:
+        # The venv may have been removed or broken — re-check everything next time
+        _INSTALLED.pop(sandbox, None)
+        _VENV_CACHE.pop(sandbox, None)
         stderr_str = stderr_bytes.decode("utf-8", errors="replace")
         return f"pip install failed (exit {proc.returncode}): {stderr_str}", True
 
+    installed.update(missing)
     return "", False
 
 
@@ -174,19 +297,30 @@ async def python_exec(
     cwd: str,
     packages: list[str] | None = None,
     timeout: float = 30.0,
+    persistent: bool = False,
 ) -> PythonResult:
     """Execute Python code in an isolated sandbox venv.
 
-    The sandbox venv lives at ``<cwd>/.retrai/sandbox/`` and is lazily
-    created on first use.  A restricted set of environment variables is
+    The sandbox venv lives at ``<cwd>/.retrai/sandbox/`` (or under
+    ``$RETRAI_SANDBOX_ROOT``, see ``_sandbox_dir``) and is lazily created on
+    first use.  A restricted set of environment variables is
     passed to the subprocess so that host secrets (API keys, tokens, etc.)
     are **not** leaked into the sandbox.
 
+    The code is piped to ``python -`` on stdin rather than written to disk,
+    so it runs as ``<stdin>`` (``__file__ == "<stdin>"``) and reads EOF from
+    ``input()``.
+
     Args:
         code: Python source code to execute.
         cwd: Project working directory (sandbox is created relative to this).
         packages: Optional list of pip packages to install before execution.
         timeout: Max seconds for the code execution (default 30).
+        persistent: Run in a long-lived sandbox interpreter shared by later
+            ``persistent`` calls for the same project, so already-imported
+            modules stay loaded. Each call still gets fresh globals, but
+            process-wide state (module attributes, ``os.environ``) carries
+            over. A timed-out or crashed worker is replaced on the next call.
 
     Returns:
         A ``PythonResult`` with stdout, stderr, returncode, and timed_out flag.
@@ -200,25 +334,90 @@ async def python_exec(
         if pip_err:
             return PythonResult(stdout="", stderr=pip_out, returncode=-1)
 
-    # Write code to a temporary file inside the project dir
-    script_fd, script_path = tempfile.mkstemp(suffix=".py", prefix="_retrai_exec_", dir=cwd)
-    try:
-        with os.fdopen(script_fd, "w") as f:
-            f.write(code)
+    env = _build_sandbox_env(sandbox)
 
-        env = _build_sandbox_env(sandbox)
+    async def spawn(python: Path) -> asyncio.subprocess.Process:
+        # ``python -`` reads the program from stdin, so no script file is written
+        return await asyncio.create_subprocess_exec(
+            str(python),
+            "-",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+        )
 
+    async def spawn_worker(python: Path) -> _Worker:
         proc = await asyncio.create_subprocess_exec(
             str(python),
-            script_path,
+            "-c",
+            _WORKER_SCRIPT,
+            stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
             cwd=cwd,
             env=env,
+            limit=_WORKER_LINE_LIMIT,
         )
+        return _Worker(proc=proc, loop=asyncio.get_running_loop(), lock=asyncio.Lock())
+
+    async def rebuild_venv() -> Path | PythonResult:
+        # Cached venv was deleted behind our back — rebuild it (and its packages) once
+        _VENV_CACHE.pop(sandbox, None)
+        _INSTALLED.pop(sandbox, None)
+        rebuilt = _ensure_venv(sandbox)
+        if packages:
+            pip_out, pip_err = await _install_packages(packages, sandbox, cwd)
+            if pip_err:
+                return PythonResult(stdout="", stderr=pip_out, returncode=-1)
+        return rebuilt
+
+    if persistent:
+        key = (sandbox, cwd)
+        async with _spawn_lock(key):
+            worker = _WORKERS.get(key)
+            if worker is not None and not worker.alive:
+                worker.kill()
+                del _WORKERS[key]
+                worker = None
+
+            if worker is None:
+                try:
+                    worker = await spawn_worker(python)
+                except FileNotFoundError:
+                    rebuilt = await rebuild_venv()
+                    if isinstance(rebuilt, PythonResult):
+                        return rebuilt
+                    worker = await spawn_worker(rebuilt)
+                _WORKERS[key] = worker
+
+        async with worker.lock:
+            try:
+                return await asyncio.wait_for(worker.run(code), timeout=timeout)
+            except TimeoutError:
+                worker.kill()
+                _WORKERS.pop(key, None)
+                return PythonResult(stdout="", stderr="", returncode=-1, timed_out=True)
+            except (ConnectionError, ValueError) as e:
+                # Worker crashed (e.g. segfault) or garbled its reply — start fresh next time
+                worker.kill()
+                _WORKERS.pop(key, None)
+                return PythonResult(stdout="", stderr=f"Sandbox worker failed: {e}", returncode=-1)
+
+    else:
+        try:
+            proc = await spawn(python)
+        except FileNotFoundError:
+            rebuilt = await rebuild_venv()
+            if isinstance(rebuilt, PythonResult):
+                return rebuilt
+            proc = await spawn(rebuilt)
 
         try:
-            stdout_bytes, stderr_bytes = await asyncio.wait_for(proc.communicate(), timeout=timeout)
+            stdout_bytes, stderr_bytes = await asyncio.wait_for(
+                proc.communicate(code.encode("utf-8")), timeout=timeout
+            )
         except TimeoutError:
             proc.kill()
             await proc.communicate()
@@ -229,9 +428,3 @@ async def python_exec(
             stderr=stderr_bytes.decode("utf-8", errors="replace"),
             returncode=proc.returncode or 0,
         )
-    finally:
-        # Clean up temp script
-        try:
-            os.unlink(script_path)
-        except OSError:
-            pass
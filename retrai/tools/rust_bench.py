@@ -11,12 +11,51 @@ import asyncio
 import json
 import logging
 import re
+import shlex
+from collections import deque
 from pathlib import Path
 from typing import Any
 
+from retrai.tools.base import dump_json
+
 logger = logging.getLogger(__name__)
 
 _TIMEOUT = 300  # 5 minutes max for a bench run
+_LINE_LIMIT = 1 << 20  # longest single output line the stream reader accepts
+_SAMPLE_CHARS = 3000  # how much raw output to echo back on failure
+
+# bench_name          time:   [12.345 ns 12.456 ns 12.567 ns]
+_CRITERION_TEXT_PATTERN = (
+    r"^(\S.*?)\s+time:\s+\[\s*([\d.]+)\s+(\w+)\s+([\d.]+)\s+(\w+)\s+([\d.]+)\s+(\w+)\s*\]"
+)
+# test bench_name ... bench:      12,345 ns/iter (+/- 123)
+_LIBTEST_PATTERN = r"test\s+(\S+)\s+\.\.\.\s+bench:\s+([\d,]+)\s+ns/iter\s+\(\+/-\s+([\d,]+)\)"
+
+# Both text formats as one alternation, so mixed output is scanned in a single
+# pass. The outer group that matched (``lastgroup``) says which format it is;
+# Criterion's fields are groups 2-8, libtest's groups 10-12.
+_BENCH_TEXT_RE = re.compile(
+    f"(?P<criterion>{_CRITERION_TEXT_PATTERN})|(?P<libtest>(?i:{_LIBTEST_PATTERN}))",
+    re.MULTILINE,
+)
+
+# Every spelling Criterion may print is a key, so lookups need no ``.lower()``;
+# an unknown unit raises KeyError instead of silently passing as nanoseconds.
+_NS_PER_UNIT: dict[str, float] = {
+    spelling: factor
+    for unit, factor in (
+        ("ps", 0.001),
+        ("ns", 1.0),
+        ("µs", 1_000.0),
+        ("us", 1_000.0),
+        ("ms", 1_000_000.0),
+        ("s", 1_000_000_000.0),
+    )
+    for spelling in (unit, unit.upper(), unit.title())
+}
+
+
+_JSON_DECODER = json.JSONDecoder()
 
 
 def _parse_criterion_json(output: str) -> list[dict[str, Any]]:
@@ -25,122 +64,176 @@ def _parse_criterion_json(output: str) -> list[dict[str, Any]]:
     Criterion can emit JSON lines when run with the right flags.
     """
     results: list[dict[str, Any]] = []
-    for line in output.splitlines():
-        line = line.strip()
-        if not line.startswith("{"):
-            continue
+    # Hop from one "{" to the next and decode in place: no per-line copies,
+    # and each decoded object is skipped over whole.
+    idx = output.find("{")
+    while idx != -1:
         try:
-            obj = json.loads(line)
-            if "id" in obj and "typical" in obj:
-                typical = obj["typical"]
-                results.append(
-                    {
-                        "name": obj["id"],
-                        "ns_per_iter": typical.get("estimate", 0),
-                        "lower_bound_ns": typical.get("lower_bound", 0),
-                        "upper_bound_ns": typical.get("upper_bound", 0),
-                        "unit": typical.get("unit", "ns"),
-                        "throughput": obj.get("throughput"),
-                        "source": "criterion_json",
-                    }
-                )
-        except (json.JSONDecodeError, KeyError):
+            obj, end = _JSON_DECODER.raw_decode(output, idx)
+        except json.JSONDecodeError:
+            idx = output.find("{", idx + 1)
             continue
+        if "id" in obj and "typical" in obj:
+            typical = obj["typical"]
+            results.append(
+                {
+                    "name": obj["id"],
+                    "ns_per_iter": typical.get("estimate", 0),
+                    "lower_bound_ns": typical.get("lower_bound", 0),
+                    "upper_bound_ns": typical.get("upper_bound", 0),
+                    "unit": typical.get("unit", "ns"),
+                    "throughput": obj.get("throughput"),
+                    "source": "criterion_json",
+                }
+            )
+        idx = output.find("{", end)
     return results
 
 
-def _parse_criterion_text(output: str) -> list[dict[str, Any]]:
-    """Parse Criterion's human-readable text output.
+def _criterion_text_row(
+    name: str,
+    lower: str,
+    lower_unit: str,
+    estimate: str,
+    est_unit: str,
+    upper: str,
+    upper_unit: str,
+) -> dict[str, Any]:
+    """Build a result row from the fields of one Criterion ``time:`` line."""
+    return {
+        "name": name.strip(),
+        "ns_per_iter": _to_ns(float(estimate), est_unit),
+        "lower_bound_ns": _to_ns(float(lower), lower_unit),
+        "upper_bound_ns": _to_ns(float(upper), upper_unit),
+        "unit": "ns",
+        "throughput": None,
+        "source": "criterion_text",
+    }
 
-    Format:
-        bench_name          time:   [12.345 ns 12.456 ns 12.567 ns]
-                            thrpt:  [1.2345 GiB/s 1.2456 GiB/s 1.2567 GiB/s]
-    """
-    results: list[dict[str, Any]] = []
-    # Match benchmark blocks
-    pattern = re.compile(
-        r"^(\S.*?)\s+time:\s+\[\s*([\d.]+)\s+(\w+)\s+([\d.]+)\s+(\w+)\s+([\d.]+)\s+(\w+)\s*\]",
-        re.MULTILINE,
-    )
-    for m in pattern.finditer(output):
-        name = m.group(1).strip()
-        lower = float(m.group(2))
-        lower_unit = m.group(3)
-        estimate = float(m.group(4))
-        est_unit = m.group(5)
-        upper = float(m.group(6))
-        upper_unit = m.group(7)
-
-        results.append(
-            {
-                "name": name,
-                "ns_per_iter": _to_ns(estimate, est_unit),
-                "lower_bound_ns": _to_ns(lower, lower_unit),
-                "upper_bound_ns": _to_ns(upper, upper_unit),
-                "unit": "ns",
-                "throughput": None,
-                "source": "criterion_text",
-            }
-        )
-    return results
+
+def _grouped_float(text: str) -> float:
+    """Parse libtest's thousands-grouped integers ("12,345"); small values have no commas."""
+    return float(text.replace(",", "")) if "," in text else float(text)
+
+
+def _libtest_row(name: str, ns_text: str, variance_text: str) -> dict[str, Any]:
+    """Build a result row from the fields of one libtest ``bench:`` line."""
+    ns = _grouped_float(ns_text)
+    variance = _grouped_float(variance_text)
+    return {
+        "name": name,
+        "ns_per_iter": ns,
+        "lower_bound_ns": ns - variance,
+        "upper_bound_ns": ns + variance,
+        "unit": "ns",
+        "throughput": None,
+        "source": "libtest",
+    }
 
 
-def _parse_libtest(output: str) -> list[dict[str, Any]]:
-    """Parse libtest benchmark output.
+def _parse_text_output(*chunks: str) -> list[dict[str, Any]]:
+    """Parse Criterion text and libtest lines in one regex pass per chunk.
 
-    Format:
+    Formats:
+        bench_name          time:   [12.345 ns 12.456 ns 12.567 ns]
         test bench_name ... bench:      12,345 ns/iter (+/- 123)
+
+    Criterion results win when both formats are present, matching the old
+    parse-Criterion-then-fall-back-to-libtest order.
     """
-    results: list[dict[str, Any]] = []
-    pattern = re.compile(
-        r"test\s+(\S+)\s+\.\.\.\s+bench:\s+([\d,]+)\s+ns/iter\s+\(\+/-\s+([\d,]+)\)",
-        re.IGNORECASE,
-    )
-    for m in pattern.finditer(output):
-        name = m.group(1)
-        ns = float(m.group(2).replace(",", ""))
-        variance = float(m.group(3).replace(",", ""))
-        results.append(
-            {
-                "name": name,
-                "ns_per_iter": ns,
-                "lower_bound_ns": ns - variance,
-                "upper_bound_ns": ns + variance,
-                "unit": "ns",
-                "throughput": None,
-                "source": "libtest",
-            }
-        )
-    return results
+    criterion: list[dict[str, Any]] = []
+    libtest: list[dict[str, Any]] = []
+    for chunk in chunks:
+        for m in _BENCH_TEXT_RE.finditer(chunk):
+            if m.lastgroup == "criterion":
+                try:
+                    criterion.append(_criterion_text_row(*m.group(2, 3, 4, 5, 6, 7, 8)))
+                except KeyError:
+                    continue  # not a time unit we know — skip rather than guess
+            else:
+                libtest.append(_libtest_row(*m.group(10, 11, 12)))
+    return criterion or libtest
 
 
 def _to_ns(value: float, unit: str) -> float:
-    """Convert a time value to nanoseconds."""
-    multipliers: dict[str, float] = {
-        "ps": 0.001,
-        "ns": 1.0,
-        "µs": 1_000.0,
-        "us": 1_000.0,
-        "ms": 1_000_000.0,
-        "s": 1_000_000_000.0,
-    }
-    return value * multipliers.get(unit.lower(), 1.0)
+    """Convert a time value to nanoseconds; raises KeyError for an unknown unit."""
+    return value * _NS_PER_UNIT[unit]
+
 
+def _parse_bench_output(*chunks: str) -> list[dict[str, Any]]:
+    """Try all parsers over each output chunk and return the best result.
 
-def _parse_bench_output(output: str) -> list[dict[str, Any]]:
-    """Try all parsers and return the best result."""
+    Chunks (e.g. stdout and stderr) are scanned separately instead of being
+    joined into one more copy of the output. The per-line JSON parser only
+    runs on chunks where Criterion's ``"typical"`` key occurs — a plain ``in``
+    scan is far cheaper than a failed JSON pass over megabytes of cargo output.
+    """
     # Try JSON first (most precise)
-    results = _parse_criterion_json(output)
+    results = [
+        row for chunk in chunks if '"typical"' in chunk for row in _parse_criterion_json(chunk)
+    ]
     if results:
         return results
 
-    # Try Criterion text
-    results = _parse_criterion_text(output)
-    if results:
-        return results
+    # Criterion text, falling back to libtest, in a single scan. Not gated on a
+    # marker: libtest lines match case-insensitively, and the fused regex is
+    # already one pass.
+    return _parse_text_output(*chunks)
+
+
+class _BenchOutputCollector:
+    """Keep only the lines of one cargo output stream the parsers can use.
+
+    Build logs and Criterion's progress chatter are dropped as they stream in.
+    A line is kept when it carries a result marker, together with the line
+    before it (Criterion prints long benchmark names on their own line). A
+    short head and tail of the raw stream are kept for error reports.
+    """
+
+    def __init__(self) -> None:
+        self._kept: list[str] = []
+        self._prev = ""
+        self._prev_kept = False
+        self.head = ""
+        self._tail: deque[str] = deque(maxlen=200)
+
+    def feed(self, line: str) -> None:
+        if len(self.head) < _SAMPLE_CHARS:
+            self.head += line
+        self._tail.append(line)
+
+        if '"typical"' in line or "time:" in line or "bench:" in line.lower():
+            if self._prev and not self._prev_kept:
+                self._kept.append(self._prev)
+            self._kept.append(line)
+            self._prev_kept = True
+        else:
+            self._prev_kept = False
+        self._prev = line
 
-    # Fall back to libtest
-    return _parse_libtest(output)
+    @property
+    def text(self) -> str:
+        return "".join(self._kept)
+
+    @property
+    def tail(self) -> str:
+        return "".join(self._tail)[-_SAMPLE_CHARS:]
+
+
+async def _collect_lines(stream: asyncio.StreamReader, collector: _BenchOutputCollector) -> None:
+    """Decode ``stream`` line by line into ``collector`` until EOF.
+
+    A line longer than the reader's limit is dropped (the reader discards it
+    when raising) so one runaway line cannot stop the drain mid-run.
+    """
+    while True:
+        try:
+            raw = await stream.readline()
+        except ValueError:
+            continue
+        if not raw:
+            return
+        collector.feed(raw.decode("utf-8", errors="replace"))
 
 
 async def rust_bench(
@@ -156,58 +249,75 @@ async def rust_bench(
         cwd: Project directory (must contain Cargo.toml)
     """
     if not (Path(cwd) / "Cargo.toml").exists():
-        return json.dumps(
+        return dump_json(
             {"error": "No Cargo.toml found — is this a Rust project?", "cwd": cwd},
-            indent=2,
+            indent=True,
         )
 
-    # Build command
+    # Build command — run cargo directly, no shell in between
     cmd_parts = ["cargo", "bench"]
     if bench_name:
         cmd_parts.append(bench_name)
     if extra_args:
-        cmd_parts.extend(extra_args.split())
+        try:
+            cmd_parts.extend(shlex.split(extra_args))
+        except ValueError as e:
+            return dump_json({"error": f"Invalid extra_args: {e}"}, indent=True)
 
-    cmd = " ".join(cmd_parts)
+    cmd = shlex.join(cmd_parts)
     logger.debug("Running: %s in %s", cmd, cwd)
 
+    stdout = _BenchOutputCollector()
+    stderr = _BenchOutputCollector()
+    proc: asyncio.subprocess.Process | None = None
     try:
-        proc = await asyncio.create_subprocess_shell(
-            cmd,
+        proc = await asyncio.create_subprocess_exec(
+            *cmd_parts,
             cwd=cwd,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
+            limit=_LINE_LIMIT,
         )
+        if proc.stdout is None or proc.stderr is None:
+            raise RuntimeError("stdout/stderr pipes were not created")
+        # Parse-relevant lines are picked out as they arrive instead of
+        # buffering the whole (often multi-MB) bench log
         try:
-            stdout_bytes, stderr_bytes = await asyncio.wait_for(
-                proc.communicate(), timeout=_TIMEOUT
+            await asyncio.wait_for(
+                asyncio.gather(
+                    _collect_lines(proc.stdout, stdout),
+                    _collect_lines(proc.stderr, stderr),
+                    proc.wait(),
+                ),
+                timeout=_TIMEOUT,
             )
         except TimeoutError:
-            proc.kill()
-            return json.dumps(
+            return dump_json(
                 {"error": f"cargo bench timed out after {_TIMEOUT}s", "command": cmd},
-                indent=2,
+                indent=True,
             )
-
-        stdout = stdout_bytes.decode("utf-8", errors="replace")
-        stderr = stderr_bytes.decode("utf-8", errors="replace")
-        combined = stdout + stderr
+        returncode = proc.returncode
 
     except Exception as e:
-        return json.dumps({"error": f"Failed to run cargo bench: {e}"}, indent=2)
+        return dump_json({"error": f"Failed to run cargo bench: {e}"}, indent=True)
+    finally:
+        # Never leave cargo running behind a timeout or a failed read
+        if proc is not None and proc.returncode is None:
+            proc.kill()
+            await proc.wait()
 
-    if proc.returncode != 0:
-        return json.dumps(
+    if returncode != 0:
+        return dump_json(
             {
-                "error": f"cargo bench failed (exit {proc.returncode})",
+                "error": f"cargo bench failed (exit {returncode})",
                 "command": cmd,
-                "stderr": stderr[:3000],
-                "stdout": stdout[:1000],
+                "stderr": stderr.tail,
+                "stdout": stdout.head[:1000],
             },
-            indent=2,
+            indent=True,
         )
 
-    benchmarks = _parse_bench_output(combined)
+    benchmarks = _parse_bench_output(stdout.text, stderr.text)
 
     # Filter by bench_name if specified
     if bench_name and benchmarks:
@@ -216,13 +326,13 @@ async def rust_bench(
             benchmarks = filtered
 
     if not benchmarks:
-        return json.dumps(
+        return dump_json(
             {
                 "warning": "No benchmarks parsed from output",
                 "command": cmd,
-                "output_sample": combined[:3000],
+                "output_sample": (stdout.head + stderr.head)[:_SAMPLE_CHARS],
             },
-            indent=2,
+            indent=True,
         )
 
     # Format output: JSON + human-readable summary
@@ -248,6 +358,6 @@ async def rust_bench(
         )
 
     summary = "\n".join(summary_lines)
-    json_output = json.dumps({"benchmarks": benchmarks, "command": cmd}, indent=2)
+    json_output = dump_json({"benchmarks": benchmarks, "command": cmd}, indent=True)
 
     return f"{summary}\n\n```json\n{json_output}\n```"
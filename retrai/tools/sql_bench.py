@@ -3,18 +3,36 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import atexit
+import functools
+import hashlib
 import logging
+import statistics
+import threading
 import time
-from dataclasses import asdict, dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+from retrai.tools.base import dump_json
+
 logger = logging.getLogger(__name__)
 
 _CONFIG_FILE = ".retrai.yml"
+_DRAIN_BATCH = 10_000  # rows fetched per round trip when only counting
+_ASYNC_POLL_S = 0.05  # poll interval for Databricks async statements
+_MAX_PARTITIONS = 50
+
+# Engines and connections outlive a single tool call so their pools (and the
+# TCP/TLS sessions behind them) are reused; they are released at exit.
+# Databricks connections may not be shared between threads (DB-API
+# threadsafety 1), so each thread gets its own: the key ends in the thread id.
+_ENGINE_CACHE: dict[str, Any] = {}
+_DATABRICKS_CACHE: dict[tuple[str, str, str, int], Any] = {}
+_CACHE_LOCK = threading.Lock()
 
 
 # ── Result dataclasses ────────────────────────────────────────────────────────
@@ -25,9 +43,14 @@ class QueryResult:
     """Result of running a SQL query."""
 
     elapsed_ms: list[float] = field(default_factory=list)
+    elapsed_ns: list[int] = field(default_factory=list)
     avg_ms: float = 0.0
     min_ms: float = 0.0
     max_ms: float = 0.0
+    median_ms: float = 0.0
+    stdev_ms: float | None = None
+    p99_ms: float | None = None
+    throughput_qps: float | None = None
     row_count: int = 0
     columns: list[str] = field(default_factory=list)
     sample_rows: list[list[Any]] = field(default_factory=list)
@@ -62,12 +85,23 @@ class TableProfile:
 
 def _load_config(cwd: str) -> dict[str, Any]:
     path = Path(cwd) / _CONFIG_FILE
-    if not path.exists():
+    try:
+        st = path.stat()
+    except OSError:
         return {}
+    # A copy, so callers can't mutate the cached dict
+    return dict(_load_config_cached(str(path), st.st_mtime_ns, st.st_size))
+
+
+@functools.lru_cache(maxsize=64)
+def _load_config_cached(path: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """Parse the config file; keyed on its stat so an edited file is re-read."""
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)  # libyaml when available
     try:
-        return yaml.safe_load(path.read_text()) or {}
+        data = yaml.load(Path(path).read_text(), Loader=loader)
     except Exception:
         return {}
+    return data if isinstance(data, dict) else {}
 
 
 def _detect_backend(cfg: dict[str, Any]) -> str:
@@ -89,17 +123,60 @@ class _SqlAlchemyBackend:
     def __init__(self, dsn: str) -> None:
         from sqlalchemy import create_engine
 
-        self._engine = create_engine(dsn)
+        with _CACHE_LOCK:
+            engine = _ENGINE_CACHE.get(dsn)
+            if engine is None:
+                engine = _ENGINE_CACHE[dsn] = create_engine(dsn, pool_pre_ping=True)
+        self._engine = engine
 
-    def execute(self, query: str) -> tuple[list[str], list[list[Any]]]:
+    def execute(self, query: str, limit: int | None = None) -> tuple[list[str], list[list[Any]]]:
+        """Run ``query``; fetch at most ``limit`` rows when given."""
         from sqlalchemy import text
 
         with self._engine.connect() as conn:
             result = conn.execute(text(query))
-            columns = list(result.keys()) if result.returns_rows else []
-            rows = [list(r) for r in result.fetchall()] if result.returns_rows else []
+            if not result.returns_rows:
+                return [], []
+            columns = list(result.keys())
+            fetched = result.fetchall() if limit is None else result.fetchmany(limit)
+            rows = [list(r) for r in fetched]
         return columns, rows
 
+    def execute_sample(
+        self, query: str, sample_limit: int
+    ) -> tuple[list[str], int, list[list[Any]]]:
+        """Run ``query`` and drain it, keeping only the first ``sample_limit`` rows.
+
+        The rest are still fetched — so timings cover the full result
+        transfer — but only counted, never copied into lists.
+        """
+        from sqlalchemy import text
+
+        with self._engine.connect() as conn:
+            result = conn.execute(text(query))
+            if not result.returns_rows:
+                return [], 0, []
+            columns = list(result.keys())
+            sample = [list(r) for r in result.fetchmany(sample_limit)] if sample_limit > 0 else []
+            row_count = len(sample)
+            for batch in result.partitions(_DRAIN_BATCH):
+                row_count += len(batch)
+        return columns, row_count, sample
+
+    def run_concurrent(
+        self, query: str, iterations: int, concurrency: int, sample_limit: int
+    ) -> list[tuple[int, list[str], int, list[list[Any]]]]:
+        """Run ``query`` ``iterations`` times on up to ``concurrency`` pooled connections.
+
+        Returns ``(elapsed_ns, columns, row_count, sample)`` per run.
+        """
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            futures = [
+                pool.submit(_run_sequential, self, query, 1, sample_limit)
+                for _ in range(iterations)
+            ]
+            return [run for future in futures for run in future.result()]
+
     def explain(self, query: str) -> str:
         """Run EXPLAIN on the query. SQLite uses EXPLAIN QUERY PLAN."""
         dialect = self._engine.dialect.name
@@ -139,7 +216,7 @@ class _SqlAlchemyBackend:
         return int(rows[0][0]) if rows else 0
 
     def close(self) -> None:
-        self._engine.dispose()
+        """Release this backend; the cached engine keeps its pool for the next call."""
 
 
 class _DatabricksBackend:
@@ -161,20 +238,235 @@ class _DatabricksBackend:
         if token:
             connect_kwargs["access_token"] = token
 
-        self._connection = dbsql.connect(**connect_kwargs)
+        token_hash = hashlib.sha256((token or "").encode()).hexdigest()
+        self._connect_kwargs = connect_kwargs
+        self._cache_key = (host, http_path, token_hash)
+        self._dbsql = dbsql
+
+    def _thread_key(self) -> tuple[str, str, str, int]:
+        return (*self._cache_key, threading.get_ident())
+
+    def _checkout(self) -> Any:
+        """Return the calling thread's cached connection, connecting on first use.
+
+        Only called from the executor thread that runs the statements, so each
+        worker thread uses its own connection and connecting never blocks the
+        event loop. Nothing else writes this thread's key, so the connect
+        itself runs outside ``_CACHE_LOCK``.
+        """
+        key = self._thread_key()
+        with _CACHE_LOCK:
+            connection = _DATABRICKS_CACHE.get(key)
+        if connection is None or not getattr(connection, "open", True):
+            connection = self._dbsql.connect(**self._connect_kwargs)
+            with _CACHE_LOCK:
+                _DATABRICKS_CACHE[key] = connection
+        return connection
+
+    def _drop_if_disconnected(self, connection: Any, error: BaseException) -> None:
+        """Forget ``connection`` when ``error`` means it is no longer usable.
+
+        An expired session or dropped connection would otherwise fail every
+        later call on this thread; the next checkout reconnects instead.
+        """
+        if connection is None or not _is_connection_error(error):
+            return
+        key = self._thread_key()
+        with _CACHE_LOCK:
+            if _DATABRICKS_CACHE.get(key) is connection:
+                del _DATABRICKS_CACHE[key]
+        try:
+            connection.close()
+        except Exception:
+            pass
 
-    def execute(self, query: str) -> tuple[list[str], list[list[Any]]]:
-        cursor = self._connection.cursor()
+    def execute(self, query: str, limit: int | None = None) -> tuple[list[str], list[list[Any]]]:
+        """Run ``query``; fetch at most ``limit`` rows when given."""
+        connection = None
         try:
-            cursor.execute(query)
-            if cursor.description:
-                columns = [desc[0] for desc in cursor.description]
-                rows = [list(r) for r in cursor.fetchall()]
-            else:
-                columns, rows = [], []
+            connection = self._checkout()
+            cursor = connection.cursor()
+            try:
+                cursor.execute(query)
+                return self._fetch(cursor, limit)
+            finally:
+                cursor.close()
+        except Exception as e:
+            self._drop_if_disconnected(connection, e)
+            raise
+
+    def execute_many(
+        self, queries: list[str], limits: list[int | None] | None = None
+    ) -> list[tuple[list[str], list[list[Any]]] | Exception]:
+        """Submit all ``queries`` before waiting on any, then collect them in order.
+
+        Uses the connector's ``execute_async`` so independent statements share
+        one round-trip of latency; older connectors run them one by one. A
+        failing statement yields its exception in place of a result.
+        """
+        row_limits: list[int | None] = list(limits) if limits else [None] * len(queries)
+        connection = None
+        try:
+            connection = self._checkout()
+            cursors = [connection.cursor() for _ in queries]
+        except Exception as e:
+            self._drop_if_disconnected(connection, e)
+            raise
+        try:
+            if not all(hasattr(c, "execute_async") for c in cursors):
+                results: list[tuple[list[str], list[list[Any]]] | Exception] = []
+                for cursor, query, limit in zip(cursors, queries, row_limits):
+                    try:
+                        cursor.execute(query)
+                        results.append(self._fetch(cursor, limit))
+                    except Exception as e:
+                        results.append(e)
+                return self._checked(connection, results)
+
+            submitted: list[Exception | None] = []
+            for cursor, query in zip(cursors, queries):
+                try:
+                    cursor.execute_async(query)
+                    submitted.append(None)
+                except Exception as e:
+                    submitted.append(e)
+
+            results = []
+            for cursor, error, limit in zip(cursors, submitted, row_limits):
+                if error is not None:
+                    results.append(error)
+                    continue
+                try:
+                    while cursor.is_query_pending():
+                        time.sleep(_ASYNC_POLL_S)
+                    cursor.get_async_execution_result()
+                    results.append(self._fetch(cursor, limit))
+                except Exception as e:
+                    results.append(e)
+            return self._checked(connection, results)
         finally:
-            cursor.close()
-        return columns, rows
+            for cursor in cursors:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+
+    def _checked(
+        self, connection: Any, results: list[tuple[list[str], list[list[Any]]] | Exception]
+    ) -> list[tuple[list[str], list[list[Any]]] | Exception]:
+        """Drop ``connection`` if any statement in a batch lost it."""
+        for result in results:
+            if isinstance(result, Exception) and _is_connection_error(result):
+                self._drop_if_disconnected(connection, result)
+                break
+        return results
+
+    @staticmethod
+    def _fetch(cursor: Any, limit: int | None) -> tuple[list[str], list[list[Any]]]:
+        if not cursor.description:
+            return [], []
+        columns = [desc[0] for desc in cursor.description]
+        fetched = cursor.fetchall() if limit is None else cursor.fetchmany(limit)
+        return columns, [list(r) for r in fetched]
+
+    def execute_sample(
+        self, query: str, sample_limit: int
+    ) -> tuple[list[str], int, list[list[Any]]]:
+        """Run ``query`` and drain it, keeping only the first ``sample_limit`` rows.
+
+        The remainder is drained as Arrow batches when the connector has
+        pyarrow support, so counted rows never become per-cell Python objects.
+        """
+        connection = None
+        try:
+            connection = self._checkout()
+            cursor = connection.cursor()
+            try:
+                cursor.execute(query)
+                return self._sample_and_count(cursor, sample_limit)
+            finally:
+                cursor.close()
+        except Exception as e:
+            self._drop_if_disconnected(connection, e)
+            raise
+
+    def run_concurrent(
+        self, query: str, iterations: int, concurrency: int, sample_limit: int
+    ) -> list[tuple[int, list[str], int, list[list[Any]]]]:
+        """Run ``query`` ``iterations`` times with up to ``concurrency`` in flight.
+
+        Statements are submitted with ``execute_async`` on their own cursors
+        and topped up as each finishes. Returns ``(elapsed_ns, columns,
+        row_count, sample)`` per run in completion order; elapsed time
+        includes polling, so it is only as fine as ``_ASYNC_POLL_S``.
+        """
+        connection = None
+        try:
+            connection = self._checkout()
+            probe = connection.cursor()
+        except Exception as e:
+            self._drop_if_disconnected(connection, e)
+            raise
+        supports_async = hasattr(probe, "execute_async")
+        probe.close()
+        if not supports_async:
+            return _run_sequential(self, query, iterations, sample_limit)
+
+        runs: list[tuple[int, list[str], int, list[list[Any]]]] = []
+        in_flight: dict[Any, int] = {}  # cursor -> submit time
+        submitted = 0
+        try:
+            while submitted < iterations or in_flight:
+                while submitted < iterations and len(in_flight) < concurrency:
+                    cursor = connection.cursor()
+                    in_flight[cursor] = time.perf_counter_ns()
+                    cursor.execute_async(query)
+                    submitted += 1
+                done = [c for c in in_flight if not c.is_query_pending()]
+                if not done:
+                    time.sleep(_ASYNC_POLL_S)
+                    continue
+                for cursor in done:
+                    start = in_flight.pop(cursor)
+                    try:
+                        cursor.get_async_execution_result()
+                        columns, row_count, sample = self._sample_and_count(cursor, sample_limit)
+                    finally:
+                        cursor.close()
+                    runs.append((time.perf_counter_ns() - start, columns, row_count, sample))
+        except Exception as e:
+            self._drop_if_disconnected(connection, e)
+            raise
+        finally:
+            for cursor in in_flight:
+                try:
+                    cursor.close()
+                except Exception:
+                    pass
+        return runs
+
+    @classmethod
+    def _sample_and_count(
+        cls, cursor: Any, sample_limit: int
+    ) -> tuple[list[str], int, list[list[Any]]]:
+        if not cursor.description:
+            return [], 0, []
+        columns = [desc[0] for desc in cursor.description]
+        sample = [list(r) for r in cursor.fetchmany(sample_limit)] if sample_limit > 0 else []
+        return columns, len(sample) + cls._drain_count(cursor), sample
+
+    @staticmethod
+    def _drain_count(cursor: Any) -> int:
+        """Fetch the rest of ``cursor``'s result in batches and return how many rows it had."""
+        count = 0
+        try:
+            while (table := cursor.fetchmany_arrow(_DRAIN_BATCH)).num_rows:
+                count += table.num_rows
+        except (AttributeError, ImportError):
+            # Connector built without pyarrow — fall back to row batches
+            while batch := cursor.fetchmany(_DRAIN_BATCH):
+                count += len(batch)
+        return count
 
     def explain(self, query: str) -> str:
         """Run EXPLAIN EXTENDED on the query."""
@@ -183,31 +475,71 @@ class _DatabricksBackend:
 
     def describe_table(self, table: str) -> tuple[list[dict[str, str]], dict[str, str]]:
         """Get column info and table properties."""
-        # DESCRIBE EXTENDED
-        _, desc_rows = self.execute(f"DESCRIBE EXTENDED {table}")
-        columns: list[dict[str, str]] = []
-        properties: dict[str, str] = {}
-        in_props = False
-        for row in desc_rows:
-            name = str(row[0]).strip() if row[0] else ""
-            if name == "" or name.startswith("#"):
-                in_props = True
-                continue
-            if in_props and name:
-                properties[name] = str(row[1]).strip() if len(row) > 1 and row[1] else ""
-            elif not in_props:
-                col_type = str(row[1]).strip() if len(row) > 1 and row[1] else "unknown"
-                comment = str(row[2]).strip() if len(row) > 2 and row[2] else ""
-                columns.append({"name": name, "type": col_type, "comment": comment})
-
-        # SHOW TABLE PROPERTIES
-        try:
-            _, prop_rows = self.execute(f"SHOW TBLPROPERTIES {table}")
-            for row in prop_rows:
+        desc, props = self.execute_many(
+            [f"DESCRIBE EXTENDED {table}", f"SHOW TBLPROPERTIES {table}"]
+        )
+        return self._parse_describe(desc, props)
+
+    def profile(
+        self, table: str
+    ) -> tuple[list[dict[str, str]], dict[str, str], int | None, list[str]]:
+        """Describe, count and list partitions of ``table`` in one batch of statements.
+
+        Returns ``(columns, properties, row_count, partitions)``; ``row_count``
+        is None when the count failed. A failing DESCRIBE is re-raised.
+        """
+        desc, props, count, parts = self.execute_many(
+            [
+                f"DESCRIBE EXTENDED {table}",
+                f"SHOW TBLPROPERTIES {table}",
+                f"SELECT COUNT(*) FROM {table}",
+                f"SHOW PARTITIONS {table}",
+            ],
+            limits=[None, None, 1, _MAX_PARTITIONS],
+        )
+        columns, properties = self._parse_describe(desc, props)
+
+        row_count: int | None = None
+        if isinstance(count, Exception):
+            logger.warning("Could not count rows for %s: %s", table, count)
+        else:
+            row_count = int(count[1][0][0]) if count[1] else 0
+
+        # SHOW PARTITIONS fails on unpartitioned tables
+        partitions = [] if isinstance(parts, Exception) else [str(row[0]) for row in parts[1]]
+        return columns, properties, row_count, partitions
+
+    @staticmethod
+    def _parse_describe(
+        desc: tuple[list[str], list[list[Any]]] | Exception,
+        props: tuple[list[str], list[list[Any]]] | Exception,
+    ) -> tuple[list[dict[str, str]], dict[str, str]]:
+        if isinstance(desc, Exception):
+            raise desc
+        _, desc_rows = desc
+        # Column rows come first; the first blank or "# ..." row starts the
+        # detailed-information section, whose named rows are properties.
+        names = [str(row[0]).strip() if row[0] else "" for row in desc_rows]
+        split = next((i for i, n in enumerate(names) if not n or n[0] == "#"), len(names))
+        columns: list[dict[str, str]] = [
+            {
+                "name": name,
+                "type": str(row[1]).strip() if len(row) > 1 and row[1] else "unknown",
+                "comment": str(row[2]).strip() if len(row) > 2 and row[2] else "",
+            }
+            for name, row in zip(names[:split], desc_rows[:split])
+        ]
+        properties: dict[str, str] = {
+            name: str(row[1]).strip() if len(row) > 1 and row[1] else ""
+            for name, row in zip(names[split:], desc_rows[split:])
+            if name and name[0] != "#"
+        }
+
+        # Not all tables support SHOW TBLPROPERTIES
+        if not isinstance(props, Exception):
+            for row in props[1]:
                 if len(row) >= 2:
                     properties[str(row[0])] = str(row[1])
-        except Exception:
-            pass  # Not all tables support SHOW TBLPROPERTIES
 
         return columns, properties
 
@@ -216,7 +548,40 @@ class _DatabricksBackend:
         return int(rows[0][0]) if rows else 0
 
     def close(self) -> None:
-        self._connection.close()
+        """Release this backend; the cached connection stays open for the next call."""
+
+
+def _is_connection_error(error: BaseException) -> bool:
+    """Whether ``error`` means a Databricks connection or session is gone.
+
+    DB-API ``InterfaceError``/``OperationalError`` cover closed connections,
+    expired sessions and transport failures; query errors such as bad SQL are
+    other ``DatabaseError`` subclasses and leave the connection usable.
+    """
+    if isinstance(error, OSError):
+        return True
+    try:
+        from databricks.sql import exc as dbsql_exc  # type: ignore[import-not-found]
+    except ImportError:
+        return False
+    return isinstance(error, (dbsql_exc.InterfaceError, dbsql_exc.OperationalError))
+
+
+def _dispose_all() -> None:
+    """Dispose every cached engine and close every cached Databricks connection."""
+    with _CACHE_LOCK:
+        for engine in _ENGINE_CACHE.values():
+            engine.dispose()
+        for connection in _DATABRICKS_CACHE.values():
+            try:
+                connection.close()
+            except Exception:
+                pass
+        _ENGINE_CACHE.clear()
+        _DATABRICKS_CACHE.clear()
+
+
+atexit.register(_dispose_all)
 
 
 def _create_backend(cfg: dict[str, Any]) -> _SqlAlchemyBackend | _DatabricksBackend:
@@ -233,44 +598,80 @@ def _create_backend(cfg: dict[str, Any]) -> _SqlAlchemyBackend | _DatabricksBack
 # ── Core actions ──────────────────────────────────────────────────────────────
 
 
+def _run_sequential(
+    backend: _SqlAlchemyBackend | _DatabricksBackend,
+    query: str,
+    iterations: int,
+    sample_limit: int,
+) -> list[tuple[int, list[str], int, list[list[Any]]]]:
+    """Time ``iterations`` back-to-back runs: ``(elapsed_ns, columns, row_count, sample)``."""
+    runs: list[tuple[int, list[str], int, list[list[Any]]]] = []
+    for _ in range(iterations):
+        start = time.perf_counter_ns()
+        columns, row_count, sample = backend.execute_sample(query, sample_limit)
+        runs.append((time.perf_counter_ns() - start, columns, row_count, sample))
+    return runs
+
+
 def _run_query_sync(
     backend: _SqlAlchemyBackend | _DatabricksBackend,
     query: str,
     iterations: int = 1,
     warmup: bool = False,
     sample_limit: int = 5,
+    concurrency: int = 1,
 ) -> QueryResult:
-    """Execute a query multiple times and collect timing data."""
+    """Execute a query multiple times and collect timing data.
+
+    Every run fetches the whole result, but only ``sample_limit`` rows are
+    turned into Python lists; the rest are just counted.
+
+    With ``concurrency`` 1 the runs are back to back, so the timings are
+    plain latencies. Larger values keep that many runs in flight at once;
+    this measures throughput under load (``throughput_qps``), and the
+    per-run times then include queueing.
+    """
     result = QueryResult()
-    warmup_time: float | None = None
 
     if warmup:
         try:
-            start = time.perf_counter()
-            backend.execute(query)
-            warmup_time = (time.perf_counter() - start) * 1000
-            result.warmup_ms = warmup_time
+            start = time.perf_counter_ns()
+            backend.execute_sample(query, 0)
+            result.warmup_ms = (time.perf_counter_ns() - start) / 1e6
         except Exception as e:
             result.error = f"Warmup failed: {e}"
             return result
 
-    for _ in range(iterations):
-        try:
-            start = time.perf_counter()
-            columns, rows = backend.execute(query)
-            elapsed = (time.perf_counter() - start) * 1000
-            result.elapsed_ms.append(round(elapsed, 2))
-            result.columns = columns
-            result.row_count = len(rows)
-            result.sample_rows = [[str(c) for c in row] for row in rows[:sample_limit]]
-        except Exception as e:
-            result.error = f"Query execution failed: {e}"
-            return result
-
-    if result.elapsed_ms:
-        result.avg_ms = round(sum(result.elapsed_ms) / len(result.elapsed_ms), 2)
-        result.min_ms = round(min(result.elapsed_ms), 2)
-        result.max_ms = round(max(result.elapsed_ms), 2)
+    wall_start = time.perf_counter_ns()
+    try:
+        if concurrency > 1 and iterations > 1:
+            runs = backend.run_concurrent(query, iterations, concurrency, sample_limit)
+        else:
+            runs = _run_sequential(backend, query, iterations, sample_limit)
+    except Exception as e:
+        result.error = f"Query execution failed: {e}"
+        return result
+    wall_ns = time.perf_counter_ns() - wall_start
+
+    for elapsed_ns, columns, row_count, sample in runs:
+        result.elapsed_ns.append(elapsed_ns)
+        result.elapsed_ms.append(round(elapsed_ns / 1e6, 2))
+    if runs:
+        _, result.columns, result.row_count, sample = runs[-1]
+        result.sample_rows = [[str(c) for c in row] for row in sample]
+
+    # Aggregate on the integer samples; convert to ms only for reporting
+    samples = result.elapsed_ns
+    if samples:
+        result.avg_ms = round(sum(samples) / len(samples) / 1e6, 2)
+        result.min_ms = round(min(samples) / 1e6, 2)
+        result.max_ms = round(max(samples) / 1e6, 2)
+        result.median_ms = round(statistics.median(samples) / 1e6, 2)
+        result.throughput_qps = round(len(samples) / (wall_ns / 1e9), 2)
+    if len(samples) > 1:
+        result.stdev_ms = round(statistics.stdev(samples) / 1e6, 2)
+        p99 = statistics.quantiles(samples, n=100, method="inclusive")[98]
+        result.p99_ms = round(p99 / 1e6, 2)
 
     return result
 
@@ -299,18 +700,27 @@ def _profile_table_sync(
 ) -> TableProfile:
     """Profile a table: schema, row count, properties."""
     profile = TableProfile(table_name=table)
-    try:
-        columns, properties = backend.describe_table(table)
-        profile.columns = columns
-        profile.properties = properties
-    except Exception as e:
-        profile.error = f"DESCRIBE failed: {e}"
-        return profile
-
-    try:
-        profile.row_count = backend.row_count(table)
-    except Exception as e:
-        logger.warning("Could not count rows for %s: %s", table, e)
+    if isinstance(backend, _DatabricksBackend):
+        # Each statement is a warehouse round-trip, so submit them together
+        try:
+            columns, properties, row_count, partitions = backend.profile(table)
+        except Exception as e:
+            profile.error = f"DESCRIBE failed: {e}"
+            return profile
+        profile.row_count = row_count
+        profile.partitions = partitions
+    else:
+        try:
+            columns, properties = backend.describe_table(table)
+        except Exception as e:
+            profile.error = f"DESCRIBE failed: {e}"
+            return profile
+        try:
+            profile.row_count = backend.row_count(table)
+        except Exception as e:
+            logger.warning("Could not count rows for %s: %s", table, e)
+    profile.columns = columns
+    profile.properties = properties
 
     # Try to extract size from properties (Databricks)
     size_str = properties.get("size", "") or properties.get("totalSize", "")
@@ -320,14 +730,6 @@ def _profile_table_sync(
         except (ValueError, TypeError):
             pass
 
-    # Partitions (Databricks only)
-    if isinstance(backend, _DatabricksBackend):
-        try:
-            _, part_rows = backend.execute(f"SHOW PARTITIONS {table}")
-            profile.partitions = [str(row[0]) for row in part_rows[:50]]
-        except Exception:
-            pass  # Table may not be partitioned
-
     return profile
 
 
@@ -341,6 +743,7 @@ async def sql_bench(
     table: str = "",
     iterations: int = 1,
     warmup: bool = False,
+    concurrency: int = 1,
 ) -> str:
     """Run SQL benchmarks, explain queries, or profile tables.
 
@@ -351,6 +754,8 @@ async def sql_bench(
         table: Table name (required for profile_table).
         iterations: Number of times to run the query (run_query only).
         warmup: Whether to run a warmup iteration before timing (run_query only).
+        concurrency: Runs kept in flight at once (run_query only). 1 measures
+            latency; more measures throughput under concurrent load.
 
     Returns:
         JSON string with structured results.
@@ -361,20 +766,20 @@ async def sql_bench(
     try:
         backend = _create_backend(cfg)
     except ImportError as e:
-        return json.dumps(
+        return dump_json(
             {
                 "error": (f"Missing dependency: {e}. Install with: uv pip install 'retrai[sql]'"),
             }
         )
     except Exception as e:
-        return json.dumps({"error": f"Connection failed: {e}"})
+        return dump_json({"error": f"Connection failed: {e}"})
 
-    loop = asyncio.get_event_loop()
+    loop = asyncio.get_running_loop()
 
     try:
         if action == "run_query":
             if not query:
-                return json.dumps({"error": "No query provided for run_query"})
+                return dump_json({"error": "No query provided for run_query"})
             result = await loop.run_in_executor(
                 None,
                 _run_query_sync,
@@ -382,33 +787,35 @@ async def sql_bench(
                 query,
                 iterations,
                 warmup,
+                5,
+                max(1, concurrency),
             )
-            return json.dumps({"action": "run_query", **asdict(result)}, default=str)
+            return dump_json({"action": "run_query", **vars(result)})
 
         elif action == "explain_query":
             if not query:
-                return json.dumps({"error": "No query provided for explain_query"})
+                return dump_json({"error": "No query provided for explain_query"})
             result = await loop.run_in_executor(
                 None,
                 _explain_query_sync,
                 backend,
                 query,
             )
-            return json.dumps({"action": "explain_query", **asdict(result)}, default=str)
+            return dump_json({"action": "explain_query", **vars(result)})
 
         elif action == "profile_table":
             if not table:
-                return json.dumps({"error": "No table name provided for profile_table"})
+                return dump_json({"error": "No table name provided for profile_table"})
             result = await loop.run_in_executor(
                 None,
                 _profile_table_sync,
                 backend,
                 table,
             )
-            return json.dumps({"action": "profile_table", **asdict(result)}, default=str)
+            return dump_json({"action": "profile_table", **vars(result)})
 
         else:
-            return json.dumps(
+            return dump_json(
                 {
                     "error": (
                         f"Unknown action '{action}'. Use: run_query, explain_query, profile_table"
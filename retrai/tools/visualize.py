@@ -2,12 +2,12 @@
 
 from __future__ import annotations
 
-import json
 import logging
 import textwrap
 from pathlib import Path
 from time import strftime
 
+from retrai.tools.base import dump_json
 from retrai.tools.python_exec import python_exec
 
 logger = logging.getLogger(__name__)
@@ -38,7 +38,7 @@ async def visualize(
     """Generate a chart from a data file and save as PNG.
 
     Args:
-        file_path: Path to CSV/JSON/Excel data file.
+        file_path: Path to a CSV/JSON/Excel/Parquet/Feather data file.
         chart_type: One of scatter, bar, histogram, heatmap,
                     boxplot, line, correlation_matrix.
         cwd: Working directory.
@@ -54,7 +54,7 @@ async def visualize(
     chart_type = chart_type.lower().strip()
 
     if chart_type not in VALID_CHART_TYPES:
-        return json.dumps(
+        return dump_json(
             {
                 "error": (
                     f"Unknown chart type '{chart_type}'. "
@@ -82,33 +82,194 @@ async def visualize(
     result = await python_exec(
         code=code,
         cwd=cwd,
-        packages=["matplotlib", "seaborn", "pandas", "numpy"],
+        packages=["matplotlib", "seaborn", "pandas", "numpy", "pyarrow"],
         timeout=60.0,
+        persistent=True,
     )
 
     if result.timed_out:
-        return json.dumps({"error": "Chart generation timed out (60s)"})
+        return dump_json({"error": "Chart generation timed out (60s)"})
 
     if result.returncode != 0:
-        return json.dumps(
+        return dump_json(
             {
                 "error": f"Chart generation failed (exit {result.returncode})",
                 "stderr": result.stderr[:2000],
             }
         )
 
+    # The chart code prints its result already formatted; pass it through
     stdout = result.stdout.strip()
+    if stdout.startswith("{"):
+        return stdout
+    return dump_json(
+        {
+            "chart_type": chart_type,
+            "output_path": output_path,
+            "raw_output": stdout[:2000],
+        }
+    )
+
+
+# Templates are dedented once at import; ``_build_chart_code`` only fills in
+# the ``repr()`` of each argument with ``str.format_map``.
+_DATA_LOAD_TMPL = textwrap.dedent("""\
+    import pandas as pd
+    import matplotlib
+    matplotlib.use('Agg')  # Non-interactive backend
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    import numpy as np
+    import json
+    from pathlib import Path
+
+    # Load data
+    fpath = {file_path}
+    if fpath.endswith(('.feather', '.arrow')):
+        df = pd.read_feather(fpath)
+    elif fpath.endswith('.parquet'):
+        df = pd.read_parquet(fpath)
+    elif fpath.endswith('.json') or fpath.endswith('.jsonl'):
+        df = pd.read_json(fpath)
+    elif fpath.endswith(('.xlsx', '.xls')):
+        df = pd.read_excel(fpath)
+    else:
+        # CSV (the default): pyarrow's multithreaded parser, else pandas' C parser
+        try:
+            df = pd.read_csv(fpath, engine='pyarrow')
+        except (ImportError, ValueError):
+            df = pd.read_csv(fpath)
+
+    # Ensure output directory exists
+    out_path = {output_path}
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+
+    # Apply style (from defaults: the worker may have drawn other charts before)
+    matplotlib.rcdefaults()
     try:
-        parsed = json.loads(stdout)
-        return json.dumps(parsed, indent=2)
-    except json.JSONDecodeError:
-        return json.dumps(
-            {
-                "chart_type": chart_type,
-                "output_path": output_path,
-                "raw_output": stdout[:2000],
-            }
+        plt.style.use({style})
+    except OSError:
+        plt.style.use('ggplot')
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+""")
+
+# Pearson correlation for the heatmap charts. Without NaNs it is one float32
+# Gram matrix of standardized columns (a single BLAS sgemm); columns are
+# centred in float64 first so large-magnitude values keep their precision.
+# NaNs need pandas' pairwise-complete handling.
+_CORR_TMPL = textwrap.dedent("""\
+    numeric = df.select_dtypes(include='number')
+    values = numeric.to_numpy(dtype=np.float64)
+    if len(values) < 2 or np.isnan(values).any():
+        corr = numeric.corr()
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            centred = values - values.mean(axis=0)
+            z = (centred / centred.std(axis=0, ddof=1)).astype(np.float32)
+            corr = pd.DataFrame(
+                z.T @ z / (len(z) - 1), index=numeric.columns, columns=numeric.columns
+            )
+""")
+
+_CHART_TMPLS: dict[str, str] = {
+    "scatter": textwrap.dedent("""\
+        x_col = {x_column} or df.columns[0]
+        y_col = {y_column} or df.columns[1]
+        sns.scatterplot(data=df, x=x_col, y=y_col, ax=ax, alpha=0.7)
+        ax.set_title({title})
+        ax.set_xlabel(x_col)
+        ax.set_ylabel(y_col)
+        cols_used = [x_col, y_col]
+    """),
+    "bar": textwrap.dedent("""\
+        x_col = {x_column} or df.columns[0]
+        y_col = {y_column}
+        if y_col:
+            sns.barplot(data=df, x=x_col, y=y_col, ax=ax)
+        else:
+            df[x_col].value_counts().head(20).plot.bar(ax=ax)
+        ax.set_title({title})
+        plt.xticks(rotation=45, ha='right')
+        cols_used = [x_col] + ([y_col] if y_col else [])
+    """),
+    "histogram": textwrap.dedent("""\
+        col = {x_column} or df.select_dtypes(
+            include='number'
+        ).columns[0]
+        sns.histplot(data=df, x=col, kde=True, ax=ax, bins=30)
+        ax.set_title({title})
+        ax.set_xlabel(col)
+        cols_used = [col]
+    """),
+    "heatmap": _CORR_TMPL
+    + textwrap.dedent("""\
+        sns.heatmap(
+            corr, annot=True, fmt='.2f', cmap='RdBu_r',
+            center=0, square=True, ax=ax,
         )
+        ax.set_title({title})
+        cols_used = list(numeric.columns)
+    """),
+    "boxplot": textwrap.dedent("""\
+        col = {x_column}
+        group = {y_column}
+        if col and group:
+            sns.boxplot(data=df, x=group, y=col, ax=ax)
+        elif col:
+            sns.boxplot(data=df, y=col, ax=ax)
+        else:
+            numeric_cols = df.select_dtypes(
+                include='number'
+            ).columns[:8]
+            df[numeric_cols].plot.box(ax=ax)
+        ax.set_title({title})
+        plt.xticks(rotation=45, ha='right')
+        cols_used = [c for c in [col, group] if c]
+        if not cols_used:
+            cols_used = list(
+                df.select_dtypes(include='number').columns[:8]
+            )
+    """),
+    "line": textwrap.dedent("""\
+        x_col = {x_column} or df.columns[0]
+        y_col = {y_column} or df.select_dtypes(
+            include='number'
+        ).columns[0]
+        sns.lineplot(data=df, x=x_col, y=y_col, ax=ax)
+        ax.set_title({title})
+        ax.set_xlabel(x_col)
+        ax.set_ylabel(y_col)
+        cols_used = [x_col, y_col]
+    """),
+    "correlation_matrix": _CORR_TMPL
+    + textwrap.dedent("""\
+        mask = np.triu(np.ones_like(corr, dtype=bool))
+        sns.heatmap(
+            corr, mask=mask, annot=True, fmt='.2f',
+            cmap='coolwarm', center=0, square=True, ax=ax,
+            linewidths=0.5,
+        )
+        ax.set_title({title})
+        cols_used = list(numeric.columns)
+    """),
+}
+
+_TAIL_TMPL = textwrap.dedent("""\
+
+    plt.tight_layout()
+    fig.savefig(out_path, dpi=150, bbox_inches='tight')
+    plt.close(fig)
+
+    result = {{
+        "chart_type": {chart_type},
+        "output_path": out_path,
+        "columns_used": cols_used,
+        "rows": len(df),
+        "title": {title},
+    }}
+    print(json.dumps(result, indent=2))
+""")
 
 
 def _build_chart_code(
@@ -121,147 +282,17 @@ def _build_chart_code(
     style: str,
 ) -> str:
     """Build Python code to generate the requested chart."""
-
-    # Data loading preamble (handles CSV, JSON, Excel)
-    data_load = textwrap.dedent(f"""\
-        import pandas as pd
-        import matplotlib
-        matplotlib.use('Agg')  # Non-interactive backend
-        import matplotlib.pyplot as plt
-        import seaborn as sns
-        import numpy as np
-        import json
-        from pathlib import Path
-
-        # Load data
-        fpath = {file_path!r}
-        if fpath.endswith('.csv'):
-            df = pd.read_csv(fpath)
-        elif fpath.endswith('.json') or fpath.endswith('.jsonl'):
-            df = pd.read_json(fpath)
-        elif fpath.endswith(('.xlsx', '.xls')):
-            df = pd.read_excel(fpath)
-        else:
-            df = pd.read_csv(fpath)  # Default to CSV
-
-        # Ensure output directory exists
-        out_path = {output_path!r}
-        Path(out_path).parent.mkdir(parents=True, exist_ok=True)
-
-        # Apply style
-        try:
-            plt.style.use({style!r})
-        except OSError:
-            plt.style.use('ggplot')
-
-        fig, ax = plt.subplots(figsize=(10, 6))
-    """)
-
-    auto_title = title or f"{chart_type.replace('_', ' ').title()}"
-
-    chart_code: dict[str, str] = {
-        "scatter": textwrap.dedent(f"""\
-            x_col = {x_column!r} or df.columns[0]
-            y_col = {y_column!r} or df.columns[1]
-            sns.scatterplot(data=df, x=x_col, y=y_col, ax=ax, alpha=0.7)
-            ax.set_title({auto_title!r})
-            ax.set_xlabel(x_col)
-            ax.set_ylabel(y_col)
-            cols_used = [x_col, y_col]
-        """),
-        "bar": textwrap.dedent(f"""\
-            x_col = {x_column!r} or df.columns[0]
-            y_col = {y_column!r}
-            if y_col:
-                sns.barplot(data=df, x=x_col, y=y_col, ax=ax)
-            else:
-                df[x_col].value_counts().head(20).plot.bar(ax=ax)
-            ax.set_title({auto_title!r})
-            plt.xticks(rotation=45, ha='right')
-            cols_used = [x_col] + ([y_col] if y_col else [])
-        """),
-        "histogram": textwrap.dedent(f"""\
-            col = {x_column!r} or df.select_dtypes(
-                include='number'
-            ).columns[0]
-            sns.histplot(data=df, x=col, kde=True, ax=ax, bins=30)
-            ax.set_title({auto_title!r})
-            ax.set_xlabel(col)
-            cols_used = [col]
-        """),
-        "heatmap": textwrap.dedent(f"""\
-            numeric = df.select_dtypes(include='number')
-            corr = numeric.corr()
-            sns.heatmap(
-                corr, annot=True, fmt='.2f', cmap='RdBu_r',
-                center=0, square=True, ax=ax,
-            )
-            ax.set_title({auto_title!r})
-            cols_used = list(numeric.columns)
-        """),
-        "boxplot": textwrap.dedent(f"""\
-            col = {x_column!r}
-            group = {y_column!r}
-            if col and group:
-                sns.boxplot(data=df, x=group, y=col, ax=ax)
-            elif col:
-                sns.boxplot(data=df, y=col, ax=ax)
-            else:
-                numeric_cols = df.select_dtypes(
-                    include='number'
-                ).columns[:8]
-                df[numeric_cols].plot.box(ax=ax)
-            ax.set_title({auto_title!r})
-            plt.xticks(rotation=45, ha='right')
-            cols_used = [c for c in [col, group] if c]
-            if not cols_used:
-                cols_used = list(
-                    df.select_dtypes(include='number').columns[:8]
-                )
-        """),
-        "line": textwrap.dedent(f"""\
-            x_col = {x_column!r} or df.columns[0]
-            y_col = {y_column!r} or df.select_dtypes(
-                include='number'
-            ).columns[0]
-            sns.lineplot(data=df, x=x_col, y=y_col, ax=ax)
-            ax.set_title({auto_title!r})
-            ax.set_xlabel(x_col)
-            ax.set_ylabel(y_col)
-            cols_used = [x_col, y_col]
-        """),
-        "correlation_matrix": textwrap.dedent(f"""\
-            numeric = df.select_dtypes(include='number')
-            corr = numeric.corr()
-            mask = np.triu(np.ones_like(corr, dtype=bool))
-            sns.heatmap(
-                corr, mask=mask, annot=True, fmt='.2f',
-                cmap='coolwarm', center=0, square=True, ax=ax,
-                linewidths=0.5,
-            )
-            ax.set_title({auto_title!r})
-            cols_used = list(numeric.columns)
-        """),
+    params = {
+        "file_path": repr(file_path),
+        "output_path": repr(output_path),
+        "style": repr(style),
+        "x_column": repr(x_column),
+        "y_column": repr(y_column),
+        "chart_type": repr(chart_type),
+        "title": repr(title or chart_type.replace("_", " ").title()),
     }
-
-    code = chart_code.get(chart_type, "cols_used = []")
-
     return (
-        data_load
-        + code
-        + textwrap.dedent(f"""\
-
-        plt.tight_layout()
-        fig.savefig(out_path, dpi=150, bbox_inches='tight')
-        plt.close(fig)
-
-        result = {{
-            "chart_type": {chart_type!r},
-            "output_path": out_path,
-            "columns_used": cols_used,
-            "rows": len(df),
-            "title": {auto_title!r},
-        }}
-        print(json.dumps(result))
-    """)
+        _DATA_LOAD_TMPL.format_map(params)
+        + _CHART_TMPLS.get(chart_type, "cols_used = []").format_map(params)
+        + _TAIL_TMPL.format_map(params)
     )
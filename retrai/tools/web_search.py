@@ -3,59 +3,299 @@
 from __future__ import annotations
 
 import asyncio
+import importlib.util
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
 from typing import Any
 
+import httpx
+
+# Parsed once; httpx reuses a URL object as-is rather than re-parsing a string.
+_API_URL = httpx.URL("https://api.duckduckgo.com/")
+
+# Formatted results by (normalized query, max_results), oldest first, with the
+# monotonic time each expires. Agents re-ask the same question across retries
+# and DuckDuckGo rate-limits repeats, so hits skip the network entirely.
+_CACHE_SIZE = 512
+_CACHE_TTL = 600.0
+_RESULTS: OrderedDict[tuple[str, int], tuple[float, str]] = OrderedDict()
+# Searches currently running, so concurrent identical calls share one request.
+# Each search is its own task rather than part of the first caller, so a caller
+# that is cancelled never cancels the search the others are waiting on.
+# Both dicts are only touched from the event loop with no await between check
+# and update, so they need no lock.
+_IN_FLIGHT: dict[tuple[str, int], asyncio.Task[str]] = {}
+
+# Shared client for the Instant Answer API fallback, so repeat searches reuse
+# pooled keep-alive connections instead of a fresh DNS/TCP/TLS handshake each.
+# A client is bound to the event loop it was first used on. A pooled connection
+# the server has since dropped is replaced with one retried connect. Idle
+# connections are kept for 30s (httpx defaults to 5s) so they outlast the gap
+# between an agent's consecutive searches.
+_KEEPALIVE_S = 30.0
+_CLIENT: httpx.AsyncClient | None = None
+_CLIENT_LOOP: asyncio.AbstractEventLoop | None = None
+
+# duckduckgo_search sessions (HTTP client plus cookies), one per executor
+# thread: reused across searches for keep-alive, never shared between threads.
+_DDGS_LOCAL = threading.local()
+
+# Upstream searches allowed at once, so parallel agent branches neither tie up
+# the default executor nor trip DuckDuckGo's rate limit. Bound to a loop, too.
+_DEFAULT_CONCURRENCY = 8
+_SLOTS: asyncio.Semaphore | None = None
+_SLOTS_LOOP: asyncio.AbstractEventLoop | None = None
+
+# Upstream request starts per second (RETRAI_SEARCH_RATE, 0 = unpaced), and
+# retries with exponential backoff when DuckDuckGo rate-limits or times out.
+# Backoff always awaits, so a waiting search never blocks other tool calls.
+_DEFAULT_RATE = 5.0
+_NEXT_START = 0.0
+_MAX_ATTEMPTS = 4
+_MAX_BACKOFF_S = 30.0
+
+
+def _get_client() -> httpx.AsyncClient:
+    """Return the shared fallback client, creating it on first use in this event loop."""
+    global _CLIENT, _CLIENT_LOOP
+    loop = asyncio.get_running_loop()
+    if _CLIENT is None or _CLIENT.is_closed or _CLIENT_LOOP is not loop:
+        _CLIENT = httpx.AsyncClient(
+            timeout=10.0,
+            transport=httpx.AsyncHTTPTransport(
+                retries=1,
+                limits=httpx.Limits(
+                    max_keepalive_connections=20,
+                    max_connections=100,
+                    keepalive_expiry=_KEEPALIVE_S,
+                ),
+            ),
+        )
+        _CLIENT_LOOP = loop
+    return _CLIENT
+
+
+def _search_slots() -> asyncio.Semaphore:
+    """Return this event loop's semaphore limiting concurrent upstream searches."""
+    global _SLOTS, _SLOTS_LOOP
+    loop = asyncio.get_running_loop()
+    if _SLOTS is None or _SLOTS_LOOP is not loop:
+        try:
+            limit = int(os.environ.get("RETRAI_SEARCH_CONCURRENCY", _DEFAULT_CONCURRENCY))
+        except ValueError:
+            limit = _DEFAULT_CONCURRENCY
+        _SLOTS = asyncio.Semaphore(max(1, limit))
+        _SLOTS_LOOP = loop
+    return _SLOTS
+
+
+async def _pace() -> None:
+    """Wait for this request's start slot, spacing starts ``1 / rate`` seconds apart."""
+    global _NEXT_START
+    try:
+        rate = float(os.environ.get("RETRAI_SEARCH_RATE", _DEFAULT_RATE))
+    except ValueError:
+        rate = _DEFAULT_RATE
+    if rate <= 0:
+        return
+    now = time.monotonic()
+    start = max(now, _NEXT_START)
+    _NEXT_START = start + 1.0 / rate
+    if start > now:
+        await asyncio.sleep(start - now)
+
+
+def _backoff_delay(exc: Exception, attempt: int) -> float | None:
+    """Seconds to wait before retrying after ``exc``, or ``None`` if it isn't retryable."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        if exc.response.status_code != 429:
+            return None
+        retry_after = exc.response.headers.get("Retry-After", "")
+        try:
+            return min(max(float(retry_after), 0.0), _MAX_BACKOFF_S)
+        except ValueError:
+            pass  # absent or an HTTP date: fall back to our own schedule
+    elif not isinstance(exc, httpx.TimeoutException) and not _is_ddgs_throttled(exc):
+        return None
+    return min(2.0**attempt, _MAX_BACKOFF_S) + random.random() * 0.5
+
+
+def _is_ddgs_throttled(exc: Exception) -> bool:
+    try:
+        from duckduckgo_search.exceptions import (  # type: ignore[import-untyped]
+            RatelimitException,
+            TimeoutException,
+        )
+    except ImportError:
+        return False
+    return isinstance(exc, (RatelimitException, TimeoutException))
+
+
+def _has_ddgs() -> bool:
+    return importlib.util.find_spec("duckduckgo_search") is not None
+
+
+def cache_clear() -> None:
+    """Forget all cached search results."""
+    _RESULTS.clear()
+
 
 async def web_search(query: str, max_results: int = 5) -> str:
     """Search the web using DuckDuckGo and return formatted results.
 
     Returns a summary of search results with titles, URLs, and snippets.
+    Successful results are cached for ``_CACHE_TTL`` seconds, and identical
+    searches already in flight are joined rather than repeated.
     """
+    key = (query.strip().lower(), max_results)
+    cached = _RESULTS.get(key)
+    if cached is not None:
+        expires, text = cached
+        if expires > time.monotonic():
+            _RESULTS.move_to_end(key)
+            return text
+        del _RESULTS[key]
+
+    while True:
+        pending = _IN_FLIGHT.get(key)
+        # A search cancelled before it started never ran its cleanup
+        if pending is None or pending.cancelled():
+            pending = asyncio.create_task(_search_and_cache(key, query, max_results))
+            pending.add_done_callback(_retrieve_outcome)
+            _IN_FLIGHT[key] = pending
+        try:
+            # Shielded: cancelling this caller leaves the shared search running
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            current = asyncio.current_task()
+            if pending.cancelled() and (current is None or not current.cancelling()):
+                continue  # the search itself was cancelled, not us: run it again
+            raise
+        except Exception as e:
+            return f"Search failed: {type(e).__name__}: {e}"
+
+
+async def _search_and_cache(key: tuple[str, int], query: str, max_results: int) -> str:
+    """Run a search on behalf of every caller joined to it, caching a success."""
     try:
-        results = await asyncio.get_event_loop().run_in_executor(
-            None, _search_sync, query, max_results
-        )
-        if not results:
-            return f"No results found for query: {query}"
+        text = await _search(query, max_results)
+    finally:
+        if _IN_FLIGHT.get(key) is asyncio.current_task():
+            del _IN_FLIGHT[key]
+    _RESULTS[key] = (time.monotonic() + _CACHE_TTL, text)
+    if len(_RESULTS) > _CACHE_SIZE:
+        _RESULTS.popitem(last=False)
+    return text
+
+
+def _retrieve_outcome(task: asyncio.Task[str]) -> None:
+    """Mark a search's error retrieved even if every caller was cancelled."""
+    if not task.cancelled():
+        task.exception()
+
 
-        formatted: list[str] = []
-        for i, r in enumerate(results, 1):
-            title = r.get("title", "No title")
-            url = r.get("href", r.get("url", ""))
-            snippet = r.get("body", r.get("snippet", ""))
-            formatted.append(f"{i}. **{title}**\n   URL: {url}\n   {snippet}")
+async def _search(query: str, max_results: int) -> str:
+    """Run one search upstream and format the results."""
+    results = await _fetch(query, max_results)
+    if not results:
+        return f"No results found for query: {query}"
 
-        return "\n\n".join(formatted)
-    except Exception as e:
-        return f"Search failed: {type(e).__name__}: {e}"
+    formatted: list[str] = []
+    for i, r in enumerate(results, 1):
+        title = r.get("title", "No title")
+        url = r.get("href", r.get("url", ""))
+        snippet = r.get("body", r.get("snippet", ""))
+        formatted.append(f"{i}. **{title}**\n   URL: {url}\n   {snippet}")
+
+    return "\n\n".join(formatted)
+
+
+async def _fetch(query: str, max_results: int) -> list[dict[str, Any]]:
+    """Fetch raw results upstream, paced and retried on rate limits and timeouts."""
+    attempt = 0
+    while True:
+        await _pace()
+        try:
+            async with _search_slots():
+                if _has_ddgs():
+                    return await asyncio.to_thread(_search_sync, query, max_results)
+                return await _search_api(query, max_results)
+        except Exception as e:
+            delay = _backoff_delay(e, attempt)
+            attempt += 1
+            if delay is None or attempt >= _MAX_ATTEMPTS:
+                raise
+        # Sleep outside the slot so a backing-off search doesn't hold one
+        await asyncio.sleep(delay)
 
 
 def _search_sync(query: str, max_results: int) -> list[dict[str, Any]]:
-    """Synchronous DuckDuckGo search."""
+    """Synchronous DuckDuckGo search via the ``duckduckgo_search`` package.
+
+    Reuses this worker thread's ``DDGS`` session; a failed session is dropped
+    so the next search on the thread starts with a fresh one.
+    """
+    ddgs = getattr(_DDGS_LOCAL, "ddgs", None)
+    if ddgs is None:
+        ddgs = _DDGS_LOCAL.ddgs = _new_ddgs()
     try:
-        from duckduckgo_search import DDGS  # type: ignore[import-untyped]
+        return list(ddgs.text(query, max_results=max_results))
+    except Exception:
+        _DDGS_LOCAL.ddgs = None
+        raise
 
-        with DDGS() as ddgs:
-            results = list(ddgs.text(query, max_results=max_results))
-        return results
-    except ImportError:
-        # Fallback: use a simple HTTP request to DuckDuckGo Lite
-        import json
-        import urllib.parse
-        import urllib.request
-
-        url = f"https://api.duckduckgo.com/?q={urllib.parse.quote(query)}&format=json&no_html=1"
-        with urllib.request.urlopen(url, timeout=10) as resp:
-            data = json.loads(resp.read())
-
-        results: list[dict[str, Any]] = []
-        for topic in data.get("RelatedTopics", [])[:max_results]:
-            if "Text" in topic and "FirstURL" in topic:
-                results.append(
-                    {
-                        "title": topic.get("Text", "")[:80],
-                        "href": topic["FirstURL"],
-                        "body": topic.get("Text", ""),
-                    }
-                )
+
+def _new_ddgs() -> Any:
+    from duckduckgo_search import DDGS  # type: ignore[import-untyped]
+
+    return DDGS()
+
+
+async def _search_api(query: str, max_results: int) -> list[dict[str, Any]]:
+    """Fallback: query DuckDuckGo's Instant Answer API over the shared client.
+
+    Topics without a text and URL (category headers) are skipped, and the
+    first ``max_results`` usable ones are kept. With ``ijson`` installed
+    (``retrai[search-api]``) the body is parsed as it streams in, and reading
+    stops once they are found.
+    """
+    results: list[dict[str, Any]] = []
+    if max_results <= 0:
         return results
+    params = {"q": query, "format": "json", "no_html": 1}
+    async with _get_client().stream("GET", _API_URL, params=params) as resp:
+        resp.raise_for_status()
+        try:
+            import ijson  # type: ignore[import-untyped]
+        except ImportError:
+            await resp.aread()
+            for topic in resp.json().get("RelatedTopics", ()):
+                if _add_topic(results, topic) and len(results) == max_results:
+                    break
+        else:
+            async for topic in ijson.items(_AsyncBody(resp), "RelatedTopics.item"):
+                if _add_topic(results, topic) and len(results) == max_results:
+                    break
+    return results
+
+
+def _add_topic(results: list[dict[str, Any]], topic: dict[str, Any]) -> bool:
+    """Append ``topic`` as a result if it links somewhere; report whether it did."""
+    if "Text" not in topic or "FirstURL" not in topic:
+        return False
+    text = topic["Text"]
+    results.append({"title": text[:80], "href": topic["FirstURL"], "body": text})
+    return True
+
+
+class _AsyncBody:
+    """Async file-like view of a streamed response body, for ``ijson``."""
+
+    def __init__(self, resp: httpx.Response) -> None:
+        self._chunks = resp.aiter_bytes()
+
+    async def read(self, size: int = -1) -> bytes:
+        return await anext(self._chunks, b"")
@@ -2,13 +2,14 @@
 
 from retrai.tui.app import RetrAITUI
 from retrai.tui.screens import GraphScreen
-from retrai.tui.setup_graph import build_setup_graph
+from retrai.tui.setup_graph import advance_setup, build_setup_graph, get_setup_graph
 from retrai.tui.widgets import (
     DashboardSparkline,
     FileTreeWidget,
     HelpPanel,
     IterationTimeline,
     StatusPanel,
+    TickBus,
     TokenSparklineWidget,
     ToolStatsPanel,
     ToolUsageTable,
@@ -20,7 +21,9 @@ __all__ = [
     "RetrAITUI",
     "GraphScreen",
     "WizardScreen",
+    "advance_setup",
     "build_setup_graph",
+    "get_setup_graph",
     "StatusPanel",
     "ToolStatsPanel",
     "TokenSparklineWidget",
@@ -29,5 +32,6 @@ __all__ = [
     "DashboardSparkline",
     "FileTreeWidget",
     "HelpPanel",
+    "TickBus",
     "build_gradient_logo",
 ]
@@ -3,11 +3,17 @@
 from __future__ import annotations
 
 import asyncio
-from typing import TYPE_CHECKING
-
+import os
+import sys
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any
+
+from rich.markup import escape
+from rich.text import Text
 from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal, Vertical, VerticalScroll
-from textual.css.query import NoMatches
 from textual.widgets import (
     Footer,
     Header,
@@ -33,15 +39,99 @@ from retrai.tui.wizard import WizardScreen
 
 if TYPE_CHECKING:
     from retrai.config import RunConfig
+    from retrai.events.types import AgentEvent
+
+_DEFAULT_THREAD_POOL_SIZE = 32
+_EVENT_BATCH = 32
+
+# Graph-state fields every run starts from; only immutable values live here.
+_INITIAL_STATE_TEMPLATE: Mapping[str, Any] = MappingProxyType(
+    {
+        "goal_achieved": False,
+        "goal_reason": "",
+        "iteration": 0,
+        "total_tokens": 0,
+        "estimated_cost_usd": 0.0,
+        "consecutive_failures": 0,
+    }
+)
+
+# ── Event-log markup ──────────────────────────────────────────
+# Constant markup is kept in templates so each event only formats its fields.
+
+_STEP_HEADER_TMPL = (
+    "\n[bold #7c3aed]┌─[/bold #7c3aed]"
+    " [bold #a78bfa]iter {iter}[/bold #a78bfa]"
+    " [dim #64748b]▸[/dim #64748b]"
+    " [bold #e2e8f0]{node}[/bold #e2e8f0]"
+)
+_TOOL_CALL_TMPL = "  [#38bdf8]⟶ {tool}[/#38bdf8] [dim]{args}[/dim]"
+_TOOL_OK_TMPL = "  [#4ade80]✓ {tool}[/#4ade80] [dim]{content}[/dim]"
+_TOOL_ERROR_TMPL = "  [#f87171]✗ {tool}[/#f87171] [dim]{content}[/dim]"
+_LLM_USAGE_TMPL = "  [#a78bfa]◈ tokens:[/#a78bfa] [dim]{prompt}in + {completion}out = {total}[/dim]"
+_GOAL_MET_TMPL = "  [bold #4ade80]◉ GOAL: {reason}[/bold #4ade80]"
+_GOAL_UNMET_TMPL = "  [#fbbf24]◌ {reason}[/#fbbf24]"
+_ITERATION_FOOTER_TMPL = "[dim #2e1065]└─────────────────────────── iteration {n} ──[/dim #2e1065]"
+_RUN_END_TMPL = "\n[bold]Run ended: {status}[/bold]"
+_ERROR_TMPL = "[bold #f87171]ERROR: {error}[/bold #f87171]"
+_LOG_TMPL = "[dim]{message}[/dim]"
+
+
+def _escape_markup(text: str) -> str:
+    """Escape agent-supplied text for the markup templates above.
+
+    Most text has no ``[`` and no trailing backslash, so nothing Rich would
+    read as markup; that text is returned as-is without running the escape regex.
+    """
+    if "[" not in text and not text.endswith("\\"):
+        return text
+    return escape(text)
+
 
 # ── Tool-name → file-action mapping ──────────────────────────
+# Only tools that name a single path; bash_exec commands aren't tracked.
 
 _TOOL_FILE_ACTIONS: dict[str, str] = {
     "file_read": "read",
     "file_write": "write",
     "file_patch": "patch",
     "file_list": "list",
-    "bash_exec": "exec",
+}
+_TOOL_ACTION_GET = _TOOL_FILE_ACTIONS.get
+
+
+# ── Tool-args formatting ──────────────────────────────────────
+
+
+def _ellipsize(s: str, n: int) -> str:
+    """Cut ``s`` to at most ``n`` characters, marking a cut with an ellipsis."""
+    return s if len(s) <= n else f"{s[: n - 1]}…"
+
+
+def _format_command_args(args: dict) -> str:
+    return _ellipsize(args.get("command", ""), 80)
+
+
+def _format_path_args(args: dict) -> str:
+    return _ellipsize(args.get("path", ""), 60)
+
+
+def _format_query_args(args: dict) -> str:
+    return _ellipsize(args.get("query", ""), 60)
+
+
+def _format_generic_args(args: dict) -> str:
+    parts = [f"{k}={v[:40] if isinstance(v, str) else repr(v)}" for k, v in args.items()]
+    return _ellipsize(", ".join(parts), 80)
+
+
+_TOOL_ARG_FORMATTERS: dict[str, Callable[[dict], str]] = {
+    "bash_exec": _format_command_args,
+    "file_read": _format_path_args,
+    "file_write": _format_path_args,
+    "file_patch": _format_path_args,
+    "file_list": _format_path_args,
+    "web_search": _format_query_args,
 }
 
 
@@ -77,7 +167,24 @@ class RetrAITUI(App[None]):
         self._tool_table: ToolUsageTable | None = None
         self._dash_spark: DashboardSparkline | None = None
         self._file_tree: FileTreeWidget | None = None
+        self._sidebar: Vertical | None = None
+        self._tabs: TabbedContent | None = None
         self._iter_tokens: int = 0
+        self._write_buf: list[str] = []
+        self._flush_handle: asyncio.Handle | None = None
+        # Event kind → bound handler, built once so dispatch is a single dict lookup
+        self._dispatch: dict[str, Callable[[dict, int], None]] = {
+            "step_start": self._on_step_start,
+            "tool_call": self._on_tool_call,
+            "tool_result": self._on_tool_result,
+            "llm_usage": self._on_llm_usage,
+            "goal_check": self._on_goal_check,
+            "human_check_required": self._on_human_check_required,
+            "iteration_complete": self._on_iteration_complete,
+            "run_end": self._on_run_end,
+            "error": self._on_error,
+            "log": self._on_log,
+        }
 
     def compose(self) -> ComposeResult:
         yield Header(show_clock=True)
@@ -89,7 +196,8 @@ class RetrAITUI(App[None]):
         # Main layout: sidebar + tabbed content
         with Horizontal(id="main-layout"):
             # ── Sidebar ──
-            with Vertical(id="sidebar"):
+            self._sidebar = Vertical(id="sidebar")
+            with self._sidebar:
                 self._status_panel = StatusPanel(self.cfg)
                 yield self._status_panel
 
@@ -105,7 +213,8 @@ class RetrAITUI(App[None]):
 
             # ── Content Area ──
             with Vertical(id="content-area"):
-                with TabbedContent(id="tabs"):
+                self._tabs = TabbedContent(id="tabs")
+                with self._tabs:
                     # Tab 1: Event Log
                     with TabPane("📋 Events", id="events"):
                         self._rich_log = RichLog(
@@ -145,6 +254,14 @@ class RetrAITUI(App[None]):
         yield Footer()
 
     def on_mount(self) -> None:
+        # Blocking tool calls (to_thread / run_in_executor) all share this pool
+        try:
+            workers = int(os.environ.get("RETRAI_THREAD_POOL_SIZE", _DEFAULT_THREAD_POOL_SIZE))
+        except ValueError:
+            workers = _DEFAULT_THREAD_POOL_SIZE
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="retrai")
+        )
         self.title = f"retrAI — {self.cfg.goal}"
         self.sub_title = self.cfg.model_name
         if not self.cfg.goal:
@@ -158,18 +275,13 @@ class RetrAITUI(App[None]):
 
     def action_switch_tab(self, tab_id: str) -> None:
         """Switch to a specific tab by ID."""
-        try:
-            self.query_one(TabbedContent).active = tab_id
-        except NoMatches:
-            pass
+        if self._tabs:
+            self._tabs.active = tab_id
 
     def action_toggle_sidebar(self) -> None:
         """Toggle sidebar visibility."""
-        try:
-            sidebar = self.query_one("#sidebar")
-            sidebar.display = not sidebar.display
-        except NoMatches:
-            pass
+        if self._sidebar:
+            self._sidebar.display = not self._sidebar.display
 
     def action_scroll_top(self) -> None:
         """Scroll event log to top."""
@@ -184,6 +296,7 @@ class RetrAITUI(App[None]):
     def action_clear_log(self) -> None:
         """Clear the event log."""
         if self._rich_log:
+            self._write_buf.clear()
             self._rich_log.clear()
             self._write("[dim]Log cleared[/dim]")
 
@@ -219,24 +332,7 @@ class RetrAITUI(App[None]):
         bus = AsyncEventBus()
         graph = build_graph(hitl_enabled=self.cfg.hitl_enabled)
 
-        initial_state = {
-            "messages": [],
-            "pending_tool_calls": [],
-            "tool_results": [],
-            "goal_achieved": False,
-            "goal_reason": "",
-            "iteration": 0,
-            "max_iterations": self.cfg.max_iterations,
-            "stop_mode": self.cfg.stop_mode,
-            "hitl_enabled": self.cfg.hitl_enabled,
-            "model_name": self.cfg.model_name,
-            "cwd": self.cfg.cwd,
-            "run_id": self.cfg.run_id,
-            "total_tokens": 0,
-            "estimated_cost_usd": 0.0,
-            "failed_strategies": [],
-            "consecutive_failures": 0,
-        }
+        initial_state = self._initial_state()
         run_config = {
             "configurable": {
                 "thread_id": self.cfg.run_id,
@@ -253,11 +349,7 @@ class RetrAITUI(App[None]):
             graph.ainvoke(initial_state, config=run_config)  # type: ignore[arg-type]
         )
 
-        async def consume() -> None:
-            async for event in bus.iter_events(q):
-                self._handle_event(event)
-
-        consumer_task = asyncio.create_task(consume())
+        consumer_task = asyncio.create_task(self._consume_events(q))
 
         try:
             final_state = await graph_task
@@ -290,138 +382,168 @@ class RetrAITUI(App[None]):
                     severity="warning",
                 )
 
+    def _initial_state(self) -> dict[str, Any]:
+        """Graph input for a new run: the fixed fields plus this run's config."""
+        cfg = self.cfg
+        return {
+            **_INITIAL_STATE_TEMPLATE,
+            # Lists are accumulated by the graph, so each run needs its own
+            "messages": [],
+            "pending_tool_calls": [],
+            "tool_results": [],
+            "failed_strategies": [],
+            "max_iterations": cfg.max_iterations,
+            "stop_mode": cfg.stop_mode,
+            "hitl_enabled": cfg.hitl_enabled,
+            "model_name": cfg.model_name,
+            "cwd": cfg.cwd,
+            "run_id": cfg.run_id,
+        }
+
     # ── Event Handler ─────────────────────────────────────────
 
+    async def _consume_events(self, q: asyncio.Queue[AgentEvent | None]) -> None:
+        """Handle bus events until the closing ``None``, a batch at a time.
+
+        The subscriber queue is unbounded, so publishing never waits on the UI.
+        A backlog is handled ``_EVENT_BATCH`` events at a time, yielding to the
+        loop between batches so rendering and the graph keep running.
+        """
+        # Bound once: these run for every event of the run
+        handle, get_nowait, empty = self._handle_event, q.get_nowait, q.empty
+        while True:
+            batch = [await q.get()]
+            while len(batch) < _EVENT_BATCH and not empty():
+                batch.append(get_nowait())
+            for event in batch:
+                if event is None:
+                    return
+                handle(event)
+            await asyncio.sleep(0)
+
     def _handle_event(self, event: object) -> None:
-        kind = getattr(event, "kind", "")
-        payload: dict = getattr(event, "payload", {})
-        iteration: int = getattr(event, "iteration", 0)
-
-        if kind == "step_start":
-            node = payload.get("node", "?")
-            self._iter_tokens = 0  # Reset per-iteration token counter
-            header = (
-                f"\n[bold #7c3aed]┌─[/bold #7c3aed]"
-                f" [bold #a78bfa]iter {iteration}[/bold #a78bfa]"
-                f" [dim #64748b]▸[/dim #64748b]"
-                f" [bold #e2e8f0]{node.upper()}[/bold #e2e8f0]"
-            )
-            self._write(header)
-            if self._status_panel:
-                self._status_panel.iteration = iteration
-            if self._timeline and node == "plan":
-                self._timeline.add_running_marker()
-
-        elif kind == "tool_call":
-            tool = payload.get("tool", "?")
-            args = payload.get("args", {})
-            arg_str = self._format_tool_args(tool, args)
-            self._write(f"  [#38bdf8]⟶ {tool}[/#38bdf8] [dim]{arg_str}[/dim]")
-            # Track file activity
-            self._track_file(tool, args)
-
-        elif kind == "tool_result":
-            tool = payload.get("tool", "?")
-            err = payload.get("error", False)
-            content = str(payload.get("content", ""))[:150]
-            if err:
-                self._write(f"  [#f87171]✗ {tool}[/#f87171] [dim]{content!r}[/dim]")
-            else:
-                self._write(f"  [#4ade80]✓ {tool}[/#4ade80] [dim]{content!r}[/dim]")
-            # Update tool stats
-            if self._tool_stats:
-                self._tool_stats.record_call(tool, error=err)
-            if self._tool_table:
-                self._tool_table.record(tool, error=err)
-
-        elif kind == "llm_usage":
-            total = payload.get("total_tokens", 0)
-            prompt = payload.get("prompt_tokens", 0)
-            completion = payload.get("completion_tokens", 0)
-            self._iter_tokens += total
-            self._write(
-                f"  [#a78bfa]◈ tokens:[/#a78bfa] [dim]{prompt}in + {completion}out = {total}[/dim]"
+        handler = self._dispatch.get(getattr(event, "kind", ""))
+        if handler is not None:
+            payload: dict = getattr(event, "payload", {})
+            handler(payload, getattr(event, "iteration", 0))
+
+    def _on_step_start(self, payload: dict, iteration: int) -> None:
+        node = payload.get("node", "?")
+        self._iter_tokens = 0  # Reset per-iteration token counter
+        self._write(_STEP_HEADER_TMPL.format(iter=iteration, node=node.upper()))
+        if panel := self._status_panel:
+            panel.iteration = iteration
+        if (timeline := self._timeline) and node == "plan":
+            timeline.add_running_marker()
+
+    def _on_tool_call(self, payload: dict, iteration: int) -> None:
+        tool = sys.intern(payload.get("tool", "?"))
+        args = payload.get("args", {})
+        self._write(
+            _TOOL_CALL_TMPL.format(
+                tool=tool, args=_escape_markup(self._format_tool_args(tool, args))
             )
-            if self._status_panel:
-                self._status_panel.total_tokens += total
-
-        elif kind == "goal_check":
-            achieved = payload.get("achieved", False)
-            reason = payload.get("reason", "")
-            if achieved:
-                self._write(f"  [bold #4ade80]◉ GOAL: {reason}[/bold #4ade80]")
-            else:
-                self._write(f"  [#fbbf24]◌ {reason}[/#fbbf24]")
-            if self._timeline:
-                self._timeline.replace_last_marker(achieved)
-
-        elif kind == "human_check_required":
-            self._write("[bold #fb923c]⏸  Human approval required[/bold #fb923c]")
-            self.notify(
-                "Human approval required",
-                title="retrAI — HITL",
-                severity="warning",
+        )
+        # Track file activity
+        self._track_file(tool, args)
+
+    def _on_tool_result(self, payload: dict, iteration: int) -> None:
+        tool = sys.intern(payload.get("tool", "?"))
+        err = payload.get("error", False)
+        content = repr(str(payload.get("content", ""))[:150])
+        tmpl = _TOOL_ERROR_TMPL if err else _TOOL_OK_TMPL
+        self._write(tmpl.format(tool=tool, content=_escape_markup(content)))
+        # Update tool stats
+        if stats := self._tool_stats:
+            stats.record_call(tool, error=err)
+        if table := self._tool_table:
+            table.record(tool, error=err)
+
+    def _on_llm_usage(self, payload: dict, iteration: int) -> None:
+        total = payload.get("total_tokens", 0)
+        self._iter_tokens += total
+        self._write(
+            _LLM_USAGE_TMPL.format(
+                prompt=payload.get("prompt_tokens", 0),
+                completion=payload.get("completion_tokens", 0),
+                total=total,
             )
+        )
+        if panel := self._status_panel:
+            panel.total_tokens += total
+
+    def _on_goal_check(self, payload: dict, iteration: int) -> None:
+        achieved = payload.get("achieved", False)
+        tmpl = _GOAL_MET_TMPL if achieved else _GOAL_UNMET_TMPL
+        self._write(tmpl.format(reason=_escape_markup(str(payload.get("reason", "")))))
+        if timeline := self._timeline:
+            timeline.replace_last_marker(achieved)
+
+    def _on_human_check_required(self, payload: dict, iteration: int) -> None:
+        self._write("[bold #fb923c]⏸  Human approval required[/bold #fb923c]")
+        self.notify(
+            "Human approval required",
+            title="retrAI — HITL",
+            severity="warning",
+        )
 
-        elif kind == "iteration_complete":
-            n = payload.get("iteration", 0)
-            self._write(f"[dim #2e1065]└─────────────────────────── iteration {n} ──[/dim #2e1065]")
-            if self._status_panel:
-                self._status_panel.iteration = n
-            # Feed sparklines with this iteration's token usage
-            if self._iter_tokens > 0:
-                if self._token_spark:
-                    self._token_spark.append(self._iter_tokens)
-                if self._dash_spark:
-                    self._dash_spark.append(self._iter_tokens)
-            self._iter_tokens = 0
-
-        elif kind == "run_end":
-            status = payload.get("status", "?")
-            self._write(f"\n[bold]Run ended: {status}[/bold]")
-
-        elif kind == "error":
-            err = payload.get("error", "?")
-            self._write(f"[bold #f87171]ERROR: {err}[/bold #f87171]")
-
-        elif kind == "log":
-            msg = payload.get("message", "")
-            self._write(f"[dim]{msg}[/dim]")
+    def _on_iteration_complete(self, payload: dict, iteration: int) -> None:
+        n = payload.get("iteration", 0)
+        self._write(_ITERATION_FOOTER_TMPL.format(n=n))
+        if panel := self._status_panel:
+            panel.iteration = n
+        # Feed sparklines with this iteration's token usage
+        tokens = self._iter_tokens
+        if tokens > 0:
+            if spark := self._token_spark:
+                spark.append(tokens)
+            if spark := self._dash_spark:
+                spark.append(tokens)
+        self._iter_tokens = 0
+
+    def _on_run_end(self, payload: dict, iteration: int) -> None:
+        self._write(_RUN_END_TMPL.format(status=_escape_markup(str(payload.get("status", "?")))))
+
+    def _on_error(self, payload: dict, iteration: int) -> None:
+        self._write(_ERROR_TMPL.format(error=_escape_markup(str(payload.get("error", "?")))))
+
+    def _on_log(self, payload: dict, iteration: int) -> None:
+        self._write(_LOG_TMPL.format(message=_escape_markup(str(payload.get("message", "")))))
 
     # ── Helpers ────────────────────────────────────────────────
 
     def _write(self, text: str) -> None:
-        if self._rich_log:
-            self._rich_log.write(text)
+        """Queue a markup line; lines written in the same loop tick share one RichLog write."""
+        if not self._rich_log:
+            return
+        self._write_buf.append(text)
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_soon(self._flush_log)
+
+    def _flush_log(self) -> None:
+        self._flush_handle = None
+        lines, self._write_buf = self._write_buf, []
+        if not self._rich_log or not lines:
+            return
+        # Parse each line on its own so an unclosed tag can't bleed into the next
+        log = self._rich_log
+        texts = [Text.from_markup(line) for line in lines]
+        if log.highlight:
+            texts = [log.highlighter(t) for t in texts]
+        log.write(Text("\n").join(texts))
 
     def _format_tool_args(self, tool: str, args: dict) -> str:
         """Format tool args for compact display."""
-        if tool in ("bash_exec",):
-            cmd = args.get("command", "")
-            return cmd[:80] if len(cmd) <= 80 else cmd[:77] + "…"
-        if tool in ("file_read", "file_write", "file_patch", "file_list"):
-            path = args.get("path", "")
-            return path[:60]
-        if tool == "web_search":
-            return args.get("query", "")[:60]
-        # Generic fallback
-        parts: list[str] = []
-        for k, v in args.items():
-            v_str = repr(v) if not isinstance(v, str) else v[:40]
-            parts.append(f"{k}={v_str}")
-        return ", ".join(parts)[:80]
+        return _TOOL_ARG_FORMATTERS.get(tool, _format_generic_args)(args)
 
     def _track_file(self, tool: str, args: dict) -> None:
         """Track file activity in the file tree."""
-        action = _TOOL_FILE_ACTIONS.get(tool)
-        if not action or not self._file_tree:
-            return
-        path = args.get("path") or args.get("command", "")
-        if tool == "bash_exec":
-            # Try to extract file paths from commands, skip generic commands
+        action = _TOOL_ACTION_GET(tool)
+        if not action or not (tree := self._file_tree):
             return
+        path = args.get("path")
         if path:
             # Normalize path
-            clean = path.lstrip("./")
+            clean = path[2:] if path.startswith("./") else path.lstrip("/")
             if clean:
-                self._file_tree.add_file(clean, action=action)
+                tree.add_file(clean, action=action)
@@ -3,6 +3,7 @@
 
 from __future__ import annotations
 
+from rich.text import Text
 from textual.app import ComposeResult
 from textual.containers import Vertical
 from textual.screen import ModalScreen
@@ -70,6 +71,11 @@ GRAPH_ART_HITL = """
 """
 
 
+# Parsed once here; GraphScreen is opened repeatedly and the markup is static.
+_GRAPH_DEFAULT = Text.from_markup(GRAPH_ART_DEFAULT)
+_GRAPH_HITL = Text.from_markup(GRAPH_ART_HITL)
+
+
 class GraphScreen(ModalScreen[None]):
     """Modal overlay showing the agent graph visualization."""
 
@@ -89,8 +95,7 @@ class GraphScreen(ModalScreen[None]):
                 "[bold #c084fc]🔗 Agent State Graph[/bold #c084fc]",
                 id="graph-title",
             )
-            art = GRAPH_ART_HITL if self._hitl else GRAPH_ART_DEFAULT
-            yield Static(art, id="graph-art")
+            yield Static(_GRAPH_HITL if self._hitl else _GRAPH_DEFAULT, id="graph-art")
             yield Label(
                 "[dim]Press [bold]Esc[/bold] or [bold]g[/bold] to close[/dim]",
                 id="graph-legend",
@@ -1,11 +1,12 @@
-"""LangGraph StateGraph for the experiment setup wizard flow."""
+"""Step flow for the experiment setup wizard, plus an equivalent LangGraph StateGraph."""
 
 from __future__ import annotations
 
-from typing import TypedDict
+import functools
+from typing import TYPE_CHECKING, TypedDict
 
-from langgraph.graph import END, START, StateGraph
-from langgraph.graph.state import CompiledStateGraph
+if TYPE_CHECKING:
+    from langgraph.graph.state import CompiledStateGraph
 
 
 class SetupState(TypedDict):
@@ -81,6 +82,27 @@ STEP_LABELS: dict[str, str] = {
 }
 
 
+# Step that follows each step; review is routed by route_after_review
+_NEXT_STEP: dict[str, str] = dict(zip(SETUP_STEPS, SETUP_STEPS[1:], strict=False))
+
+
+def advance_setup(state: SetupState) -> SetupState | None:
+    """Return ``state`` moved to the next wizard step, or ``None`` when the flow ends.
+
+    Walks the same topology as :func:`build_setup_graph` with plain lookups,
+    so the wizard never needs LangGraph's compile or executor machinery.
+    """
+    step = state["step"]
+    next_step = _NEXT_STEP.get(step)
+    if next_step is None:
+        if step != "review":
+            raise ValueError(f"Unknown setup step: {step!r}")
+        if route_after_review(state) == "end":
+            return None
+        next_step = "select_goal"
+    return {**state, "step": next_step}
+
+
 def build_setup_graph() -> CompiledStateGraph:
     """Build and compile the experiment setup wizard graph.
 
@@ -89,7 +111,12 @@ def build_setup_graph() -> CompiledStateGraph:
                                                                    ↓
                                                           (confirm) → END
                                                           (back)   → select_goal
+
+    :func:`advance_setup` follows the same flow without LangGraph, which is
+    only imported when a graph is actually built.
     """
+    from langgraph.graph import END, START, StateGraph
+
     builder = StateGraph(SetupState)
 
     # Add nodes
@@ -114,6 +141,16 @@ def build_setup_graph() -> CompiledStateGraph:
     return builder.compile()
 
 
+@functools.cache
+def get_setup_graph() -> CompiledStateGraph:
+    """Return the setup graph, compiled on first use and shared afterwards.
+
+    The topology, nodes and schema are module constants, so one compiled
+    graph serves every caller; use :func:`build_setup_graph` for a fresh one.
+    """
+    return build_setup_graph()
+
+
 def make_initial_setup_state(
     *,
     cwd: str = ".",
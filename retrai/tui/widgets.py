@@ -2,17 +2,27 @@
 
 from __future__ import annotations
 
+import functools
+import sys
 import time
+from collections import Counter, deque
+from collections.abc import Callable
+from itertools import chain, repeat
 from typing import TYPE_CHECKING
 
+from rich.style import Style
 from rich.text import Text
 from textual.app import ComposeResult
 from textual.containers import Vertical
-from textual.css.query import NoMatches
 from textual.reactive import reactive
 from textual.widgets import DataTable, Label, ProgressBar, Sparkline, Static, Tree
 
 if TYPE_CHECKING:
+    from textual.app import App
+    from textual.timer import Timer
+    from textual.widget import Widget
+    from textual.widgets.tree import TreeNode
+
     from retrai.config import RunConfig
 
 # ── Logo Art ──────────────────────────────────────────────────
@@ -37,6 +47,13 @@ GRADIENT_COLORS = [
     "#5b21b6",
 ]
 
+# Seconds StatusPanel and the sparklines wait to batch changes into one render
+_FLUSH_DELAY = 0.05
+# Iterations the token sparklines keep; older values scroll off
+_SPARK_HISTORY = 240
+# Markers the iteration timeline shows; older ones fold into a "…+N" count
+_TIMELINE_MARKERS = 200
+
 STATUS_STYLES: dict[str, tuple[str, str]] = {
     "IDLE": ("dim", "○"),
     "RUNNING": ("bold #a78bfa", "◉"),
@@ -44,14 +61,24 @@ STATUS_STYLES: dict[str, tuple[str, str]] = {
     "FAILED": ("bold #f87171", "✗"),
 }
 
+# Badge markup per known status, built once rather than on every change
+_STATUS_BADGES: dict[str, str] = {
+    name: f"[{style}]  {icon}  {name}  [/{style}]" for name, (style, icon) in STATUS_STYLES.items()
+}
+
 
+@functools.cache
 def build_gradient_logo() -> Text:
-    """Return the ASCII logo as a Rich Text with purple→magenta gradient."""
+    """Return the ASCII logo as a Rich Text with purple→magenta gradient.
+
+    Built once and shared by every screen that shows it, so treat it as read-only;
+    ``build_gradient_logo().copy()`` gives a Text that is safe to modify.
+    """
     text = Text()
-    lines = LOGO_ART.strip("\n").split("\n")
-    for i, line in enumerate(lines):
-        color = GRADIENT_COLORS[min(i, len(GRADIENT_COLORS) - 1)]
-        text.append(line + "\n", style=f"bold {color}")
+    # Lines past the end of the gradient keep its last color
+    colors = chain(GRADIENT_COLORS, repeat(GRADIENT_COLORS[-1]))
+    for line, color in zip(LOGO_ART.strip("\n").split("\n"), colors):
+        text.append(line + "\n", style=Style(bold=True, color=color))
     text.append(
         "  self-solving AI agent loop  ",
         style="italic #64748b",
@@ -59,12 +86,80 @@ def build_gradient_logo() -> Text:
     return text
 
 
+# ── Shared Tick ───────────────────────────────────────────────
+
+
+class TickBus:
+    """One app-wide interval driving every time-based widget.
+
+    Subscribers are called in turn from a single timer, so the event loop
+    wakes once per tick however many widgets need it. The timer starts with
+    the first subscriber and stops when the last one leaves.
+    """
+
+    __slots__ = ("interval", "_callbacks", "_app", "_timer")
+
+    def __init__(self, interval: float = 1.0) -> None:
+        self.interval = interval
+        # Insertion-ordered set of callbacks, run in subscription order
+        self._callbacks: dict[Callable[[], object], None] = {}
+        self._app: App | None = None
+        self._timer: Timer | None = None
+
+    def subscribe(self, widget: Widget, callback: Callable[[], object]) -> None:
+        """Call *callback* every tick, on the timer of *widget*'s app."""
+        app = widget.app
+        if self._app is not app:
+            # A new app (e.g. the next test run): whatever the old one left
+            # subscribed can't be ticked any more
+            self._stop()
+            self._app = app
+        self._callbacks[callback] = None
+        if self._timer is None:
+            self._timer = app.set_interval(self.interval, self._tick)
+
+    def unsubscribe(self, callback: Callable[[], object]) -> None:
+        self._callbacks.pop(callback, None)
+        if not self._callbacks:
+            self._stop()
+
+    def _stop(self) -> None:
+        if self._timer is not None:
+            self._timer.stop()
+        self._callbacks.clear()
+        self._app = self._timer = None
+
+    def _tick(self) -> None:
+        for callback in list(self._callbacks):
+            callback()
+
+
+TICK_BUS = TickBus()
+
+
 # ── Status Panel (sidebar) ────────────────────────────────────
 
 
 class StatusPanel(Static):
     """Sidebar panel showing run config, live timer, and status."""
 
+    # Textual widgets keep a __dict__, but the attributes added here are
+    # slot-stored: cheaper to read in the watch_* / record_call hot paths
+    __slots__ = (
+        "cfg",
+        "_max",
+        "_start_time",
+        "_last_hms",
+        "_dirty",
+        "_flush_scheduled",
+        "_info",
+        "_badge",
+        "_timer_label",
+        "_bar",
+        "_iter_label",
+        "_token_label",
+    )
+
     status: reactive[str] = reactive("IDLE")
     iteration: reactive[int] = reactive(0)
     elapsed: reactive[float] = reactive(0.0)
@@ -75,342 +170,498 @@ class StatusPanel(Static):
         self.cfg = cfg
         self._max = cfg.max_iterations
         self._start_time = time.monotonic()
-
-    def compose(self) -> ComposeResult:
-        from rich.markup import escape
-
-        yield Label("⚡ STATUS", id="status-title")
-        yield Label(
-            f"[dim]Goal:[/dim]  [#e2e8f0]{escape(self.cfg.goal)}[/#e2e8f0]",
-            classes="info-row",
-        )
-        model_display = self.cfg.model_name[:28]
-        yield Label(
-            f"[dim]Model:[/dim] [#e2e8f0]{escape(model_display)}[/#e2e8f0]",
-            classes="info-row",
-        )
-        cwd_display = self.cfg.cwd
+        # The (h, m, s) on the timer label, so a flush that wouldn't change
+        # the displayed time skips the label update
+        self._last_hms = (0, 0, 0)
+        # Fields changed since the last flush; a burst of reactive updates is
+        # rendered in one pass after _FLUSH_DELAY instead of once per change.
+        self._dirty: set[str] = set()
+        self._flush_scheduled = False
+        cwd_display = cfg.cwd
         if len(cwd_display) > 28:
             cwd_display = "…" + cwd_display[-27:]
-        yield Label(
-            f"[dim]CWD:[/dim]   [#e2e8f0]{escape(cwd_display)}[/#e2e8f0]",
+        # The fixed Goal/Model/CWD rows as one multi-line label rather than
+        # a widget per row
+        self._info = Label(
+            Text.assemble(
+                ("Goal:", "dim"),
+                "  ",
+                (cfg.goal, "#e2e8f0"),
+                "\n",
+                ("Model:", "dim"),
+                " ",
+                (cfg.model_name[:28], "#e2e8f0"),
+                "\n",
+                ("CWD:", "dim"),
+                "   ",
+                (cwd_display, "#e2e8f0"),
+            ),
+            id="status-info",
             classes="info-row",
         )
-        yield Label("", id="status-badge")
-        yield Label("⏱  00:00:00", id="timer-label")
-        yield ProgressBar(total=self._max, show_eta=False, id="iteration-progress")
-        yield Label(
+        self._badge = Label("", id="status-badge")
+        self._timer_label = Label("⏱  00:00:00", id="timer-label")
+        self._bar = ProgressBar(total=self._max, show_eta=False, id="iteration-progress")
+        self._iter_label = Label(
             f"[dim]Iter:[/dim]  [#e2e8f0]0/{self._max}[/#e2e8f0]  [dim]0%[/dim]",
             id="iter-info",
         )
-        yield Label(
+        self._token_label = Label(
             "[dim]Tokens:[/dim] [#e2e8f0]0[/#e2e8f0]",
             id="token-count",
             classes="info-row",
         )
 
+    def compose(self) -> ComposeResult:
+        yield Label("⚡ STATUS", id="status-title")
+        yield self._info
+        yield self._badge
+        yield self._timer_label
+        yield self._bar
+        yield self._iter_label
+        yield self._token_label
+
     def on_mount(self) -> None:
-        self._refresh_badge()
-        self.set_interval(1.0, self._tick_timer)
+        self._dirty.add("status")
+        self._flush()
+        TICK_BUS.subscribe(self, self._tick_timer)
+
+    def on_unmount(self) -> None:
+        TICK_BUS.unsubscribe(self._tick_timer)
 
     def _tick_timer(self) -> None:
         if self.status == "RUNNING":
-            self.elapsed = time.monotonic() - self._start_time
+            # Whole seconds: the reactive ignores an unchanged value, so a tick
+            # that lands in the same second doesn't fan out to a refresh
+            self.elapsed = float(int(time.monotonic() - self._start_time))
 
     def watch_status(self, value: str) -> None:
-        self._refresh_badge()
         if value == "RUNNING":
             self._start_time = time.monotonic()
-        self._refresh_badge()
+        self._schedule_refresh("status")
 
     def watch_iteration(self, value: int) -> None:
-        pct = min(100, round((value / max(self._max, 1)) * 100))
-        try:
-            self.query_one("#iter-info", Label).update(
-                f"[dim]Iter:[/dim]  [#e2e8f0]{value}/{self._max}[/#e2e8f0]  [dim]{pct}%[/dim]"
-            )
-            self.query_one("#iteration-progress", ProgressBar).update(
-                progress=value,
-            )
-        except NoMatches:
-            pass
+        self._schedule_refresh("iteration")
 
     def watch_elapsed(self, value: float) -> None:
-        h = int(value // 3600)
-        m = int((value % 3600) // 60)
-        s = int(value % 60)
-        try:
-            self.query_one("#timer-label", Label).update(f"⏱  {h:02d}:{m:02d}:{s:02d}")
-        except NoMatches:
-            pass
+        self._schedule_refresh("elapsed")
 
     def watch_total_tokens(self, value: int) -> None:
-        if value >= 1_000_000:
-            display = f"{value / 1_000_000:.1f}M"
-        elif value >= 1_000:
-            display = f"{value / 1_000:.1f}k"
-        else:
-            display = str(value)
-        try:
-            self.query_one("#token-count", Label).update(
-                f"[dim]Tokens:[/dim] [#38bdf8]{display}[/#38bdf8]"
+        self._schedule_refresh("total_tokens")
+
+    def _schedule_refresh(self, field: str) -> None:
+        self._dirty.add(field)
+        if not self._flush_scheduled and self.is_mounted:
+            self._flush_scheduled = True
+            self.set_timer(_FLUSH_DELAY, self._flush)
+
+    def _flush(self) -> None:
+        """Render every field changed since the last flush."""
+        self._flush_scheduled = False
+        dirty, self._dirty = self._dirty, set()
+        if "status" in dirty:
+            self._refresh_badge()
+        if "iteration" in dirty:
+            value = self.iteration
+            pct = min(100, round((value / max(self._max, 1)) * 100))
+            self._iter_label.update(
+                f"[dim]Iter:[/dim]  [#e2e8f0]{value}/{self._max}[/#e2e8f0]  [dim]{pct}%[/dim]"
             )
-        except NoMatches:
-            pass
+            self._bar.update(progress=value)
+        if "elapsed" in dirty:
+            m, sec = divmod(int(self.elapsed), 60)
+            h, m = divmod(m, 60)
+            if (hms := (h, m, sec)) != self._last_hms:
+                self._last_hms = hms
+                self._timer_label.update(f"⏱  {h:02d}:{m:02d}:{sec:02d}")
+        if "total_tokens" in dirty:
+            tokens = self.total_tokens
+            if tokens >= 1_000_000:
+                display = f"{tokens / 1_000_000:.1f}M"
+            elif tokens >= 1_000:
+                display = f"{tokens / 1_000:.1f}k"
+            else:
+                display = str(tokens)
+            self._token_label.update(f"[dim]Tokens:[/dim] [#38bdf8]{display}[/#38bdf8]")
 
     def _refresh_badge(self) -> None:
-        style, icon = STATUS_STYLES.get(self.status, ("white", "?"))
-        try:
-            self.query_one("#status-badge", Label).update(
-                f"[{style}]  {icon}  {self.status}  [/{style}]"
-            )
-        except NoMatches:
-            pass
+        status = self.status
+        badge = _STATUS_BADGES.get(status) or f"[white]  ?  {status}  [/white]"
+        self._badge.update(badge)
 
 
 # ── Tool Stats Panel (sidebar) ────────────────────────────────
 
 
+def _promote(
+    order: list[str], first_seen: dict[str, int], count: Callable[[str], int], tool: str
+) -> bool:
+    """Move ``tool`` up ``order`` past every tool it now outranks.
+
+    ``order`` is kept by call count, ties in first-seen order. A tool's count
+    only grows by one per call, so this bubble-up replaces a full re-sort.
+    Returns whether ``tool`` moved.
+    """
+    n, seen = count(tool), first_seen[tool]
+    start = i = order.index(tool)
+    while i > 0:
+        ahead = order[i - 1]
+        ahead_n = count(ahead)
+        if ahead_n > n or (ahead_n == n and first_seen[ahead] < seen):
+            break
+        order[i] = ahead
+        i -= 1
+    order[i] = tool
+    return i != start
+
+
 class ToolStatsPanel(Static):
     """Compact sidebar panel showing tool call counts."""
 
+    __slots__ = (
+        "_counts",
+        "_errors",
+        "_order",
+        "_first_seen",
+        "_lines",
+        "_flush_scheduled",
+        "_body",
+    )
+
     def __init__(self) -> None:
         super().__init__()
-        self._counts: dict[str, int] = {}
-        self._errors: dict[str, int] = {}
+        self._counts: Counter[str] = Counter()
+        self._errors: Counter[str] = Counter()
+        # Tools by call count (see _promote), each with its rendered line, so a
+        # call re-renders one line and moves one tool up the list
+        self._order: list[str] = []
+        self._first_seen: dict[str, int] = {}
+        self._lines: dict[str, str] = {}
+        self._flush_scheduled = False
+        self._body = Label("[dim]No tool calls yet[/dim]", id="tool-stats-body")
 
     def compose(self) -> ComposeResult:
         yield Label("[bold #a78bfa]🔧 TOOLS[/bold #a78bfa]", id="tool-stats-title")
-        yield Label("[dim]No tool calls yet[/dim]", id="tool-stats-body")
+        yield self._body
+
+    def on_mount(self) -> None:
+        self._refresh()
 
     def record_call(self, tool: str, error: bool = False) -> None:
-        self._counts[tool] = self._counts.get(tool, 0) + 1
+        if tool not in self._first_seen:
+            self._first_seen[tool] = len(self._order)
+            self._order.append(tool)
+        self._counts[tool] += 1
         if error:
-            self._errors[tool] = self._errors.get(tool, 0) + 1
-        self._refresh()
+            self._errors[tool] += 1
+        count, errs = self._counts[tool], self._errors[tool]
+        if errs:
+            self._lines[tool] = (
+                f"[#38bdf8]{tool}[/#38bdf8] "
+                f"[#e2e8f0]{count}×[/#e2e8f0] "
+                f"[#f87171]({errs}✗)[/#f87171]"
+            )
+        else:
+            self._lines[tool] = f"[#38bdf8]{tool}[/#38bdf8] [#4ade80]{count}×[/#4ade80]"
+        _promote(self._order, self._first_seen, self._counts.__getitem__, tool)
+        if not self._flush_scheduled and self.is_mounted:
+            self._flush_scheduled = True
+            self.set_timer(_FLUSH_DELAY, self._refresh)
 
     def _refresh(self) -> None:
-        if not self._counts:
+        self._flush_scheduled = False
+        if not self._order:
             return
-        lines: list[str] = []
-        for tool, count in sorted(self._counts.items(), key=lambda x: x[1], reverse=True):
-            errs = self._errors.get(tool, 0)
-            if errs:
-                lines.append(
-                    f"[#38bdf8]{tool}[/#38bdf8] "
-                    f"[#e2e8f0]{count}×[/#e2e8f0] "
-                    f"[#f87171]({errs}✗)[/#f87171]"
-                )
-            else:
-                lines.append(f"[#38bdf8]{tool}[/#38bdf8] [#4ade80]{count}×[/#4ade80]")
-        try:
-            self.query_one("#tool-stats-body", Label).update("\n".join(lines))
-        except NoMatches:
-            pass
+        lines = self._lines
+        self._body.update("\n".join(lines[tool] for tool in self._order))
 
 
-# ── Token Sparkline (sidebar) ─────────────────────────────────
+# ── Token Sparklines ──────────────────────────────────────────
 
 
-class TokenSparklineWidget(Static):
-    """Miniature sparkline showing token usage per iteration."""
+class _HistorySparkline(Static):
+    """Base for panels plotting the most recent per-iteration token counts.
 
-    def __init__(self) -> None:
+    Appends only touch a bounded deque; the sparkline gets one snapshot per
+    ``_FLUSH_DELAY`` however many values arrived in between.
+    """
+
+    __slots__ = ("_data", "_sparkline", "_flush_scheduled")
+
+    def __init__(self, sparkline_id: str) -> None:
         super().__init__()
-        self._data: list[float] = []
+        self._data: deque[float] = deque(maxlen=_SPARK_HISTORY)
+        self._sparkline = Sparkline([], id=sparkline_id)
+        self._flush_scheduled = False
 
-    def compose(self) -> ComposeResult:
-        yield Label("[bold #a78bfa]📊 TOKENS/ITER[/bold #a78bfa]", id="spark-title")
-        yield Sparkline([], id="token-sparkline")
+    def on_mount(self) -> None:
+        self._flush()
 
     def append(self, tokens: int) -> None:
         self._data.append(float(tokens))
-        try:
-            self.query_one("#token-sparkline", Sparkline).data = list(self._data)
-        except NoMatches:
-            pass
+        if not self._flush_scheduled and self.is_mounted:
+            self._flush_scheduled = True
+            self.set_timer(_FLUSH_DELAY, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        # A fresh snapshot each time: reassigning the same deque would compare
+        # equal to the old value and the reactive wouldn't redraw
+        self._sparkline.data = list(self._data)
+
+
+class TokenSparklineWidget(_HistorySparkline):
+    """Miniature sparkline showing token usage per iteration."""
+
+    __slots__ = ()
+
+    def __init__(self) -> None:
+        super().__init__("token-sparkline")
+
+    def compose(self) -> ComposeResult:
+        yield Label("[bold #a78bfa]📊 TOKENS/ITER[/bold #a78bfa]", id="spark-title")
+        yield self._sparkline
 
 
 # ── Iteration Timeline ────────────────────────────────────────
 
 
+# Timeline marker glyph and color per outcome
+_MARKER_ACHIEVED = ("●", "#4ade80")
+_MARKER_FAILED = ("○", "#f87171")
+_MARKER_RUNNING = ("◎", "#a78bfa")
+
+
 class IterationTimeline(Static):
     """Horizontal timeline showing iteration outcomes at a glance."""
 
+    __slots__ = ("_markers", "_overflow", "_text", "_flush_scheduled", "_markers_label")
+
     def __init__(self) -> None:
         super().__init__()
-        self._markers: list[str] = []
+        self._markers: deque[str] = deque(maxlen=_TIMELINE_MARKERS)
+        # Markers dropped off the front of the window, shown as a count
+        self._overflow = 0
+        # The markers as styled text, grown and trimmed in place so a new
+        # marker never re-joins or re-parses the ones before it
+        self._text = Text()
+        self._flush_scheduled = False
+        self._markers_label = Label("[dim]Waiting…[/dim]", id="timeline-markers")
 
     def compose(self) -> ComposeResult:
         yield Label(
             "[bold #c084fc]⏳ ITERATION TIMELINE[/bold #c084fc]",
             id="timeline-title",
         )
-        yield Label("[dim]Waiting…[/dim]", id="timeline-markers")
+        yield self._markers_label
+
+    def on_mount(self) -> None:
+        if self._markers:
+            self._flush()
 
     def add_marker(self, achieved: bool) -> None:
-        if achieved:
-            self._markers.append("[#4ade80]●[/#4ade80]")
-        else:
-            self._markers.append("[#f87171]○[/#f87171]")
-        try:
-            self.query_one("#timeline-markers", Label).update(" ".join(self._markers))
-        except NoMatches:
-            pass
+        self._push(_MARKER_ACHIEVED if achieved else _MARKER_FAILED)
 
     def add_running_marker(self) -> None:
         """Add an in-progress marker (replaced on completion)."""
-        self._markers.append("[#a78bfa]◎[/#a78bfa]")
-        try:
-            self.query_one("#timeline-markers", Label).update(" ".join(self._markers))
-        except NoMatches:
-            pass
+        self._push(_MARKER_RUNNING)
 
     def replace_last_marker(self, achieved: bool) -> None:
         """Replace the last marker with final status."""
         if self._markers:
             self._markers.pop()
+            # Drop the glyph and, unless it was the only one, its separator
+            self._text.right_crop(2 if self._markers else 1)
         self.add_marker(achieved)
 
+    def _push(self, marker: tuple[str, str]) -> None:
+        glyph, color = marker
+        if len(self._markers) == _TIMELINE_MARKERS:
+            # The deque drops the oldest marker; drop its glyph and separator
+            self._overflow += 1
+            self._text = self._text[2:]
+        if self._markers:
+            self._text.append(" ")
+        self._markers.append(f"[{color}]{glyph}[/{color}]")
+        self._text.append(glyph, style=color)
+        if not self._flush_scheduled and self.is_mounted:
+            self._flush_scheduled = True
+            self.set_timer(_FLUSH_DELAY, self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        if self._overflow:
+            self._markers_label.update(Text.assemble((f"…+{self._overflow} ", "dim"), self._text))
+        else:
+            self._markers_label.update(self._text)
+
 
 # ── Tool Usage DataTable (dashboard tab) ──────────────────────
 
 
+@functools.lru_cache(maxsize=101)
+def _success_markup(pct: int) -> str:
+    """Colored success-rate cell; only 0–100 occur, so every value stays cached."""
+    color = "#4ade80" if pct >= 80 else ("#fbbf24" if pct >= 50 else "#f87171")
+    return f"[{color}]{pct}%[/{color}]"
+
+
+# (label, key) per column; keys let rows be updated a cell at a time
+_TOOL_TABLE_COLUMNS = (
+    ("Tool", "tool"),
+    ("Calls", "calls"),
+    ("Errors", "errors"),
+    ("Success %", "success"),
+)
+
+
 class ToolUsageTable(Static):
     """Full DataTable showing tool call stats."""
 
+    __slots__ = (
+        "_calls",
+        "_errors",
+        "_order",
+        "_first_seen",
+        "_dirty",
+        "_resort",
+        "_flush_scheduled",
+        "_table",
+    )
+
     def __init__(self) -> None:
         super().__init__()
-        self._stats: dict[str, dict[str, int]] = {}
+        self._calls: Counter[str] = Counter()
+        self._errors: Counter[str] = Counter()
+        self._order: list[str] = []
+        self._first_seen: dict[str, int] = {}
+        # Tools changed since the last flush, and whether any moved rank
+        self._dirty: set[str] = set()
+        self._resort = False
+        self._flush_scheduled = False
+        self._table: DataTable = DataTable(id="tool-table")
+        self._table.cursor_type = "row"
 
     def compose(self) -> ComposeResult:
         yield Label(
             "[bold #c084fc]🔧 Tool Usage[/bold #c084fc]",
             classes="dash-card-title",
         )
-        table = DataTable(id="tool-table")
-        table.cursor_type = "row"
-        yield table
+        yield self._table
 
     def on_mount(self) -> None:
-        table = self.query_one("#tool-table", DataTable)
-        table.add_columns("Tool", "Calls", "Errors", "Success %")
+        self._table.add_columns(*_TOOL_TABLE_COLUMNS)
+        self._rebuild_table()
 
     def record(self, tool: str, error: bool = False) -> None:
-        if tool not in self._stats:
-            self._stats[tool] = {"calls": 0, "errors": 0}
-        self._stats[tool]["calls"] += 1
+        if tool not in self._first_seen:
+            self._first_seen[tool] = len(self._order)
+            self._order.append(tool)
+        self._calls[tool] += 1
         if error:
-            self._stats[tool]["errors"] += 1
-        self._rebuild_table()
+            self._errors[tool] += 1
+        if _promote(self._order, self._first_seen, self._calls.__getitem__, tool):
+            self._resort = True
+        self._dirty.add(tool)
+        if not self._flush_scheduled and self.is_mounted:
+            self._flush_scheduled = True
+            self.set_timer(_FLUSH_DELAY, self._rebuild_table)
 
     def _rebuild_table(self) -> None:
-        try:
-            table = self.query_one("#tool-table", DataTable)
-            table.clear()
-            for tool, stats in sorted(
-                self._stats.items(),
-                key=lambda x: x[1]["calls"],
-                reverse=True,
-            ):
-                calls = stats["calls"]
-                errors = stats["errors"]
-                success = round(((calls - errors) / max(calls, 1)) * 100)
-                success_color = (
-                    "#4ade80" if success >= 80 else ("#fbbf24" if success >= 50 else "#f87171")
-                )
-                table.add_row(
-                    f"[#38bdf8]{tool}[/#38bdf8]",
-                    str(calls),
-                    str(errors) if errors else "[dim]0[/dim]",
-                    f"[{success_color}]{success}%[/{success_color}]",
-                )
-        except NoMatches:
-            pass
+        """Write the changed rows in place, adding new tools and re-sorting only if needed."""
+        self._flush_scheduled = False
+        dirty, self._dirty = self._dirty, set()
+        table = self._table
+        # First-seen order, so new rows are stored (and tie) in that order
+        for tool in sorted(dirty, key=self._first_seen.__getitem__):
+            calls = self._calls[tool]
+            errors = self._errors[tool]
+            success = round(((calls - errors) / max(calls, 1)) * 100)
+            cells = (
+                str(calls),
+                str(errors) if errors else "[dim]0[/dim]",
+                _success_markup(success),
+            )
+            if tool in table.rows:
+                for (_, column), value in zip(_TOOL_TABLE_COLUMNS[1:], cells, strict=True):
+                    table.update_cell(tool, column, value)
+            else:
+                table.add_row(f"[#38bdf8]{tool}[/#38bdf8]", *cells, key=tool)
+        if self._resort:
+            self._resort = False
+            # The sort is stable over stored order, so ties stay first-seen
+            table.sort("calls", key=int, reverse=True)
 
 
 # ── Dashboard Sparkline (large) ───────────────────────────────
 
 
-class DashboardSparkline(Static):
+class DashboardSparkline(_HistorySparkline):
     """Large sparkline for the dashboard tab."""
 
+    __slots__ = ()
+
     def __init__(self) -> None:
-        super().__init__()
-        self._data: list[float] = []
+        super().__init__("dash-sparkline")
 
     def compose(self) -> ComposeResult:
         yield Label(
             "[bold #c084fc]📈 Token Usage Over Time[/bold #c084fc]",
             classes="dash-card-title",
         )
-        yield Sparkline([], id="dash-sparkline")
-
-    def append(self, tokens: int) -> None:
-        self._data.append(float(tokens))
-        try:
-            self.query_one("#dash-sparkline", Sparkline).data = list(self._data)
-        except NoMatches:
-            pass
+        yield self._sparkline
 
 
 # ── File Tree Widget ──────────────────────────────────────────
 
 
+_FILE_ACTION_ICONS: dict[str, str] = {
+    "read": "📖",
+    "write": "✏️ ",
+    "patch": "🩹",
+    "exec": "⚡",
+    "list": "📂",
+}
+
+
 class FileTreeWidget(Static):
     """Tree view showing files the agent has touched."""
 
+    __slots__ = ("_known_paths", "_tree", "_dir_nodes")
+
     def __init__(self) -> None:
         super().__init__()
         self._known_paths: set[str] = set()
+        self._tree: Tree[str] = Tree("📁 Agent File Activity", id="file-tree")
+        self._tree.root.expand()
+        # Directory nodes by path ("src", "src/retrai", ...); "" is the root
+        self._dir_nodes: dict[str, TreeNode[str]] = {"": self._tree.root}
 
     def compose(self) -> ComposeResult:
-        tree: Tree[str] = Tree("📁 Agent File Activity", id="file-tree")
-        tree.root.expand()
-        yield tree
+        yield self._tree
 
     def add_file(self, path: str, action: str = "read") -> None:
         """Add a file to the tree. action: read, write, patch, exec."""
+        # Interned, so the same path touched again matches the stored key by
+        # identity, and directory prefixes are shared across the tree's maps
+        path = sys.intern(path)
         if path in self._known_paths:
             return
         self._known_paths.add(path)
 
-        icons = {
-            "read": "📖",
-            "write": "✏️ ",
-            "patch": "🩹",
-            "exec": "⚡",
-            "list": "📂",
-        }
-        icon = icons.get(action, "📄")
-
-        try:
-            tree = self.query_one("#file-tree", Tree)
-            parts = path.split("/")
-
-            # Build path nodes
-            current_node = tree.root
-            for i, part in enumerate(parts):
-                if i == len(parts) - 1:
-                    # Leaf — add with icon
-                    current_node.add_leaf(f"{icon} {part}")
-                else:
-                    # Directory — find or create
-                    found = None
-                    for child in current_node.children:
-                        label_str = str(child.label)
-                        # Strip icon prefix for comparison
-                        clean = label_str.lstrip("📁📂 ")
-                        if clean == part:
-                            found = child
-                            break
-                    if found:
-                        current_node = found
-                    else:
-                        current_node = current_node.add(f"📁 {part}")
-                        current_node.expand()
-        except NoMatches:
-            pass
+        icon = _FILE_ACTION_ICONS.get(action, "📄")
+        dir_path, _, name = path.rpartition("/")
+        self._dir_node(dir_path).add_leaf(f"{icon} {name}")
+
+    def _dir_node(self, dir_path: str) -> TreeNode[str]:
+        """Return the node for ``dir_path``, creating it and any missing parents."""
+        node = self._dir_nodes.get(dir_path)
+        if node is None:
+            parent_path, _, name = dir_path.rpartition("/")
+            node = self._dir_node(parent_path).add(f"📁 {name}")
+            node.expand()
+            self._dir_nodes[sys.intern(dir_path)] = node
+        return node
 
 
 # ── Help Content ──────────────────────────────────────────────
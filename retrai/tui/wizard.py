@@ -6,7 +6,6 @@ from pathlib import Path
 
 from textual.app import ComposeResult
 from textual.containers import Center, Horizontal, Vertical, VerticalScroll
-from textual.css.query import NoMatches
 from textual.screen import ModalScreen
 from textual.widgets import (
     Button,
@@ -152,6 +151,20 @@ class WizardScreen(ModalScreen[RunConfig | None]):
         self._max_iterations: int = 50
         self._hitl_enabled: bool = False
 
+        # Chrome shared by every step, kept so a step change updates it directly
+        self._indicator = Static(_build_step_indicator(self._current_step), id="step-indicator")
+        self._body = VerticalScroll(classes="wizard-body", id="wizard-body")
+        self._back_btn = Button("← Back", variant="default", id="btn-back", disabled=True)
+        self._next_btn = Button("Next →", variant="primary", id="btn-next")
+        # Inputs of the current step, set by _compose_step; None until their
+        # step has been shown
+        self._goal_select: Select[str] | None = None
+        self._provider_select: Select[str] | None = None
+        self._model_select: Select[str] | None = None
+        self._max_iter_input: Input | None = None
+        self._cwd_input: Input | None = None
+        self._hitl_switch: Switch | None = None
+
     @property
     def _current_step(self) -> str:
         return SETUP_STEPS[self._current_step_idx]
@@ -164,19 +177,16 @@ class WizardScreen(ModalScreen[RunConfig | None]):
                     "🧪 [bold #c084fc]Experiment Setup Wizard[/bold #c084fc]",
                     id="wizard-title",
                 )
-                yield Static(
-                    _build_step_indicator(self._current_step),
-                    id="step-indicator",
-                )
+                yield self._indicator
                 # Body area — content changes per step
-                with VerticalScroll(classes="wizard-body", id="wizard-body"):
+                with self._body:
                     yield from self._compose_step()
 
                 # Navigation buttons
                 with Center(classes="wizard-nav"):
                     yield Button("Cancel", variant="error", id="btn-cancel")
-                    yield Button("← Back", variant="default", id="btn-back", disabled=True)
-                    yield Button("Next →", variant="primary", id="btn-next")
+                    yield self._back_btn
+                    yield self._next_btn
 
     def _compose_step(self) -> ComposeResult:
         """Yield widgets for the current step."""
@@ -199,7 +209,8 @@ class WizardScreen(ModalScreen[RunConfig | None]):
             }
             if self._goal in goals:
                 goal_kwargs["value"] = self._goal
-            yield Select[str](options, **goal_kwargs)  # type: ignore[arg-type]
+            self._goal_select = Select[str](options, **goal_kwargs)  # type: ignore[arg-type]
+            yield self._goal_select
             yield Static(
                 "[dim]Goals define what the agent tries to achieve. "
                 "Auto-detection scans your project files.[/dim]",
@@ -219,19 +230,21 @@ class WizardScreen(ModalScreen[RunConfig | None]):
             }
             if self._provider in provider_names:
                 prov_kwargs["value"] = self._provider
-            yield Select[str](prov_options, **prov_kwargs)  # type: ignore[arg-type]
+            self._provider_select = Select[str](prov_options, **prov_kwargs)  # type: ignore[arg-type]
+            yield self._provider_select
 
             # Model select — populated on provider change
             yield Label("Model:", classes="field-label")
             model_options: list[tuple[str, str]] = [
                 (self._model_name, self._model_name),
             ]
-            yield Select[str](
+            self._model_select = Select[str](
                 model_options,
                 value=self._model_name,
                 prompt="Select a model…",
                 id="model-select",
             )
+            yield self._model_select
             yield Static(
                 "[dim]Models are fetched from LiteLLM's registry. "
                 "Pick a provider first to see available models.[/dim]",
@@ -240,23 +253,30 @@ class WizardScreen(ModalScreen[RunConfig | None]):
 
         elif step == "set_parameters":
             yield Label("Max iterations:", classes="field-label")
-            yield Input(
+            self._max_iter_input = Input(
                 value=str(self._max_iterations),
                 placeholder="50",
                 type="integer",
                 id="max-iter-input",
             )
+            yield self._max_iter_input
 
             yield Label("Working directory:", classes="field-label")
-            yield Input(
+            self._cwd_input = Input(
                 value=self._cwd,
                 placeholder="/path/to/project",
                 id="cwd-input",
             )
-
-            with Horizontal(id="hitl-row"):
-                yield Label("Human-in-the-loop:", classes="field-label")
-                yield Switch(value=self._hitl_enabled, id="hitl-switch")
+            yield self._cwd_input
+
+            # Children passed directly, not via ``with``: _rebuild_step mounts
+            # these widgets outside of compose
+            self._hitl_switch = Switch(value=self._hitl_enabled, id="hitl-switch")
+            yield Horizontal(
+                Label("Human-in-the-loop:", classes="field-label"),
+                self._hitl_switch,
+                id="hitl-row",
+            )
 
             yield Static(
                 "[dim]HITL adds manual approval checkpoints in the agent loop.[/dim]",
@@ -308,9 +328,7 @@ class WizardScreen(ModalScreen[RunConfig | None]):
 
     def _populate_models(self, provider: str) -> None:
         """Update the model select widget based on chosen provider."""
-        try:
-            model_select = self.query_one("#model-select", Select)
-        except NoMatches:
+        if (model_select := self._model_select) is None:
             return
 
         providers = get_provider_models()
@@ -333,46 +351,24 @@ class WizardScreen(ModalScreen[RunConfig | None]):
         step = self._current_step
 
         if step == "select_goal":
-            try:
-                sel = self.query_one("#goal-select", Select)
-                if isinstance(sel.value, str):
-                    self._goal = sel.value
-            except NoMatches:
-                pass
+            if (sel := self._goal_select) is not None and isinstance(sel.value, str):
+                self._goal = sel.value
 
         elif step == "configure_model":
-            try:
-                psel = self.query_one("#provider-select", Select)
-                if isinstance(psel.value, str):
-                    self._provider = psel.value
-            except NoMatches:
-                pass
-            try:
-                msel = self.query_one("#model-select", Select)
-                if isinstance(msel.value, str):
-                    self._model_name = msel.value
-            except NoMatches:
-                pass
+            if (psel := self._provider_select) is not None and isinstance(psel.value, str):
+                self._provider = psel.value
+            if (msel := self._model_select) is not None and isinstance(msel.value, str):
+                self._model_name = msel.value
 
         elif step == "set_parameters":
-            try:
-                max_iter_input = self.query_one("#max-iter-input", Input)
-                val = max_iter_input.value.strip()
+            if self._max_iter_input is not None:
+                val = self._max_iter_input.value.strip()
                 if val.isdigit():
                     self._max_iterations = int(val)
-            except NoMatches:
-                pass
-            try:
-                cwd_input = self.query_one("#cwd-input", Input)
-                if cwd_input.value.strip():
-                    self._cwd = cwd_input.value.strip()
-            except NoMatches:
-                pass
-            try:
-                hitl_switch = self.query_one("#hitl-switch", Switch)
-                self._hitl_enabled = hitl_switch.value
-            except NoMatches:
-                pass
+            if self._cwd_input is not None and (cwd := self._cwd_input.value.strip()):
+                self._cwd = cwd
+            if self._hitl_switch is not None:
+                self._hitl_enabled = self._hitl_switch.value
 
     def _go_next(self) -> None:
         if self._current_step_idx < len(SETUP_STEPS) - 1:
@@ -387,37 +383,22 @@ class WizardScreen(ModalScreen[RunConfig | None]):
     def _rebuild_step(self) -> None:
         """Rebuild the wizard body with the current step's widgets."""
         # Update step indicator
-        try:
-            indicator = self.query_one("#step-indicator", Static)
-            indicator.update(_build_step_indicator(self._current_step))
-        except NoMatches:
-            pass
+        self._indicator.update(_build_step_indicator(self._current_step))
 
         # Clear and repopulate body
-        try:
-            body = self.query_one("#wizard-body", VerticalScroll)
-            body.remove_children()
-            body.mount_all(list(self._compose_step()))
-        except NoMatches:
-            pass
+        self._body.remove_children()
+        self._body.mount_all(list(self._compose_step()))
 
         # Update button states
-        try:
-            back_btn = self.query_one("#btn-back", Button)
-            back_btn.disabled = self._current_step_idx == 0
-        except NoMatches:
-            pass
-
-        try:
-            next_btn = self.query_one("#btn-next", Button)
-            if self._current_step == "review":
-                next_btn.label = "🚀 Launch"
-                next_btn.variant = "success"
-            else:
-                next_btn.label = "Next →"
-                next_btn.variant = "primary"
-        except NoMatches:
-            pass
+        self._back_btn.disabled = self._current_step_idx == 0
+
+        next_btn = self._next_btn
+        if self._current_step == "review":
+            next_btn.label = "🚀 Launch"
+            next_btn.variant = "success"
+        else:
+            next_btn.label = "Next →"
+            next_btn.variant = "primary"
 
     # ── Launch ────────────────────────────────────────────────
 
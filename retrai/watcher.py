@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import os
 import time
 from pathlib import Path
 from typing import Any, cast
@@ -97,21 +98,34 @@ class FileWatcher:
         self._snapshot: dict[str, float] = {}
 
     def _take_snapshot(self) -> dict[str, float]:
-        """Take a snapshot of all file modification times."""
+        """Take a snapshot of all file modification times.
+
+        Walks the tree with ``os.scandir`` so ignored directories are pruned
+        before they are entered, and entry types come from the directory
+        listing instead of a stat per path.
+        """
         snapshot: dict[str, float] = {}
-        try:
-            for path in self.cwd.rglob("*"):
-                if not path.is_file():
-                    continue
-                if _should_ignore(path):
-                    continue
-                try:
-                    rel = str(path.relative_to(self.cwd))
-                    snapshot[rel] = path.stat().st_mtime
-                except (OSError, ValueError):
-                    pass
-        except OSError:
-            pass
+        # (directory, its path relative to cwd with a trailing separator)
+        stack: list[tuple[str, str]] = [(str(self.cwd), "")]
+        while stack:
+            dir_path, prefix = stack.pop()
+            try:
+                entries = os.scandir(dir_path)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    name = entry.name
+                    if name in IGNORE_DIRS:
+                        continue
+                    try:
+                        # Symlinked directories aren't entered, as with rglob
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append((entry.path, prefix + name + os.sep))
+                        elif entry.is_file() and os.path.splitext(name)[1] not in IGNORE_EXTENSIONS:
+                            snapshot[prefix + name] = entry.stat().st_mtime
+                    except OSError:
+                        pass
         return snapshot
 
     def _detect_changes(self, old: dict[str, float], new: dict[str, float]) -> list[str]:
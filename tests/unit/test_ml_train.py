@@ -3,17 +3,25 @@
 from __future__ import annotations
 
 import json
+import warnings
 from pathlib import Path
+from typing import Any
 
 import pytest
 
 from retrai.goals.ml_goal import MlOptimizeGoal
 from retrai.tools.ml_train import (
+    _IN_PROCESS_MODULE,
     MODEL_REGISTRY,
     VALID_METRICS,
+    _body_key,
     _build_training_code,
+    _build_training_params,
+    _compiled_training_body,
+    _training_body,
     ml_train,
 )
+from retrai.tools.python_exec import PythonResult
 
 # ── ml_train validation ──────────────────────────────────────────────────────
 
@@ -44,6 +52,59 @@ async def test_ml_train_invalid_metric() -> None:
     assert "Unknown scoring_metric" in data["error"]
 
 
+@pytest.mark.asyncio
+async def test_ml_train_in_process(tmp_path: Path) -> None:
+    pytest.importorskip("sklearn")
+    pytest.importorskip("pandas")
+    rows = ["x1,x2,color,target"]
+    for i in range(60):
+        rows.append(f"{i},{(i * 7) % 11},{'red' if i % 3 else 'blue'},{int(i >= 30)}")
+    (tmp_path / "data.csv").write_text("\n".join(rows) + "\n")
+    filters_before = list(warnings.filters)
+
+    result = await ml_train(
+        data_file="data.csv",
+        target_column="target",
+        cwd=str(tmp_path),
+        model_type="decision_tree",
+        scoring_metric="accuracy",
+        cross_validate=False,
+        in_process=True,
+    )
+    data = json.loads(result)
+    assert "error" not in data
+    assert data["model_type"] == "DecisionTreeClassifier"
+    assert data["metrics"]["accuracy"] >= 0.9
+    assert data["n_samples"] == 60
+    # The training thread leaves the process-wide warning filters alone
+    assert warnings.filters == filters_before
+
+
+@pytest.mark.asyncio
+async def test_ml_train_returns_sandbox_json_verbatim(monkeypatch: pytest.MonkeyPatch) -> None:
+    payload = json.dumps({"metrics": {"auc": 0.9}}, indent=2)
+
+    async def fake_exec(**kwargs: object) -> PythonResult:
+        return PythonResult(stdout=payload + "\n", stderr="", returncode=0)
+
+    monkeypatch.setattr("retrai.tools.ml_train.python_exec", fake_exec)
+    result = await ml_train(data_file="data.csv", target_column="target", cwd="/tmp")
+    assert result == payload
+
+
+@pytest.mark.asyncio
+async def test_ml_train_wraps_non_json_stdout(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def fake_exec(**kwargs: object) -> PythonResult:
+        return PythonResult(
+            stdout='[LightGBM] [Info] ...\n{"metrics": {}}', stderr="", returncode=0
+        )
+
+    monkeypatch.setattr("retrai.tools.ml_train.python_exec", fake_exec)
+    data = json.loads(await ml_train(data_file="d.csv", target_column="t", cwd="/tmp"))
+    assert data["model_type"] == "random_forest"
+    assert "[LightGBM]" in data["raw_output"]
+
+
 # ── _build_training_code ─────────────────────────────────────────────────────
 
 
@@ -143,6 +204,102 @@ def test_build_training_code_feature_columns() -> None:
     assert "['age', 'income', 'score']" in code
 
 
+def _run_training_body(
+    tmp_path: Path, model_type: str, missing_color_every: int = 0
+) -> dict[str, Any]:
+    """Execute the training body for ``model_type`` and return its namespace."""
+    pytest.importorskip("sklearn")
+    pytest.importorskip("pandas")
+    rows = ["x1,x2,color,target"]
+    for i in range(60):
+        color = "red" if i % 3 else "blue"
+        if missing_color_every and i % missing_color_every == 0:
+            color = ""
+        rows.append(f"{i},{(i * 7) % 11},{color},{int(i >= 30)}")
+    data = tmp_path / "data.csv"
+    data.write_text("\n".join(rows) + "\n")
+    params = _build_training_params(
+        data_file=str(data),
+        target_column="target",
+        task_type=None,
+        hyperparams={},
+        test_size=0.2,
+        feature_columns=None,
+        scoring_metric="accuracy",
+        cross_validate=False,
+        cv_folds=3,
+    )
+    namespace: dict[str, Any] = {"__name__": _IN_PROCESS_MODULE, **params}
+    exec(_compiled_training_body(*_body_key(MODEL_REGISTRY[model_type])), namespace)
+    return namespace
+
+
+def test_training_float32_gating(tmp_path: Path) -> None:
+    """Tree models get float32 inputs; liblinear/libsvm models keep float64."""
+    import numpy as np
+
+    rf = _run_training_body(tmp_path, "random_forest")
+    lr = _run_training_body(tmp_path, "logistic_regression")
+    assert rf["X_train_scaled"].dtype == np.float32
+    assert lr["X_train_scaled"].dtype == np.float64
+    assert "accuracy" in rf["output"]["metrics"]
+
+
+def test_training_keeps_missing_categories_missing(tmp_path: Path) -> None:
+    namespace = _run_training_body(tmp_path, "decision_tree", missing_color_every=10)
+    codes = namespace["X"]["color"]
+    assert (codes == -1).sum() == 6
+    assert sorted(set(codes)) == [-1, 0, 1]  # blue, red; no "nan" category
+
+
+def test_build_training_code_hist_gradient_boosting_native_categoricals(tmp_path: Path) -> None:
+    code = _build_training_code(
+        data_file="data.csv",
+        target_column="target",
+        model_info=MODEL_REGISTRY["hist_gradient_boosting"],
+        task_type="classification",
+        hyperparams={"max_iter": 50},
+        test_size=0.2,
+        feature_columns=None,
+        scoring_metric="auc",
+        cross_validate=False,
+        cv_folds=5,
+    )
+    assert (
+        'HistGradientBoostingClassifier(categorical_features="from_dtype", **hyperparams)' in code
+    )
+    assert "hyperparams = dict(max_iter=50)" in code
+
+    namespace = _run_training_body(tmp_path, "hist_gradient_boosting")
+    assert namespace["X_train_scaled"]["color"].dtype.name == "category"
+    assert namespace["output"]["model_type"] == "HistGradientBoostingClassifier"
+
+
+def test_training_body_shared_across_values() -> None:
+    """Per-call values live in the preamble; the compiled body is cached."""
+    model_info = MODEL_REGISTRY["random_forest"]
+    codes = [
+        _build_training_code(
+            data_file=f"data{i}.csv",
+            target_column="target",
+            model_info=model_info,
+            task_type=None,
+            hyperparams={"n_estimators": 10 * (i + 1)},
+            test_size=0.2,
+            feature_columns=None,
+            scoring_metric="auc",
+            cross_validate=bool(i),
+            cv_folds=3 + i,
+        )
+        for i in range(2)
+    ]
+    body = _training_body(*_body_key(model_info))
+    assert all(code.endswith(body) for code in codes)
+    assert "data0.csv" not in body
+    key = _body_key(model_info)
+    assert _compiled_training_body(*key) is _compiled_training_body(*key)
+
+
 # ── MODEL_REGISTRY ───────────────────────────────────────────────────────────
 
 
@@ -151,6 +308,8 @@ def test_model_registry_has_key_models() -> None:
         "logistic_regression",
         "random_forest",
         "gradient_boosting",
+        "hist_gradient_boosting",
+        "hist_gradient_boosting_regressor",
         "svm",
         "knn",
         "decision_tree",
@@ -3,15 +3,21 @@
 from __future__ import annotations
 
 import json
+import os
 
 import pytest
 
 from retrai.tools.optimize import (
     _assignment,
+    _compile_objective,
+    _executor_for,
     _integer_program,
     _knapsack,
     _linear_program,
+    _linear_terms,
     _minimize,
+    _parse_constraint,
+    _to_int_matrix,
     _tsp,
     optimize,
 )
@@ -69,6 +75,26 @@ def test_linear_program_infeasible() -> None:
     assert result["success"] is False
 
 
+@skip_scipy
+def test_linear_program_accepts_ndarrays_and_sparse() -> None:
+    """ndarray inputs pass through; large sparse A_ub is solved as CSR."""
+    import numpy as np
+
+    n = 120
+    a_ub = np.eye(n)
+    result = _linear_program(
+        c=-np.ones(n),
+        a_ub=a_ub,
+        b_ub=np.full(n, 2.0),
+        a_eq=None,
+        b_eq=None,
+        bounds=[(0, None)] * n,
+        method="highs",
+    )
+    assert result["success"] is True
+    assert abs(result["objective_value"] - (-2.0 * n)) < 1e-6
+
+
 # ── minimize ──────────────────────────────────────────────────────────────────
 
 
@@ -112,6 +138,60 @@ def test_minimize_invalid_expression() -> None:
     assert "error" in result
 
 
+@skip_scipy
+def test_minimize_rejects_unsafe_names() -> None:
+    for expression in ["open('f').read()", "x.__class__", "y[0] ** 2"]:
+        result = _minimize(expression=expression, x0=[0.0], method="BFGS", bounds=None)
+        assert "Invalid expression" in result["error"]
+
+
+@skip_scipy
+def test_minimize_allows_comprehension_and_lambda_variables() -> None:
+    result = _minimize(
+        expression="np.sum([xi**2 for xi in x]) + (lambda v: v[0] ** 2)(x - 1.0)",
+        x0=[2.0, -3.0],
+        method="BFGS",
+        bounds=None,
+    )
+    assert result["success"] is True
+    assert abs(result["objective_value"] - 0.5) < 1e-6
+
+    result = _minimize(expression="[y for xi in x][0]", x0=[0.0], method="BFGS", bounds=None)
+    assert "unknown name 'y'" in result["error"]
+
+
+@skip_scipy
+def test_minimize_uses_jax_gradient_when_available() -> None:
+    jax = pytest.importorskip("jax")
+    x64_before = jax.config.jax_enable_x64
+    result = _minimize(
+        expression="np.sum((x - 3.0) ** 2)",
+        x0=[0.0, 0.0],
+        method="BFGS",
+        bounds=None,
+    )
+    assert result["success"] is True
+    assert result["solver_info"]["gradient"] == "jax"
+    assert abs(result["solution"][0] - 3.0) < 1e-6
+    # float64 is scoped to the gradient call, not flipped process-wide
+    assert jax.config.jax_enable_x64 == x64_before
+
+
+@skip_scipy
+def test_minimize_gradient_free_method_skips_jac() -> None:
+    result = _minimize(expression="x[0]**2", x0=[1.0], method="Nelder-Mead", bounds=None)
+    assert result["solver_info"]["gradient"] == "none"
+
+
+@skip_scipy
+def test_compile_objective_is_cached() -> None:
+    import numpy as np
+
+    f = _compile_objective("np.sum(x**2)")
+    assert f is _compile_objective("np.sum(x**2)")
+    assert f(np.array([3.0])) == 9.0
+
+
 # ── knapsack ──────────────────────────────────────────────────────────────────
 
 
@@ -142,6 +222,18 @@ def test_knapsack_all_fit() -> None:
     assert len(result["solution"]["selected_items"]) == 3
 
 
+@skip_ortools
+def test_knapsack_large_capacity_uses_branch_and_bound() -> None:
+    result = _knapsack(
+        values=[60, 100, 120],
+        weights=[10**7, 2 * 10**7, 3 * 10**7],
+        capacity=5 * 10**7,
+    )
+    assert result["objective_value"] == 220
+    assert result["solution"]["total_weight"] == 5 * 10**7
+    assert "branch_and_bound" in result["solver_info"]["solver"]
+
+
 # ── TSP ───────────────────────────────────────────────────────────────────────
 
 
@@ -162,6 +254,51 @@ def test_tsp_basic() -> None:
     assert route[-1] == 0
     # All cities visited
     assert set(route) == {0, 1, 2, 3}
+    # Small instances skip the metaheuristic entirely
+    assert result["solver_info"]["metaheuristic"] is None
+    assert result["objective_value"] == 80
+
+
+@skip_ortools
+def test_tsp_custom_strategy_and_unknown_option() -> None:
+    dist = [[0 if i == j else abs(i - j) for j in range(15)] for i in range(15)]
+    result = _tsp(dist, 0, first_solution_strategy="christofides", metaheuristic=None)
+    assert result["success"] is True
+    assert result["solver_info"]["first_solution_strategy"] == "CHRISTOFIDES"
+
+    bad = _tsp(dist, 0, first_solution_strategy="NOT_A_STRATEGY")
+    assert "error" in bad
+
+
+@pytest.mark.asyncio
+@skip_ortools
+async def test_optimize_tsp_accepts_binary_matrix() -> None:
+    """A base64 int64 buffer decodes to the same instance as nested lists."""
+    import base64
+    from unittest.mock import patch
+
+    import numpy as np
+
+    dist = [[0, 10, 15, 20], [10, 0, 35, 25], [15, 35, 0, 30], [20, 25, 30, 0]]
+    buf = np.asarray(dist, dtype=np.int64).tobytes()
+    assert _to_int_matrix(buf).tolist() == dist
+    with pytest.raises(ValueError, match="not a square"):
+        _to_int_matrix(buf[:-8])
+
+    # Without numpy the payload decodes to nested lists
+    with patch("retrai.tools.optimize._HAS_NUMPY", False):
+        assert _to_int_matrix(buf) == dist
+        with pytest.raises(ValueError, match="whole int64"):
+            _to_int_matrix(buf[:-1])
+
+    # Sized by rows, not by buffer length: a toy instance stays in-thread
+    assert _executor_for("tsp", {"distance_matrix": buf}) is None
+    assert _executor_for("assignment", {"cost_matrix": base64.b64encode(buf).decode()}) is None
+
+    raw = await optimize(action="tsp", cwd="/tmp", distance_matrix=base64.b64encode(buf).decode())
+    result = json.loads(raw)
+    assert result["success"] is True
+    assert result["objective_value"] == 80
 
 
 # ── Assignment ────────────────────────────────────────────────────────────────
@@ -187,6 +324,15 @@ def test_assignment_basic() -> None:
     assert len(set(tasks)) == 3
 
 
+@skip_ortools
+def test_assignment_rejects_fractional_costs() -> None:
+    result = _assignment(cost_matrix=[[1.9, 1.0], [1.0, 1.9]])
+    assert "must be integers" in result["error"]
+
+    result = _assignment(cost_matrix=[[2.0, 1.0], [1.0, 2.0]])
+    assert result["objective_value"] == 2
+
+
 # ── Integer Program ───────────────────────────────────────────────────────────
 
 
@@ -209,6 +355,41 @@ def test_integer_program_basic() -> None:
     assert result["solution"]["y"] == 4
 
 
+@skip_ortools
+def test_integer_program_strict_inequalities() -> None:
+    result = _integer_program(
+        variables=[{"name": "x", "lb": 0, "ub": 10}],
+        constraints=["x < 5", "x > 1"],
+        objective="x",
+        maximize=True,
+    )
+    assert result["solution"]["x"] == 4
+    assert _parse_constraint("x < 5") is _parse_constraint("x < 5")
+
+
+@skip_ortools
+def test_integer_program_folds_constants_across() -> None:
+    """LHS constants move to the precomputed RHS; objective offsets are kept."""
+    assert _parse_constraint("x + y + z + 3 <= 2*5") == ("x + y + z + 3", "<=", 10)
+    result = _integer_program(
+        variables=[{"name": n, "lb": 0, "ub": 10} for n in "xyz"],
+        constraints=["x + y + z + 3 <= 2*5", "2*x - z >= 1"],
+        objective="x + y + z + 100",
+        maximize=True,
+    )
+    assert result["success"] is True
+    assert result["objective_value"] == 107
+
+
+def test_linear_terms_folds_coefficients() -> None:
+    assert _linear_terms("3*x + 2*y") == ((("x", 3), ("y", 2)), 0)
+    assert _linear_terms("x - (y - 2)*3 + 4") == ((("x", 1), ("y", -3)), 10)
+    assert _linear_terms("-2*(x + y)") == ((("x", -2), ("y", -2)), 0)
+    # Nonlinear or non-integer terms fall back to eval
+    assert _linear_terms("x*y") is None
+    assert _linear_terms("x / 2") is None
+
+
 # ── async optimize() wrapper ──────────────────────────────────────────────────
 
 
@@ -245,6 +426,59 @@ async def test_optimize_linear_program_via_wrapper() -> None:
     assert result["success"] is True
 
 
+@pytest.mark.asyncio
+@skip_scipy
+async def test_optimize_large_problem_runs_in_process_pool() -> None:
+    """Problems above the size threshold are solved in the shared process pool."""
+    import concurrent.futures
+
+    n = 150
+    assert _executor_for("linear_program", {"c": [0.0] * 2}) is None
+    assert isinstance(
+        _executor_for("linear_program", {"c": [0.0] * n}),
+        concurrent.futures.ProcessPoolExecutor,
+    )
+
+    raw = await optimize(
+        action="linear_program",
+        cwd="/tmp",
+        c=[-1.0] * n,
+        bounds=[(0, 1)] * n,
+    )
+    result = json.loads(raw)
+    assert result["success"] is True
+    assert result["objective_value"] == pytest.approx(-n)
+
+
+@pytest.mark.asyncio
+@skip_ortools
+async def test_optimize_pooled_integer_program_shares_cores() -> None:
+    """CP-SAT in the process pool gets a share of the cores, not all of them."""
+    import retrai.tools.optimize as opt_mod
+
+    names = [f"x{i}" for i in range(opt_mod._PROCESS_POOL_MIN_SIZE)]
+    raw = await optimize(
+        action="integer_program",
+        cwd="/tmp",
+        variables=[{"name": name, "lb": 0, "ub": 1} for name in names],
+        constraints=[],
+        objective=" + ".join(names),
+    )
+    result = json.loads(raw)
+    assert result["objective_value"] == len(names)
+    assert result["solver_info"]["num_workers"] == opt_mod._POOL_SOLVER_THREADS
+    assert opt_mod._POOL_SOLVER_THREADS * opt_mod._PROCESS_POOL_WORKERS <= (os.cpu_count() or 1)
+
+
+def test_missing_scipy_returns_hint(monkeypatch: pytest.MonkeyPatch) -> None:
+    """scipy availability is decided once at import; solvers just check the flag."""
+    import retrai.tools.optimize as opt_mod
+
+    monkeypatch.setattr(opt_mod, "_HAS_SCIPY", False)
+    assert "scipy" in opt_mod._linear_program([1.0], None, None, None, None, None, "highs")["error"]
+    assert "scipy" in opt_mod._minimize("x[0]**2", [1.0], "BFGS", None)["error"]
+
+
 def test_missing_ortools_returns_hint() -> None:
     """When ortools is missing, knapsack returns the install hint."""
     import unittest.mock as mock
@@ -19,6 +19,36 @@ def test_build_profile_code_contains_cprofile() -> None:
     assert "cumulative" in code
 
 
+def test_build_profile_code_survives_quotes_and_backslashes() -> None:
+    """Snippets are embedded as base64, so quoting in user code cannot break out."""
+    import subprocess
+    import sys
+
+    snippet = 'a = \'x"""y\'\nb = "\\\\"\nassert len(a) == 5 and len(b) == 1\n'
+    code = _build_profile_code(snippet, top_n=3)
+    assert "base64" in code
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    assert "top_functions" in json.loads(proc.stdout)
+
+
+@pytest.mark.parametrize("profiler", ["pyinstrument", "yappi"])
+def test_build_profile_code_sampling_profilers(profiler: str) -> None:
+    """Non-default profilers emit the same result shape as cProfile."""
+    import subprocess
+    import sys
+
+    pytest.importorskip(profiler)
+    code = _build_profile_code("sorted(range(200000), key=lambda x: -x)", 5, profiler)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+
+    result = json.loads(proc.stdout)
+    assert result["profiler"] == profiler
+    assert 0 < len(result["top_functions"]) <= 5
+    assert result["total_time_ms"] > 0
+
+
 def test_build_timeit_code_contains_timeit() -> None:
     code = _build_timeit_code("1 + 1", setup="pass", number=100)
     assert "timeit" in code
@@ -63,6 +93,26 @@ async def test_profile_code_returns_numeric_times(tmp_path: Path) -> None:
         assert isinstance(fn["tottime_ms"], (int, float))
 
 
+@pytest.mark.asyncio
+async def test_profile_code_top_n_sorted_by_cumtime(tmp_path: Path) -> None:
+    """Only ``top_n`` rows come back, heaviest cumulative time first."""
+    code = """
+def leaf(i):
+    return i * i
+
+def mid(n):
+    return [leaf(i) for i in range(n)]
+
+for _ in range(20):
+    mid(500)
+"""
+    result_str = await profile_code(action="profile_code", cwd=str(tmp_path), code=code, top_n=3)
+    rows = json.loads(result_str)["top_functions"]
+    assert len(rows) == 3
+    cumtimes = [r["cumtime_ms"] for r in rows]
+    assert cumtimes == sorted(cumtimes, reverse=True)
+
+
 @pytest.mark.asyncio
 async def test_profile_file(tmp_path: Path) -> None:
     """Profile a .py file and verify structured output."""
@@ -140,6 +190,14 @@ async def test_profile_code_missing_code(tmp_path: Path) -> None:
     assert "error" in result
 
 
+@pytest.mark.asyncio
+async def test_profile_code_unknown_profiler(tmp_path: Path) -> None:
+    result_str = await profile_code(
+        action="profile_code", cwd=str(tmp_path), code="x = 1", profiler="perf"
+    )
+    assert "Unknown profiler" in json.loads(result_str)["error"]
+
+
 @pytest.mark.asyncio
 async def test_timeit_missing_expression(tmp_path: Path) -> None:
     result_str = await profile_code(action="timeit", cwd=str(tmp_path))
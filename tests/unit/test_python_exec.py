@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
 from pathlib import Path
 
@@ -11,6 +12,7 @@ from retrai.tools.python_exec import (
     PythonResult,
     _build_sandbox_env,
     _ensure_venv,
+    _install_packages,
     _sandbox_dir,
     python_exec,
 )
@@ -18,11 +20,22 @@ from retrai.tools.python_exec import (
 # ── sandbox_dir ───────────────────────────────────────────────────────────────
 
 
-def test_sandbox_dir_path(tmp_path: Path) -> None:
+def test_sandbox_dir_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv("RETRAI_SANDBOX_ROOT", raising=False)
     result = _sandbox_dir(str(tmp_path))
     assert result == tmp_path / ".retrai" / "sandbox"
 
 
+def test_sandbox_dir_honours_root_override(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    root = tmp_path / "shm"
+    monkeypatch.setenv("RETRAI_SANDBOX_ROOT", str(root))
+    a = _sandbox_dir(str(tmp_path / "a"))
+    b = _sandbox_dir(str(tmp_path / "b"))
+    assert a.parent.parent == b.parent.parent == root / "retrai"
+    assert a != b
+    assert a == _sandbox_dir(str(tmp_path / "a"))
+
+
 # ── ensure_venv ───────────────────────────────────────────────────────────────
 
 
@@ -40,6 +53,58 @@ def test_ensure_venv_reuses_existing(tmp_path: Path) -> None:
     assert python1 == python2
 
 
+def test_ensure_venv_memoizes_path(tmp_path: Path) -> None:
+    """Once created, the venv path is served from the cache without a stat."""
+    import shutil
+
+    sandbox = tmp_path / ".retrai" / "sandbox"
+    python = _ensure_venv(sandbox)
+    shutil.rmtree(sandbox)
+    assert _ensure_venv(sandbox) == python
+    assert not python.exists()
+
+
+# ── install_packages ──────────────────────────────────────────────────────────
+
+
+@pytest.mark.asyncio
+async def test_install_packages_skips_already_installed(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Only requirements not yet installed reach the installer; failures reset the cache."""
+    calls: list[tuple[str, ...]] = []
+    returncode = 0
+
+    class FakeProc:
+        @property
+        def returncode(self) -> int:
+            return returncode
+
+        async def communicate(self) -> tuple[bytes, bytes]:
+            return b"", b"boom"
+
+    async def fake_exec(*cmd: str, **kwargs: object) -> FakeProc:
+        calls.append(cmd)
+        return FakeProc()
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", fake_exec)
+    sandbox = tmp_path / ".retrai" / "sandbox"
+
+    assert await _install_packages(["numpy", "scipy"], sandbox, str(tmp_path)) == ("", False)
+    assert await _install_packages(["scipy", "numpy"], sandbox, str(tmp_path)) == ("", False)
+    assert len(calls) == 1
+
+    await _install_packages(["numpy", "pandas"], sandbox, str(tmp_path))
+    assert calls[-1][-1] == "pandas" and "numpy" not in calls[-1]
+
+    returncode = 1
+    _, had_error = await _install_packages(["polars"], sandbox, str(tmp_path))
+    assert had_error
+    returncode = 0
+    await _install_packages(["numpy"], sandbox, str(tmp_path))
+    assert calls[-1][-1] == "numpy"
+
+
 # ── build_sandbox_env ─────────────────────────────────────────────────────────
 
 
@@ -146,12 +211,26 @@ async def test_python_exec_venv_reused(tmp_path: Path) -> None:
 
 
 @pytest.mark.asyncio
-async def test_python_exec_temp_script_cleaned_up(tmp_path: Path) -> None:
-    """Temp script file should be deleted after execution."""
-    await python_exec("print('cleanup')", cwd=str(tmp_path))
-    # No _retrai_exec_ files should remain
-    leftover = list(tmp_path.glob("_retrai_exec_*.py"))
-    assert leftover == []
+async def test_python_exec_rebuilds_deleted_venv(tmp_path: Path) -> None:
+    """A cached venv that was removed from disk is recreated transparently."""
+    import shutil
+
+    await python_exec("print('first')", cwd=str(tmp_path))
+    shutil.rmtree(tmp_path / ".retrai" / "sandbox")
+
+    result = await python_exec("print('again')", cwd=str(tmp_path))
+    assert result.returncode == 0
+    assert "again" in result.stdout
+
+
+@pytest.mark.asyncio
+async def test_python_exec_pipes_code_via_stdin(tmp_path: Path) -> None:
+    """Code is fed on stdin — large programs work and nothing touches cwd."""
+    padding = "\n".join(f"_v{i} = {i}" for i in range(20000))  # well past a pipe buffer
+    result = await python_exec(f"{padding}\nprint(__file__, _v19999)", cwd=str(tmp_path))
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "<stdin> 19999"
+    assert [p.name for p in tmp_path.iterdir()] == [".retrai"]
 
 
 @pytest.mark.asyncio
@@ -164,3 +243,48 @@ print(f"sum={x + y}")
     result = await python_exec(code, cwd=str(tmp_path))
     assert result.returncode == 0
     assert "sum=30" in result.stdout
+
+
+@pytest.mark.asyncio
+async def test_python_exec_persistent_reuses_interpreter(tmp_path: Path) -> None:
+    first = await python_exec(
+        "import os, sys, json; secret = 1; print(os.getpid())",
+        cwd=str(tmp_path),
+        persistent=True,
+    )
+    second = await python_exec(
+        "import os, sys; print(os.getpid(), 'json' in sys.modules, 'secret' in globals())",
+        cwd=str(tmp_path),
+        persistent=True,
+    )
+    exited = await python_exec("import sys; sys.exit(3)", cwd=str(tmp_path), persistent=True)
+
+    assert first.returncode == 0, first.stderr
+    pid = first.stdout.strip()
+    assert second.stdout.split() == [pid, "True", "False"]
+    assert exited.returncode == 3
+
+
+@pytest.mark.asyncio
+async def test_python_exec_persistent_concurrent_calls_share_worker(tmp_path: Path) -> None:
+    results = await asyncio.gather(
+        *(
+            python_exec("import os; print(os.getpid())", cwd=str(tmp_path), persistent=True)
+            for _ in range(3)
+        )
+    )
+
+    assert all(r.returncode == 0 for r in results), [r.stderr for r in results]
+    assert len({r.stdout.strip() for r in results}) == 1
+
+
+@pytest.mark.asyncio
+async def test_python_exec_persistent_timeout_replaces_worker(tmp_path: Path) -> None:
+    hung = await python_exec(
+        "import time; time.sleep(60)", cwd=str(tmp_path), timeout=0.5, persistent=True
+    )
+    after = await python_exec('print("recovered")', cwd=str(tmp_path), persistent=True)
+
+    assert hung.timed_out is True
+    assert after.returncode == 0
+    assert after.stdout == "recovered\n"
@@ -2,21 +2,35 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 from pathlib import Path
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
 from retrai.tools.rust_bench import (
     _parse_bench_output,
-    _parse_criterion_text,
-    _parse_libtest,
+    _parse_criterion_json,
+    _parse_text_output,
     _to_ns,
     rust_bench,
 )
 
 
+def _fake_proc(returncode: int, stdout: bytes, stderr: bytes) -> AsyncMock:
+    """A subprocess stand-in whose pipes stream ``stdout``/``stderr`` then EOF."""
+    proc = AsyncMock()
+    proc.returncode = returncode
+    proc.stdout = asyncio.StreamReader()
+    proc.stdout.feed_data(stdout)
+    proc.stdout.feed_eof()
+    proc.stderr = asyncio.StreamReader()
+    proc.stderr.feed_data(stderr)
+    proc.stderr.feed_eof()
+    return proc
+
+
 class TestToNs:
     def test_ps(self) -> None:
         assert _to_ns(1000.0, "ps") == 1.0
@@ -33,11 +47,19 @@ class TestToNs:
     def test_s(self) -> None:
         assert _to_ns(1.0, "s") == 1_000_000_000.0
 
+    def test_case_variants(self) -> None:
+        assert _to_ns(2.0, "US") == _to_ns(2.0, "Us") == 2_000.0
+        assert _to_ns(1.0, "µs") == 1_000.0
+
+    def test_unknown_unit_raises(self) -> None:
+        with pytest.raises(KeyError):
+            _to_ns(1.0, "cycles")
+
 
 class TestParseCriterionText:
     def test_basic_ns(self) -> None:
         output = "sum_vec                 time:   [12.345 ns 12.456 ns 12.567 ns]\n"
-        results = _parse_criterion_text(output)
+        results = _parse_text_output(output)
         assert len(results) == 1
         assert results[0]["name"] == "sum_vec"
         assert abs(results[0]["ns_per_iter"] - 12.456) < 0.01
@@ -45,7 +67,7 @@ class TestParseCriterionText:
 
     def test_microsecond(self) -> None:
         output = "my_bench                time:   [1.234 µs 1.256 µs 1.278 µs]\n"
-        results = _parse_criterion_text(output)
+        results = _parse_text_output(output)
         assert len(results) == 1
         assert abs(results[0]["ns_per_iter"] - 1256.0) < 1.0
 
@@ -54,19 +76,45 @@ class TestParseCriterionText:
             "bench_a                 time:   [10.0 ns 11.0 ns 12.0 ns]\n"
             "bench_b                 time:   [20.0 ns 21.0 ns 22.0 ns]\n"
         )
-        results = _parse_criterion_text(output)
+        results = _parse_text_output(output)
         assert len(results) == 2
 
     def test_no_match(self) -> None:
         output = "No benchmark output here\n"
-        results = _parse_criterion_text(output)
+        results = _parse_text_output(output)
         assert results == []
 
+    def test_unknown_unit_skipped(self) -> None:
+        output = (
+            "cycles_bench            time:   [10.0 cycles 11.0 cycles 12.0 cycles]\n"
+            "bench_b                 time:   [20.0 ns 21.0 ns 22.0 ns]\n"
+        )
+        results = _parse_text_output(output)
+        assert [r["name"] for r in results] == ["bench_b"]
+        assert [r["name"] for r in _parse_bench_output(output)] == ["bench_b"]
+
+
+class TestParseCriterionJson:
+    def test_objects_among_noise(self) -> None:
+        output = (
+            "Compiling crate {v0.1.0}\n"
+            '  {"id": "sum_vec", "typical": {"estimate": 12.5, "lower_bound": 12.0,'
+            ' "upper_bound": 13.0, "unit": "ns"}, "throughput": null}\n'
+            '{"reason": "benchmark-complete"}\n'
+            '{"id": "broken", "typical": \n'
+            '{"id": "dot", "typical": {"estimate": 3.0}}'
+        )
+        results = _parse_criterion_json(output)
+        assert [r["name"] for r in results] == ["sum_vec", "dot"]
+        assert results[0]["ns_per_iter"] == 12.5
+        assert results[0]["upper_bound_ns"] == 13.0
+        assert results[1]["lower_bound_ns"] == 0
+
 
 class TestParseLibtest:
     def test_basic(self) -> None:
         output = "test sum_vec ... bench:         12,345 ns/iter (+/- 123)\n"
-        results = _parse_libtest(output)
+        results = _parse_text_output(output)
         assert len(results) == 1
         assert results[0]["name"] == "sum_vec"
         assert results[0]["ns_per_iter"] == 12345.0
@@ -75,9 +123,20 @@ class TestParseLibtest:
 
     def test_no_match(self) -> None:
         output = "No benchmark output\n"
-        results = _parse_libtest(output)
+        results = _parse_text_output(output)
         assert results == []
 
+    def test_large_and_ungrouped_values(self) -> None:
+        output = (
+            "test big ... bench:  1,234,567 ns/iter (+/- 12,345)\n"
+            "test tiny ... bench:         87 ns/iter (+/- 0)\n"
+        )
+        results = _parse_text_output(output)
+        assert [(r["ns_per_iter"], r["upper_bound_ns"]) for r in results] == [
+            (1234567.0, 1246912.0),
+            (87.0, 87.0),
+        ]
+
 
 class TestParseBenchOutput:
     def test_prefers_criterion_text(self) -> None:
@@ -96,6 +155,35 @@ class TestParseBenchOutput:
         results = _parse_bench_output("")
         assert results == []
 
+    def test_mixed_output_prefers_criterion(self) -> None:
+        output = (
+            "TEST old_bench ... BENCH:         1,000 NS/ITER (+/- 10)\n"
+            "sum_vec                 time:   [12.0 ns 12.5 ns 13.0 ns]\n"
+        )
+        results = _parse_bench_output(output)
+        assert [r["source"] for r in results] == ["criterion_text"]
+        assert _parse_bench_output(output.splitlines()[0])[0]["ns_per_iter"] == 1000.0
+
+    def test_chunks_parsed_separately(self) -> None:
+        stdout = "test old_bench ... bench:         1,000 ns/iter (+/- 10)\n"
+        stderr = "sum_vec                 time:   [12.0 ns 12.5 ns 13.0 ns]\n"
+        results = _parse_bench_output(stdout, stderr)
+        assert [r["name"] for r in results] == ["sum_vec"]
+
+        # No line is stitched together across the chunk boundary
+        assert _parse_bench_output("sum_vec   time:   [12.0 ns", " 12.5 ns 13.0 ns]\n") == []
+
+    def test_skips_parsers_without_signature(self) -> None:
+        output = "sum_vec                 time:   [12.0 ns 12.5 ns 13.0 ns]\n"
+        with (
+            patch("retrai.tools.rust_bench._parse_criterion_json") as json_parser,
+            patch("retrai.tools.rust_bench._libtest_row") as libtest_row,
+        ):
+            assert _parse_bench_output(output)[0]["source"] == "criterion_text"
+            assert _parse_bench_output("   Compiling foo v0.1.0\n") == []
+        json_parser.assert_not_called()
+        libtest_row.assert_not_called()
+
 
 class TestRustBenchTool:
     def test_schema(self) -> None:
@@ -126,29 +214,93 @@ class TestRustBenchTool:
 
         bench_output = "sum_vec                 time:   [45.0 ns 48.0 ns 51.0 ns]\n"
 
-        mock_proc = AsyncMock()
-        mock_proc.returncode = 0
-        mock_proc.communicate = AsyncMock(
-            return_value=(bench_output.encode(), b"")
-        )
+        mock_proc = _fake_proc(0, bench_output.encode(), b"")
 
-        with patch("asyncio.create_subprocess_shell", return_value=mock_proc):
+        with patch("asyncio.create_subprocess_exec", return_value=mock_proc):
             result = await rust_bench(bench_name="sum_vec", cwd=str(tmp_path))
 
         assert "sum_vec" in result
         assert "Benchmark Results" in result
 
     @pytest.mark.asyncio
-    async def test_failed_bench(self, tmp_path: Path) -> None:
+    async def test_streamed_output_keeps_only_result_lines(self, tmp_path: Path) -> None:
         (tmp_path / "Cargo.toml").write_text("[package]\nname = \"test\"\n")
+        noise = "".join(f"   Compiling dep{i} v0.1.0\n" for i in range(5000))
+        bench_output = (
+            "Benchmarking a/very/long/benchmark/name: Analyzing\n"
+            "a/very/long/benchmark/name\n"
+            "                        time:   [1.0 µs 1.1 µs 1.2 µs]\n"
+            "Found 3 outliers among 100 measurements (3.00%)\n"
+        )
+        mock_proc = _fake_proc(0, bench_output.encode(), noise.encode())
 
-        mock_proc = AsyncMock()
-        mock_proc.returncode = 1
-        mock_proc.communicate = AsyncMock(
-            return_value=(b"", b"error[E0308]: mismatched types")
+        with patch("asyncio.create_subprocess_exec", return_value=mock_proc):
+            result = await rust_bench(cwd=str(tmp_path))
+
+        payload = json.loads(result.split("```json\n", 1)[1].rsplit("```", 1)[0])
+        [bench] = payload["benchmarks"]
+        assert bench["name"] == "a/very/long/benchmark/name"
+        assert bench["ns_per_iter"] == pytest.approx(1100.0)
+
+    @pytest.mark.asyncio
+    async def test_overlong_line_is_skipped(self, tmp_path: Path) -> None:
+        (tmp_path / "Cargo.toml").write_text("[package]\nname = \"test\"\n")
+        mock_proc = _fake_proc(0, b"", b"")
+        mock_proc.stdout = asyncio.StreamReader(limit=64)
+        mock_proc.stdout.feed_data(
+            b"x" * 500 + b"\nsum_vec                 time:   [45.0 ns 48.0 ns 51.0 ns]\n"
         )
+        mock_proc.stdout.feed_eof()
+
+        with patch("asyncio.create_subprocess_exec", return_value=mock_proc):
+            result = await rust_bench(cwd=str(tmp_path))
+
+        payload = json.loads(result.split("```json\n", 1)[1].rsplit("```", 1)[0])
+        assert [b["name"] for b in payload["benchmarks"]] == ["sum_vec"]
+
+    @pytest.mark.asyncio
+    async def test_failed_read_kills_running_process(self, tmp_path: Path) -> None:
+        (tmp_path / "Cargo.toml").write_text("[package]\nname = \"test\"\n")
+        mock_proc = _fake_proc(0, b"", b"")
+        mock_proc.returncode = None
+        mock_proc.kill = Mock()
+
+        with (
+            patch("asyncio.create_subprocess_exec", return_value=mock_proc),
+            patch(
+                "retrai.tools.rust_bench._collect_lines",
+                AsyncMock(side_effect=RuntimeError("boom")),
+            ),
+        ):
+            result = await rust_bench(cwd=str(tmp_path))
+
+        assert "boom" in json.loads(result)["error"]
+        mock_proc.kill.assert_called_once()
+        mock_proc.wait.assert_awaited()
+
+    @pytest.mark.asyncio
+    async def test_runs_cargo_without_shell(self, tmp_path: Path) -> None:
+        (tmp_path / "Cargo.toml").write_text("[package]\nname = \"test\"\n")
+        mock_proc = _fake_proc(0, b"", b"")
+
+        with patch("asyncio.create_subprocess_exec", return_value=mock_proc) as exec_:
+            await rust_bench(
+                bench_name="sum", extra_args="--features 'a b'; rm -rf /", cwd=str(tmp_path)
+            )
+
+        argv = exec_.call_args.args
+        assert argv == ("cargo", "bench", "sum", "--features", "a b;", "rm", "-rf", "/")
+
+        result = await rust_bench(extra_args="--features 'a", cwd=str(tmp_path))
+        assert "Invalid extra_args" in json.loads(result)["error"]
+
+    @pytest.mark.asyncio
+    async def test_failed_bench(self, tmp_path: Path) -> None:
+        (tmp_path / "Cargo.toml").write_text("[package]\nname = \"test\"\n")
+
+        mock_proc = _fake_proc(1, b"", b"error[E0308]: mismatched types")
 
-        with patch("asyncio.create_subprocess_shell", return_value=mock_proc):
+        with patch("asyncio.create_subprocess_exec", return_value=mock_proc):
             result = await rust_bench(bench_name="sum_vec", cwd=str(tmp_path))
 
         data = json.loads(result)
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
+from typing import Any
 
 import pytest
 
@@ -87,6 +88,322 @@ async def test_run_query_multiple_iterations(tmp_path: Path) -> None:
     assert data["min_ms"] <= data["avg_ms"] <= data["max_ms"]
 
 
+def test_run_query_counts_all_rows_but_samples_few(tmp_path: Path) -> None:
+    """Large results are fully drained and counted; only the sample is materialized."""
+    from retrai.tools.sql_bench import _run_query_sync, _SqlAlchemyBackend
+
+    backend = _SqlAlchemyBackend(f"sqlite:///{tmp_path / 'big.db'}")
+    query = (
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 25000) "
+        "SELECT x FROM c"
+    )
+    try:
+        result = _run_query_sync(backend, query, iterations=2, sample_limit=3)
+    finally:
+        backend.close()
+
+    assert result.error is None
+    assert result.row_count == 25000
+    assert result.sample_rows == [["1"], ["2"], ["3"]]
+    assert len(result.elapsed_ms) == 2
+
+
+def test_run_query_reports_integer_samples_and_spread(tmp_path: Path) -> None:
+    from retrai.tools.sql_bench import _run_query_sync, _SqlAlchemyBackend
+
+    backend = _SqlAlchemyBackend(f"sqlite:///{tmp_path / 'spread.db'}")
+    result = _run_query_sync(backend, "SELECT 1", iterations=5)
+
+    assert result.error is None
+    assert len(result.elapsed_ns) == 5
+    assert all(isinstance(ns, int) and ns > 0 for ns in result.elapsed_ns)
+    assert result.min_ms <= result.median_ms <= result.max_ms
+    assert result.stdev_ms is not None
+    assert result.p99_ms is not None and result.p99_ms <= result.max_ms
+
+
+def test_sqlalchemy_engine_is_reused_per_dsn(tmp_path: Path) -> None:
+    from retrai.tools.sql_bench import _ENGINE_CACHE, _SqlAlchemyBackend
+
+    dsn = f"sqlite:///{tmp_path / 'reuse.db'}"
+    first = _SqlAlchemyBackend(dsn)
+    first.close()
+    second = _SqlAlchemyBackend(dsn)
+
+    assert second._engine is first._engine
+    assert _ENGINE_CACHE[dsn] is first._engine
+    assert second.execute("SELECT 1") == (["1"], [[1]])
+
+
+def test_execute_limit_fetches_only_requested_rows(tmp_path: Path) -> None:
+    from retrai.tools.sql_bench import _SqlAlchemyBackend
+
+    backend = _SqlAlchemyBackend(f"sqlite:///{tmp_path / 'lim.db'}")
+    query = (
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 100) "
+        "SELECT x FROM c"
+    )
+    try:
+        columns, rows = backend.execute(query, limit=5)
+    finally:
+        backend.close()
+
+    assert columns == ["x"]
+    assert rows == [[1], [2], [3], [4], [5]]
+
+
+def test_databricks_drain_prefers_arrow_batches() -> None:
+    """Rows past the sample are counted from Arrow tables, not Python rows."""
+    from retrai.tools.sql_bench import _DatabricksBackend
+
+    class _Table:
+        def __init__(self, n: int) -> None:
+            self.num_rows = n
+
+    class _Cursor:
+        description = [("x",)]
+
+        def __init__(self) -> None:
+            self.arrow_batches = [_Table(10_000), _Table(2_500), _Table(0)]
+
+        def execute(self, query: str) -> None:
+            pass
+
+        def fetchmany(self, size: int) -> list[tuple[int]]:
+            return [(i,) for i in range(size)]
+
+        def fetchmany_arrow(self, size: int) -> _Table:
+            return self.arrow_batches.pop(0)
+
+        def close(self) -> None:
+            pass
+
+    class _Connection:
+        def cursor(self) -> _Cursor:
+            return _Cursor()
+
+    backend = object.__new__(_DatabricksBackend)
+    connection = _Connection()
+    backend._checkout = lambda: connection
+
+    columns, row_count, sample = backend.execute_sample("SELECT x", 2)
+    assert columns == ["x"]
+    assert row_count == 12_502
+    assert sample == [[0], [1]]
+
+
+_DESCRIBE_ROWS = [
+    ("id", "bigint", None),
+    ("name", "string", "display name"),
+    ("", "", ""),
+    ("# Detailed Table Information", "", ""),
+    ("Location", "s3://bucket/t", ""),
+    ("Provider", "delta", ""),
+]
+
+
+class _AsyncCursor:
+    """Databricks-style cursor that records when statements are submitted and awaited."""
+
+    def __init__(self, log: list[str]) -> None:
+        self._log = log
+        self._rows: list[tuple[Any, ...]] = []
+        self.description: list[tuple[str]] | None = None
+
+    def execute_async(self, query: str) -> None:
+        self._log.append(f"submit {query.split()[0]}")
+        if query.startswith("SHOW PARTITIONS"):
+            raise RuntimeError("not partitioned")
+        if query.startswith("DESCRIBE"):
+            self._rows = _DESCRIBE_ROWS
+        elif query.startswith("SHOW TBLPROPERTIES"):
+            self._rows = [("delta.minReaderVersion", "1")]
+        else:
+            self._rows = [(42,)]
+        self.description = [("c",)]
+
+    def is_query_pending(self) -> bool:
+        return False
+
+    def get_async_execution_result(self) -> None:
+        self._log.append("wait")
+
+    def fetchall(self) -> list[tuple[Any, ...]]:
+        return self._rows
+
+    def fetchmany(self, size: int) -> list[tuple[Any, ...]]:
+        return self._rows[:size]
+
+    def close(self) -> None:
+        pass
+
+
+def _async_backend(log: list[str]) -> Any:
+    from retrai.tools.sql_bench import _DatabricksBackend
+
+    class _Connection:
+        def cursor(self) -> _AsyncCursor:
+            return _AsyncCursor(log)
+
+    backend = object.__new__(_DatabricksBackend)
+    connection = _Connection()
+    backend._checkout = lambda: connection
+    return backend
+
+
+def test_databricks_describe_table_splits_columns_and_properties() -> None:
+    columns, properties = _async_backend([]).describe_table("t")
+    assert columns == [
+        {"name": "id", "type": "bigint", "comment": ""},
+        {"name": "name", "type": "string", "comment": "display name"},
+    ]
+    assert properties == {
+        "Location": "s3://bucket/t",
+        "Provider": "delta",
+        "delta.minReaderVersion": "1",
+    }
+
+
+def test_databricks_profile_submits_all_statements_before_waiting() -> None:
+    from retrai.tools.sql_bench import _profile_table_sync
+
+    log: list[str] = []
+    profile = _profile_table_sync(_async_backend(log), "t")
+
+    assert log[:4] == ["submit DESCRIBE", "submit SHOW", "submit SELECT", "submit SHOW"]
+    assert "wait" not in log[:4]
+    assert profile.error is None
+    assert profile.row_count == 42
+    assert profile.partitions == []
+    assert [c["name"] for c in profile.columns] == ["id", "name"]
+
+
+def test_run_query_concurrent_sqlalchemy(tmp_path: Path) -> None:
+    from retrai.tools.sql_bench import _run_query_sync, _SqlAlchemyBackend
+
+    backend = _SqlAlchemyBackend(f"sqlite:///{tmp_path / 'conc.db'}")
+    result = _run_query_sync(backend, "SELECT 1 UNION ALL SELECT 2", iterations=6, concurrency=3)
+
+    assert result.error is None
+    assert len(result.elapsed_ns) == 6
+    assert result.row_count == 2
+    assert result.sample_rows == [["1"], ["2"]]
+    assert result.throughput_qps is not None and result.throughput_qps > 0
+
+
+def test_databricks_concurrent_runs_keep_window_full() -> None:
+    from retrai.tools.sql_bench import _DatabricksBackend, _run_query_sync
+
+    state = {"in_flight": 0, "peak": 0}
+
+    class _Cursor:
+        description = [("x",)]
+
+        def __init__(self) -> None:
+            self._rows: list[tuple[int]] = []
+            self._polls = 0
+
+        def execute_async(self, query: str) -> None:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+            self._rows = [(1,), (2,), (3,)]
+
+        def is_query_pending(self) -> bool:
+            self._polls += 1
+            return self._polls < 2
+
+        def get_async_execution_result(self) -> None:
+            state["in_flight"] -= 1
+
+        def fetchmany(self, size: int) -> list[tuple[int]]:
+            batch, self._rows = self._rows[:size], self._rows[size:]
+            return batch
+
+        def close(self) -> None:
+            pass
+
+    class _Connection:
+        def cursor(self) -> _Cursor:
+            return _Cursor()
+
+    backend = object.__new__(_DatabricksBackend)
+    connection = _Connection()
+    backend._checkout = lambda: connection
+
+    result = _run_query_sync(backend, "SELECT x", iterations=5, sample_limit=1, concurrency=2)
+
+    assert result.error is None
+    assert len(result.elapsed_ns) == 5
+    assert result.row_count == 3
+    assert result.sample_rows == [["1"]]
+    assert state["peak"] == 2
+
+
+def test_databricks_connection_per_thread_and_dropped_when_lost() -> None:
+    import sys
+    import threading
+    import types
+    from unittest.mock import patch
+
+    from retrai.tools import sql_bench as sb
+
+    class _Cursor:
+        def __init__(self, connection: _Connection) -> None:
+            self._connection = connection
+            self.description = [("x",)]
+
+        def execute(self, query: str) -> None:
+            if self._connection.lost:
+                raise ConnectionResetError("session gone")
+
+        def fetchall(self) -> list[tuple[int]]:
+            return [(1,)]
+
+        def close(self) -> None:
+            pass
+
+    class _Connection:
+        def __init__(self, **kwargs: Any) -> None:
+            self.lost = False
+            self.open = True
+
+        def cursor(self) -> _Cursor:
+            return _Cursor(self)
+
+        def close(self) -> None:
+            self.open = False
+
+    dbsql = types.SimpleNamespace(connect=_Connection)
+    fake = types.ModuleType("databricks")
+    fake.sql = dbsql  # type: ignore[attr-defined]
+    cfg = {"server_hostname": "h", "http_path": "/p", "token": "t"}
+
+    with patch.dict(sys.modules, {"databricks": fake, "databricks.sql": dbsql}):
+        try:
+            # Built on the caller's thread without connecting; each thread
+            # that runs statements checks out its own connection.
+            backend = sb._DatabricksBackend(cfg)
+            assert not sb._DATABRICKS_CACHE
+            first = backend._checkout()
+            assert backend._checkout() is first
+            assert sb._DatabricksBackend(cfg)._checkout() is first
+
+            other: list[Any] = []
+            thread = threading.Thread(target=lambda: other.append(backend._checkout()))
+            thread.start()
+            thread.join()
+            assert other[0] is not first
+
+            first.lost = True
+            with pytest.raises(ConnectionResetError):
+                backend.execute("SELECT 1")
+            assert not first.open
+            assert backend._checkout() is not first
+            assert backend.execute("SELECT 1") == (["x"], [[1]])
+        finally:
+            sb._DATABRICKS_CACHE.clear()
+
+
 @pytest.mark.asyncio
 async def test_run_query_with_warmup(tmp_path: Path) -> None:
     """Warmup run is reflected in the result."""
@@ -272,6 +589,25 @@ def test_detect_backend_databricks() -> None:
     assert _detect_backend({"dsn": "databricks://token:x@host"}) == "databricks"
 
 
+def test_load_config_cached_until_file_changes(tmp_path: Path) -> None:
+    import os
+
+    from retrai.tools.sql_bench import _load_config, _load_config_cached
+
+    cfg_path = tmp_path / ".retrai.yml"
+    cfg_path.write_text("dsn: sqlite:///a.db\n")
+    first = _load_config(str(tmp_path))
+    first["dsn"] = "mutated"
+    hits = _load_config_cached.cache_info().hits
+    assert _load_config(str(tmp_path)) == {"dsn": "sqlite:///a.db"}
+    assert _load_config_cached.cache_info().hits == hits + 1
+
+    cfg_path.write_text("dsn: sqlite:///bb.db\n")
+    os.utime(cfg_path, ns=(0, cfg_path.stat().st_mtime_ns + 1_000_000))
+    assert _load_config(str(tmp_path)) == {"dsn": "sqlite:///bb.db"}
+    assert _load_config(str(tmp_path / "missing")) == {}
+
+
 def test_detect_backend_sqlalchemy() -> None:
     from retrai.tools.sql_bench import _detect_backend
 
@@ -182,3 +182,23 @@ def test_pytest_runner_timed_out(tmp_path: Path, monkeypatch):
     result = run_pytest(str(tmp_path))
     assert result.timed_out is True
     assert result.exit_code == -1
+
+
+# ── dump_json ─────────────────────────────────────────────────────────────────
+
+
+def test_dump_json_round_trips_with_fallbacks():
+    import json
+    from datetime import date
+
+    from retrai.tools.base import dump_json
+
+    payload = {"when": date(2024, 1, 2), "big": 2**70, "nested": {"x": [1, 2]}}
+    compact = dump_json(payload)
+    pretty = dump_json(payload, indent=True)
+
+    expected = {"when": "2024-01-02", "big": 2**70, "nested": {"x": [1, 2]}}
+    assert json.loads(compact) == expected
+    assert json.loads(pretty) == expected
+    assert "\n" not in compact
+    assert '\n  "when"' in pretty
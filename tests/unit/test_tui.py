@@ -2,6 +2,9 @@
 
 from __future__ import annotations
 
+import asyncio
+import sys
+
 import pytest
 from rich.text import Text
 
@@ -41,6 +44,12 @@ def test_gradient_logo_has_subtitle() -> None:
     assert "self-solving" in result.plain
 
 
+def test_gradient_logo_built_once() -> None:
+    from retrai.tui.widgets import build_gradient_logo
+
+    assert build_gradient_logo() is build_gradient_logo()
+
+
 # ── STATUS_STYLES ─────────────────────────────────────────────
 
 
@@ -55,6 +64,16 @@ def test_status_styles_all_states() -> None:
         assert len(icon) >= 1
 
 
+def test_status_badges_and_success_markup() -> None:
+    from retrai.tui.widgets import _STATUS_BADGES, _success_markup
+
+    assert _STATUS_BADGES["FAILED"] == "[bold #f87171]  ✗  FAILED  [/bold #f87171]"
+    assert _success_markup(80) == "[#4ade80]80%[/#4ade80]"
+    assert _success_markup(50) == "[#fbbf24]50%[/#fbbf24]"
+    assert _success_markup(49) == "[#f87171]49%[/#f87171]"
+    assert _success_markup(80) is _success_markup(80)
+
+
 # ── Help Text ─────────────────────────────────────────────────
 
 
@@ -108,12 +127,12 @@ def test_token_sparkline_append() -> None:
     from retrai.tui.widgets import TokenSparklineWidget
 
     spark = TokenSparklineWidget()
-    spark._data = []  # Reset (no mount)
+    spark._data.clear()  # Reset (no mount)
     spark._data.append(100.0)
     spark._data.append(200.0)
     spark._data.append(150.0)
 
-    assert spark._data == [100.0, 200.0, 150.0]
+    assert list(spark._data) == [100.0, 200.0, 150.0]
 
 
 def test_iteration_timeline_markers() -> None:
@@ -121,7 +140,7 @@ def test_iteration_timeline_markers() -> None:
     from retrai.tui.widgets import IterationTimeline
 
     tl = IterationTimeline()
-    tl._markers = []
+    tl._markers.clear()
     tl._markers.append("[#4ade80]●[/#4ade80]")  # achieved
     tl._markers.append("[#f87171]○[/#f87171]")  # failed
 
@@ -145,16 +164,11 @@ def test_tool_usage_table_stats() -> None:
     from retrai.tui.widgets import ToolUsageTable
 
     table = ToolUsageTable()
-    table._stats = {}
-    # Simulate recording
-    tool = "bash_exec"
-    if tool not in table._stats:
-        table._stats[tool] = {"calls": 0, "errors": 0}
-    table._stats[tool]["calls"] += 1
-    table._stats[tool]["calls"] += 1
+    table.record("bash_exec")
+    table.record("bash_exec")
 
-    assert table._stats["bash_exec"]["calls"] == 2
-    assert table._stats["bash_exec"]["errors"] == 0
+    assert table._calls["bash_exec"] == 2
+    assert table._errors["bash_exec"] == 0
 
 
 # ── App Import / Construction ─────────────────────────────────
@@ -226,6 +240,8 @@ async def test_app_mounts_and_renders() -> None:
 @pytest.mark.asyncio
 async def test_tab_switching() -> None:
     """Tab switching via keybindings works."""
+    from textual.widgets import TabbedContent
+
     from retrai.tui.app import RetrAITUI
 
     cfg = _make_cfg()
@@ -234,8 +250,10 @@ async def test_tab_switching() -> None:
     async with app.run_test(size=(120, 40)) as pilot:
         # Switch to dashboard tab
         await pilot.press("2")
-        tabs = app.query_one("TabbedContent")
+        tabs = app.query_one(TabbedContent)
         assert tabs  # Tab component exists
+        assert app._tabs is tabs
+        assert tabs.active == "dashboard"
 
         # Switch to files tab
         await pilot.press("3")
@@ -257,6 +275,7 @@ async def test_sidebar_toggle() -> None:
 
     async with app.run_test(size=(120, 40)) as pilot:
         sidebar = app.query_one("#sidebar")
+        assert app._sidebar is sidebar  # actions use the ref kept from compose
         assert sidebar.display  # visible initially
 
         await pilot.press("s")
@@ -269,6 +288,8 @@ async def test_sidebar_toggle() -> None:
 @pytest.mark.asyncio
 async def test_graph_screen_opens() -> None:
     """Graph screen modal opens with 'g' key."""
+    from textual.widgets import Static
+
     from retrai.tui.app import RetrAITUI
     from retrai.tui.screens import GraphScreen
 
@@ -280,5 +301,457 @@ async def test_graph_screen_opens() -> None:
         # Check the graph screen was pushed
         assert isinstance(app.screen, GraphScreen)
 
+        # The art is the pre-parsed renderable, not markup re-parsed per open
+        from retrai.tui.screens import _GRAPH_DEFAULT
+
+        art = app.screen.query_one("#graph-art", Static)
+        assert art.content is _GRAPH_DEFAULT
+        assert "PLAN" in _GRAPH_DEFAULT.plain and "[bold" not in _GRAPH_DEFAULT.plain
+
         # Dismiss it
         await pilot.press("escape")
+
+
+@pytest.mark.asyncio
+async def test_log_writes_coalesced_per_tick() -> None:
+    """Lines written in one tick reach the RichLog as a single write."""
+    from unittest.mock import patch
+
+    from rich.text import Text
+
+    from retrai.tui.app import RetrAITUI
+
+    app = RetrAITUI(cfg=_make_cfg())
+
+    async with app.run_test(size=(120, 40)) as pilot:
+        await pilot.pause()
+        assert app._rich_log is not None
+        with patch.object(app._rich_log, "write") as write:
+            app._write("[bold]first[/bold]")
+            app._write("[dim]second")  # unclosed tag stays on its own line
+            app._write("third")
+            write.assert_not_called()
+            await pilot.pause()
+
+        write.assert_called_once()
+        (text,) = write.call_args.args
+        assert isinstance(text, Text)
+        assert text.plain == "first\nsecond\nthird"
+        third_start = text.plain.index("third")
+        assert not any(span.end > third_start and span.style == "dim" for span in text.spans)
+
+
+@pytest.mark.asyncio
+async def test_handle_event_dispatches_by_kind() -> None:
+    """Known event kinds render their templates; unknown kinds are ignored."""
+    from types import SimpleNamespace
+
+    from retrai.tui.app import RetrAITUI
+
+    app = RetrAITUI(cfg=_make_cfg())
+
+    async with app.run_test(size=(120, 40)) as pilot:
+        await pilot.pause()
+        lines: list[str] = []
+        app._write = lines.append  # type: ignore[method-assign]
+
+        def event(kind: str, iteration: int = 0, **payload: object) -> SimpleNamespace:
+            return SimpleNamespace(kind=kind, payload=payload, iteration=iteration)
+
+        app._handle_event(event("step_start", 2, node="plan"))
+        app._handle_event(event("tool_result", tool="bash_exec", content="ok"))
+        app._handle_event(event("llm_usage", prompt_tokens=3, completion_tokens=4, total_tokens=7))
+        app._handle_event(event("not_a_kind"))
+
+        assert lines == [
+            "\n[bold #7c3aed]┌─[/bold #7c3aed] [bold #a78bfa]iter 2[/bold #a78bfa]"
+            " [dim #64748b]▸[/dim #64748b] [bold #e2e8f0]PLAN[/bold #e2e8f0]",
+            "  [#4ade80]✓ bash_exec[/#4ade80] [dim]'ok'[/dim]",
+            "  [#a78bfa]◈ tokens:[/#a78bfa] [dim]3in + 4out = 7[/dim]",
+        ]
+        assert app._iter_tokens == 7
+        assert app._status_panel is not None
+        assert app._status_panel.iteration == 2
+
+
+def test_event_text_escaped_for_markup() -> None:
+    """Agent text is shown literally; text without brackets is passed through."""
+    from rich.text import Text
+
+    from retrai.tui.app import _ERROR_TMPL, _escape_markup
+
+    plain = "no markup here"
+    assert _escape_markup(plain) is plain
+
+    error = "bad index a[/b] and [bold]x"
+    line = Text.from_markup(_ERROR_TMPL.format(error=_escape_markup(error)))
+    assert line.plain == f"ERROR: {error}"
+    path = "C:\\"  # a trailing backslash would escape the closing tag
+    assert Text.from_markup(f"[dim]{_escape_markup(path)}[/dim]").plain == path
+
+
+def test_dispatch_table_holds_bound_handlers() -> None:
+    """Handlers are bound once per app, so dispatch needs no per-event lookup."""
+    import types
+
+    from retrai.tui.app import RetrAITUI
+
+    app = RetrAITUI(cfg=_make_cfg())
+
+    assert app._dispatch["step_start"] == app._on_step_start
+    for handler in app._dispatch.values():
+        assert isinstance(handler, types.MethodType)
+        assert handler.__self__ is app
+    assert "iteration_complete" in app._dispatch
+
+
+def test_tool_args_formatting_and_file_tracking() -> None:
+    """Per-tool formatters ellipsize long args; paths keep their dotfile names."""
+    from unittest.mock import MagicMock
+
+    from retrai.tui.app import RetrAITUI
+
+    app = RetrAITUI(cfg=_make_cfg())
+    assert app._format_tool_args("bash_exec", {"command": "x" * 90}) == "x" * 79 + "…"
+    assert app._format_tool_args("bash_exec", {"command": "x" * 80}) == "x" * 80
+    assert app._format_tool_args("file_read", {"path": "p" * 70}) == "p" * 59 + "…"
+    assert app._format_tool_args("custom", {"a": 1, "b": "s"}) == "a=1, b=s"
+
+    tree = MagicMock()
+    app._file_tree = tree
+    app._track_file("file_write", {"path": "./src/main.py"})
+    app._track_file("file_read", {"path": ".env"})
+    app._track_file("bash_exec", {"command": "cat foo"})
+    app._track_file("web_search", {"path": "ignored"})
+
+    assert [c.args[0] for c in tree.add_file.call_args_list] == ["src/main.py", ".env"]
+    assert tree.add_file.call_args_list[0].kwargs == {"action": "write"}
+
+
+@pytest.mark.asyncio
+async def test_consume_events_yields_between_batches() -> None:
+    """A backlog is handled in order, in batches, and stops at the close sentinel."""
+    from types import SimpleNamespace
+
+    from retrai.tui.app import _EVENT_BATCH, RetrAITUI
+
+    app = RetrAITUI(cfg=_make_cfg())
+    handled: list[int] = []
+    app._handle_event = lambda event: handled.append(event.n)  # type: ignore[method-assign]
+
+    q: asyncio.Queue = asyncio.Queue()
+    total = _EVENT_BATCH * 3
+    for n in range(total):
+        q.put_nowait(SimpleNamespace(n=n))
+    q.put_nowait(None)
+    q.put_nowait(SimpleNamespace(n=-1))  # after close: never handled
+
+    consumer = asyncio.create_task(app._consume_events(q))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert 0 < len(handled) < total  # other tasks ran mid-backlog
+    await consumer
+
+    assert handled == list(range(total))
+
+
+def test_initial_state_fresh_per_run() -> None:
+    """Each run gets the full state with its own mutable lists."""
+    from retrai.tui.app import RetrAITUI
+
+    app = RetrAITUI(cfg=_make_cfg())
+    first, second = app._initial_state(), app._initial_state()
+
+    assert first == second
+    assert first["iteration"] == 0 and first["goal_achieved"] is False
+    assert first["max_iterations"] == app.cfg.max_iterations
+    assert first["run_id"] == app.cfg.run_id
+    assert first["messages"] is not second["messages"]
+    assert first["failed_strategies"] is not second["failed_strategies"]
+    assert len(first) == 16
+
+
+@pytest.mark.asyncio
+async def test_status_panel_batches_reactive_updates() -> None:
+    """A burst of reactive changes is rendered in a single flush."""
+    from unittest.mock import patch
+
+    from textual.app import App, ComposeResult
+
+    from retrai.tui.widgets import _FLUSH_DELAY, StatusPanel
+
+    class PanelApp(App[None]):
+        # Just the panel: no agent run to change its fields mid-test
+        def compose(self) -> ComposeResult:
+            yield StatusPanel(_make_cfg())
+
+    app = PanelApp()
+
+    async with app.run_test(size=(120, 40)) as pilot:
+        await pilot.pause()
+        panel = app.query_one(StatusPanel)
+        with patch.object(StatusPanel, "_flush", autospec=True, wraps=StatusPanel._flush) as flush:
+            for i in range(1, 6):
+                panel.iteration = i
+                panel.total_tokens = i * 1_500
+            panel.status = "FAILED"
+            await pilot.pause(_FLUSH_DELAY * 4)
+
+        assert flush.call_count == 1
+        assert "5/10" in str(panel._iter_label.content)
+        assert "7.5k" in str(panel._token_label.content)
+        assert "FAILED" in str(panel._badge.content)
+
+
+@pytest.mark.asyncio
+async def test_tick_bus_shares_one_timer() -> None:
+    """Subscribers share one interval, which stops with the last of them."""
+    from textual.app import App, ComposeResult
+    from textual.widgets import Label
+
+    from retrai.tui.widgets import TickBus
+
+    class BusApp(App[None]):
+        def compose(self) -> ComposeResult:
+            yield Label("a")
+            yield Label("b")
+
+    bus = TickBus(interval=0.01)
+    ticks: list[str] = []
+    on_a, on_b = (lambda: ticks.append("a")), (lambda: ticks.append("b"))
+
+    async with BusApp().run_test() as pilot:
+        first, second = pilot.app.query(Label)
+        bus.subscribe(first, on_a)
+        timer = bus._timer
+        bus.subscribe(second, on_b)
+        assert bus._timer is timer
+        await pilot.pause(0.05)
+        assert ticks[:2] == ["a", "b"]
+
+        bus.unsubscribe(on_a)
+        bus.unsubscribe(on_b)
+        assert bus._timer is None
+        ticks.clear()
+        await pilot.pause(0.05)
+        assert ticks == []
+
+
+def test_status_panel_info_rows() -> None:
+    """Goal, model and CWD share one label; markup characters stay literal."""
+    from retrai.tui.widgets import StatusPanel
+
+    cfg = _make_cfg(cwd="/very/long/path/" + "x" * 40 + "/[project]")
+    info = StatusPanel(cfg)._info.content
+    lines = str(info).splitlines()
+    assert lines[0] == "Goal:  pytest"
+    assert lines[1].startswith("Model: ")
+    assert lines[2].startswith("CWD:   …") and lines[2].endswith("/[project]")
+
+
+def test_status_panel_timer_skips_unchanged_seconds() -> None:
+    """The timer label is only rewritten when the displayed time changes."""
+    from unittest.mock import patch
+
+    from retrai.tui.widgets import StatusPanel
+
+    panel = StatusPanel(_make_cfg())
+    panel.elapsed = 3_725.0
+    panel._dirty.add("elapsed")
+    panel._flush()
+    assert "01:02:05" in str(panel._timer_label.content)
+
+    with patch.object(panel._timer_label, "update") as update:
+        panel._dirty.add("elapsed")
+        panel._flush()
+    update.assert_not_called()
+
+
+def test_widgets_update_kept_children_without_mount() -> None:
+    """Widgets write to the children they built, even before they are mounted."""
+    from retrai.tui.widgets import (
+        DashboardSparkline,
+        FileTreeWidget,
+        IterationTimeline,
+        TokenSparklineWidget,
+        ToolStatsPanel,
+    )
+
+    stats = ToolStatsPanel()
+    stats.record_call("bash_exec", error=True)
+    stats._refresh()  # mounted panels do this on a timer
+    assert "bash_exec" in str(stats._body.content)
+
+    spark = TokenSparklineWidget()
+    spark.append(10)
+    spark.append(20)
+    assert list(spark._data) == [10.0, 20.0]  # plotted on mount
+
+    dash = DashboardSparkline()
+    dash.append(5)
+    assert list(dash._data) == [5.0]
+
+    timeline = IterationTimeline()
+    timeline.add_running_marker()
+    timeline.replace_last_marker(True)
+    assert list(timeline._markers) == ["[#4ade80]●[/#4ade80]"]
+    assert timeline._text.plain == "●"  # shown on mount
+
+    files = FileTreeWidget()
+    files.add_file("src/app.py", action="write")
+    (src,) = files._tree.root.children
+    assert str(src.label) == "📁 src"
+    assert [str(leaf.label) for leaf in src.children] == ["✏️  app.py"]
+
+
+@pytest.mark.asyncio
+async def test_sparkline_history_bounded_and_batched() -> None:
+    """Appends keep a bounded history and reach the sparkline once per flush."""
+    from retrai.tui.app import RetrAITUI
+    from retrai.tui.widgets import _FLUSH_DELAY, _SPARK_HISTORY, TokenSparklineWidget
+
+    app = RetrAITUI(cfg=_make_cfg())
+
+    async with app.run_test(size=(120, 40)) as pilot:
+        await pilot.pause()
+        spark = app.query_one(TokenSparklineWidget)
+        for n in range(_SPARK_HISTORY + 10):
+            spark.append(n)
+        assert not spark._sparkline.data  # not plotted until the flush
+        await pilot.pause(_FLUSH_DELAY * 4)
+
+        data = spark._sparkline.data
+        assert isinstance(data, list)
+        assert len(data) == _SPARK_HISTORY
+        assert data[0] == 10.0 and data[-1] == float(_SPARK_HISTORY + 9)
+
+
+def test_tool_stats_order_matches_full_sort() -> None:
+    """Incremental ordering matches sorting by count, ties in first-seen order."""
+    import random
+
+    from retrai.tui.widgets import ToolStatsPanel
+
+    rng = random.Random(7)
+    tools = [f"tool_{i}" for i in range(12)]
+    panel = ToolStatsPanel()
+    for _ in range(500):
+        panel.record_call(rng.choice(tools), error=rng.random() < 0.1)
+        expected = [t for t, _ in sorted(panel._counts.items(), key=lambda x: x[1], reverse=True)]
+        assert panel._order == expected
+
+    panel._refresh()
+    top = panel._order[0]
+    assert str(panel._body.content).startswith(f"[#38bdf8]{top}[/#38bdf8]")
+
+
+@pytest.mark.asyncio
+async def test_tool_usage_table_updates_rows_in_place() -> None:
+    """Rows are updated in place and kept sorted by calls, ties first-seen."""
+    from unittest.mock import patch
+
+    from textual.widgets import DataTable
+
+    from retrai.tui.app import RetrAITUI
+    from retrai.tui.widgets import _FLUSH_DELAY, ToolUsageTable
+
+    app = RetrAITUI(cfg=_make_cfg())
+
+    async with app.run_test(size=(120, 40)) as pilot:
+        await pilot.pause()
+        usage = app.query_one(ToolUsageTable)
+        table = usage._table
+        for tool in ["a", "b", "c", "b", "c", "c"]:
+            usage.record(tool, error=tool == "a")
+        await pilot.pause(_FLUSH_DELAY * 4)
+
+        def rows() -> list[tuple[str, str]]:
+            return [
+                (str(row.key.value), str(table.get_row(row.key)[1])) for row in table.ordered_rows
+            ]
+
+        assert rows() == [("c", "3"), ("b", "2"), ("a", "1")]
+        assert table.get_cell("a", "errors") == "1"
+
+        with patch.object(DataTable, "clear") as clear:
+            usage.record("a")
+            usage.record("a")
+            await pilot.pause(_FLUSH_DELAY * 4)
+        clear.assert_not_called()
+        assert rows() == [("a", "3"), ("c", "3"), ("b", "2")]  # tie: "a" was seen first
+
+
+def test_file_tree_reuses_directory_nodes() -> None:
+    """Files in the same directory share one node per path segment."""
+    from retrai.tui.widgets import FileTreeWidget
+
+    ft = FileTreeWidget()
+    ft.add_file("src/retrai/app.py", action="write")
+    ft.add_file("src/retrai/cli.py")
+    ft.add_file("src/other.py", action="patch")
+    ft.add_file("README.md")
+
+    def labels(node: object) -> list[str]:
+        return [str(child.label) for child in node.children]  # type: ignore[attr-defined]
+
+    root = ft._tree.root
+    assert labels(root) == ["📁 src", "📖 README.md"]
+    src = root.children[0]
+    assert labels(src) == ["📁 retrai", "🩹 other.py"]
+    assert labels(src.children[0]) == ["✏️  app.py", "📖 cli.py"]
+    assert set(ft._dir_nodes) == {"", "src", "src/retrai"}
+
+    # Stored keys are the interned strings, whatever object the caller passed
+    known = next(p for p in ft._known_paths if p == "src/retrai/cli.py")
+    assert known is sys.intern("".join(["src/retrai/", "cli.py"]))
+    key = next(k for k in ft._dir_nodes if k == "src/retrai")
+    assert key is sys.intern("".join(["src/", "retrai"]))
+
+
+def test_iteration_timeline_text_grows_in_place() -> None:
+    """Markers are appended to and trimmed from one styled Text."""
+    from retrai.tui.widgets import IterationTimeline
+
+    tl = IterationTimeline()
+    text = tl._text
+    tl.add_running_marker()
+    tl.replace_last_marker(True)
+    tl.add_running_marker()
+    tl.replace_last_marker(False)
+    tl.add_running_marker()
+
+    assert tl._text is text
+    assert text.plain == "● ○ ◎"
+    assert [(s.start, s.end, str(s.style)) for s in text.spans] == [
+        (0, 1, "#4ade80"),
+        (2, 3, "#f87171"),
+        (4, 5, "#a78bfa"),
+    ]
+    assert list(tl._markers) == [
+        "[#4ade80]●[/#4ade80]",
+        "[#f87171]○[/#f87171]",
+        "[#a78bfa]◎[/#a78bfa]",
+    ]
+
+
+def test_iteration_timeline_window_bounded() -> None:
+    """Past the window, the oldest markers are dropped and counted."""
+    from unittest.mock import patch
+
+    from retrai.tui.widgets import _TIMELINE_MARKERS, IterationTimeline
+
+    tl = IterationTimeline()
+    for i in range(_TIMELINE_MARKERS + 3):
+        tl.add_marker(achieved=i % 2 == 0)
+    tl.add_running_marker()
+    tl.replace_last_marker(True)
+
+    assert len(tl._markers) == _TIMELINE_MARKERS
+    assert tl._overflow == 4
+    assert len(tl._text.plain) == 2 * _TIMELINE_MARKERS - 1
+    # Markers 0-3 fell off the front, so marker 4 leads
+    assert tl._text.plain.startswith("● ○") and tl._text.plain.endswith("○ ● ●")
+    with patch.object(tl._markers_label, "update") as update:
+        tl._flush()
+    (shown,) = update.call_args.args
+    assert shown.plain.startswith("…+4 ● ○")
@@ -96,6 +96,62 @@ class TestBuildChartCode:
         assert "triu" in code
         assert "heatmap" in code
 
+    def test_braces_in_arguments_are_not_template_fields(self) -> None:
+        code = _build_chart_code(
+            file_path="/data/{year}.csv",
+            chart_type="bar",
+            x_column="{region}",
+            y_column=None,
+            title="Sales {total}",
+            output_path="/out.png",
+            style="ggplot",
+        )
+        assert "'/data/{year}.csv'" in code
+        assert "x_col = '{region}'" in code
+        assert "'Sales {total}'" in code
+        compile(code, "<chart>", "exec")
+
+    @pytest.mark.parametrize(
+        ("file_path", "reader"),
+        [
+            ("/data/frame.feather", "pd.read_feather(fpath)"),
+            ("/data/frame.arrow", "pd.read_feather(fpath)"),
+            ("/data/frame.parquet", "pd.read_parquet(fpath)"),
+            ("/data/frame.csv", "pd.read_csv(fpath, engine='pyarrow')"),
+        ],
+    )
+    def test_columnar_and_csv_readers(self, file_path: str, reader: str) -> None:
+        code = _build_chart_code(
+            file_path=file_path,
+            chart_type="histogram",
+            x_column="age",
+            y_column=None,
+            title=None,
+            output_path="/out.png",
+            style="ggplot",
+        )
+        assert reader in code
+
+    @pytest.mark.parametrize("with_nan", [False, True])
+    def test_correlation_snippet_matches_pandas(self, with_nan: bool) -> None:
+        np = pytest.importorskip("numpy")
+        pd = pytest.importorskip("pandas")
+        from retrai.tools.visualize import _CORR_TMPL
+
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame(rng.normal(size=(500, 6)), columns=list("abcdef"))
+        df["a"] = df["a"] * 1e9 + 1.7e9  # large offset must not lose precision
+        df["label"] = "x"
+        if with_nan:
+            df.loc[3, "b"] = np.nan
+
+        namespace = {"df": df, "np": np, "pd": pd}
+        exec(_CORR_TMPL, namespace)
+
+        expected = df.select_dtypes(include="number").corr()
+        assert list(namespace["corr"].columns) == list("abcdef")
+        np.testing.assert_allclose(namespace["corr"].to_numpy(), expected.to_numpy(), atol=1e-5)
+
 
 # ---------------------------------------------------------------------------
 # visualize() async tests
@@ -149,6 +205,54 @@ class TestVisualize:
             assert parsed["chart_type"] == "scatter"
             assert parsed["rows"] == 100
 
+    @pytest.mark.asyncio
+    async def test_child_json_returned_verbatim(self) -> None:
+        payload = json.dumps({"chart_type": "bar", "rows": 3}, indent=2)
+        mock_result = MagicMock()
+        mock_result.timed_out = False
+        mock_result.returncode = 0
+        mock_result.stdout = payload + "\n"
+
+        with patch(
+            "retrai.tools.visualize.python_exec",
+            new_callable=AsyncMock,
+            return_value=mock_result,
+        ):
+            result = await visualize(file_path="/data.csv", chart_type="bar", cwd="/project")
+        assert result == payload
+
+    @pytest.mark.asyncio
+    async def test_runs_in_persistent_worker(self) -> None:
+        mock_result = MagicMock()
+        mock_result.timed_out = False
+        mock_result.returncode = 0
+        mock_result.stdout = "{}"
+
+        with patch(
+            "retrai.tools.visualize.python_exec",
+            new_callable=AsyncMock,
+            return_value=mock_result,
+        ) as mock_exec:
+            await visualize(file_path="/data.csv", chart_type="line", cwd="/project")
+        assert mock_exec.call_args.kwargs["persistent"] is True
+        assert "matplotlib.rcdefaults()" in mock_exec.call_args.kwargs["code"]
+
+    @pytest.mark.asyncio
+    async def test_non_json_output_wrapped(self) -> None:
+        mock_result = MagicMock()
+        mock_result.timed_out = False
+        mock_result.returncode = 0
+        mock_result.stdout = "Warning: something\n"
+
+        with patch(
+            "retrai.tools.visualize.python_exec",
+            new_callable=AsyncMock,
+            return_value=mock_result,
+        ):
+            result = await visualize(file_path="/data.csv", chart_type="bar", cwd="/project")
+        parsed = json.loads(result)
+        assert parsed["raw_output"] == "Warning: something"
+
     @pytest.mark.asyncio
     async def test_timeout_returns_error(self) -> None:
         mock_result = MagicMock()
@@ -61,6 +61,16 @@ class TestFileWatcher:
         assert "main.py" in snap
         assert ".git/HEAD" not in snap
 
+    def test_snapshot_prunes_nested_ignored(self, tmp_path):
+        (tmp_path / "src" / "node_modules" / "pkg").mkdir(parents=True)
+        (tmp_path / "src" / "node_modules" / "pkg" / "index.js").write_text("x")
+        (tmp_path / "src" / "app.py").write_text("code")
+        (tmp_path / "src" / "app.pyc").write_bytes(b"\0")
+
+        watcher = FileWatcher(cwd=str(tmp_path))
+        snap = watcher._take_snapshot()
+        assert list(snap) == [str(Path("src") / "app.py")]
+
     def test_detect_new_file(self, tmp_path):
         (tmp_path / "existing.py").write_text("old")
         watcher = FileWatcher(cwd=str(tmp_path))
@@ -0,0 +1,322 @@
+"""Tests for retrai.tools.web_search."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from retrai.tools import web_search as ws
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache() -> None:
+    ws.cache_clear()
+
+
+def _api_client(requests: list[httpx.Request]) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(
+            200,
+            json={
+                "RelatedTopics": [
+                    {"Text": "Python is a language", "FirstURL": "https://python.org"},
+                    {"Name": "Category without text"},
+                ]
+            },
+        )
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.mark.asyncio
+async def test_fallback_uses_shared_client() -> None:
+    requests: list[httpx.Request] = []
+    client = _api_client(requests)
+
+    with (
+        patch.object(ws, "_has_ddgs", return_value=False),
+        patch.object(ws, "_get_client", return_value=client),
+    ):
+        first = await ws.web_search("python lang", max_results=3)
+        second = await ws.web_search("python lang", max_results=3)
+
+    assert first == second
+    assert first.startswith("1. **Python is a language**\n   URL: https://python.org")
+    assert len(requests) == 1  # the repeat is served from the cache
+    assert requests[0].url.params["q"] == "python lang"
+    assert requests[0].url.params["format"] == "json"
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_fallback_keeps_first_usable_topics() -> None:
+    topics: list[dict[str, Any]] = [{"Name": "Category header", "Topics": []}]
+    topics += [{"Text": f"topic {i}", "FirstURL": f"https://x/{i}"} for i in range(50)]
+    client = httpx.AsyncClient(
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, json={"RelatedTopics": topics})
+        )
+    )
+
+    with patch.object(ws, "_get_client", return_value=client):
+        results = await ws._search_api("q", max_results=2)
+
+    assert [r["href"] for r in results] == ["https://x/0", "https://x/1"]
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_client_reused_within_loop() -> None:
+    client = ws._get_client()
+    assert ws._get_client() is client
+    await client.aclose()
+    assert ws._get_client() is not client
+    await ws._get_client().aclose()
+
+
+@pytest.mark.asyncio
+async def test_client_retries_stale_connections() -> None:
+    client = ws._get_client()
+    transport = client._transport
+    assert isinstance(transport, httpx.AsyncHTTPTransport)
+    assert transport._pool._retries == 1
+    assert transport._pool._max_keepalive_connections == 20
+    assert transport._pool._keepalive_expiry == ws._KEEPALIVE_S
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_ddgs_branch_runs_in_thread() -> None:
+    rows: list[dict[str, Any]] = [{"title": "T", "href": "https://x", "body": "B"}]
+
+    with (
+        patch.object(ws, "_has_ddgs", return_value=True),
+        patch.object(ws, "_search_sync", return_value=rows) as search_sync,
+    ):
+        out = await ws.web_search("q", max_results=1)
+
+    search_sync.assert_called_once_with("q", 1)
+    assert out == "1. **T**\n   URL: https://x\n   B"
+
+
+@pytest.mark.asyncio
+async def test_cache_expires_and_normalizes_query() -> None:
+    calls: list[str] = []
+
+    async def fake_search(query: str, max_results: int) -> str:
+        calls.append(query)
+        return f"result {len(calls)}"
+
+    with patch.object(ws, "_search", side_effect=fake_search):
+        assert await ws.web_search("Rust SIMD") == "result 1"
+        assert await ws.web_search("  rust simd ") == "result 1"
+        assert await ws.web_search("rust simd", max_results=2) == "result 2"
+
+        with patch.object(ws, "_CACHE_TTL", -1.0):
+            ws.cache_clear()
+            assert await ws.web_search("rust simd") == "result 3"
+        assert await ws.web_search("rust simd") == "result 4"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_searches_share_one_request() -> None:
+    calls = 0
+    release = asyncio.Event()
+
+    async def fake_search(query: str, max_results: int) -> str:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "shared"
+
+    with patch.object(ws, "_search", side_effect=fake_search):
+        tasks = [asyncio.create_task(ws.web_search("same")) for _ in range(5)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks)
+
+    assert results == ["shared"] * 5
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_leaves_shared_search_running() -> None:
+    """Cancelling the caller that started a search doesn't fail the others."""
+    calls = 0
+    release = asyncio.Event()
+
+    async def fake_search(query: str, max_results: int) -> str:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "shared"
+
+    with patch.object(ws, "_search", side_effect=fake_search):
+        owner = asyncio.create_task(ws.web_search("same"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(ws.web_search("same"))
+        await asyncio.sleep(0)
+        owner.cancel()
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await waiter == "shared"
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        assert await ws.web_search("same") == "shared"  # cached by the search task
+
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_waiter_retries_when_search_task_cancelled() -> None:
+    calls = 0
+
+    async def fake_search(query: str, max_results: int) -> str:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(3600)
+        return "retried"
+
+    with patch.object(ws, "_search", side_effect=fake_search):
+        waiter = asyncio.create_task(ws.web_search("same"))
+        while not calls:
+            await asyncio.sleep(0)
+        ws._IN_FLIGHT[("same", 5)].cancel()
+        assert await waiter == "retried"
+
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_are_not_cached() -> None:
+    outcomes: list[Any] = [httpx.ConnectError("down"), "ok"]
+
+    async def fake_search(query: str, max_results: int) -> str:
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    with patch.object(ws, "_search", side_effect=fake_search):
+        assert await ws.web_search("q") == "Search failed: ConnectError: down"
+        assert await ws.web_search("q") == "ok"
+
+
+@pytest.mark.asyncio
+async def test_upstream_searches_are_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("RETRAI_SEARCH_CONCURRENCY", "2")
+    monkeypatch.setenv("RETRAI_SEARCH_RATE", "0")  # measure the slots, not the pacing
+    monkeypatch.setattr(ws, "_SLOTS", None)
+    running = peak = 0
+
+    async def fake_api(query: str, max_results: int) -> list[dict[str, Any]]:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return [{"title": query, "href": "https://x", "body": ""}]
+
+    with (
+        patch.object(ws, "_has_ddgs", return_value=False),
+        patch.object(ws, "_search_api", side_effect=fake_api),
+    ):
+        await asyncio.gather(*(ws.web_search(f"q{i}") for i in range(6)))
+
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_rate_limited_search_is_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("RETRAI_SEARCH_RATE", "0")
+    request = httpx.Request("GET", "https://api.duckduckgo.com/")
+    limited = httpx.HTTPStatusError(
+        "429", request=request, response=httpx.Response(429, headers={"Retry-After": "0"})
+    )
+    outcomes: list[Any] = [limited, [{"title": "T", "href": "https://x", "body": "B"}]]
+
+    async def fake_api(query: str, max_results: int) -> list[dict[str, Any]]:
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    with (
+        patch.object(ws, "_has_ddgs", return_value=False),
+        patch.object(ws, "_search_api", side_effect=fake_api) as api,
+    ):
+        out = await ws.web_search("q")
+
+    assert api.call_count == 2
+    assert out == "1. **T**\n   URL: https://x\n   B"
+
+
+def test_backoff_delay_policy() -> None:
+    request = httpx.Request("GET", "https://api.duckduckgo.com/")
+
+    def status(code: int, **headers: str) -> httpx.HTTPStatusError:
+        return httpx.HTTPStatusError(
+            str(code), request=request, response=httpx.Response(code, headers=headers)
+        )
+
+    assert ws._backoff_delay(status(429, **{"Retry-After": "3"}), 0) == 3.0
+    assert ws._backoff_delay(status(429, **{"Retry-After": "999"}), 0) == ws._MAX_BACKOFF_S
+    assert 4.0 <= ws._backoff_delay(httpx.ReadTimeout("slow"), 2) <= 4.5  # type: ignore[operator]
+    assert ws._backoff_delay(status(500), 0) is None
+    assert ws._backoff_delay(ValueError("bad"), 0) is None
+
+
+@pytest.mark.asyncio
+async def test_pace_spaces_request_starts(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("RETRAI_SEARCH_RATE", "50")
+    monkeypatch.setattr(ws, "_NEXT_START", 0.0)
+    loop = asyncio.get_running_loop()
+
+    start = loop.time()
+    for _ in range(4):
+        await ws._pace()
+
+    assert loop.time() - start >= 3 / 50 - 0.005
+
+
+def test_ddgs_session_reused_per_thread(monkeypatch: pytest.MonkeyPatch) -> None:
+    class FakeDDGS:
+        def __init__(self) -> None:
+            self.fail = False
+
+        def text(self, query: str, max_results: int) -> list[dict[str, Any]]:
+            if self.fail:
+                raise RuntimeError("session broke")
+            return [{"title": query}]
+
+    sessions: list[FakeDDGS] = []
+
+    def new_ddgs() -> FakeDDGS:
+        sessions.append(FakeDDGS())
+        return sessions[-1]
+
+    monkeypatch.setattr(ws, "_DDGS_LOCAL", threading.local())
+    monkeypatch.setattr(ws, "_new_ddgs", new_ddgs)
+
+    assert ws._search_sync("a", 1) == [{"title": "a"}]
+    assert ws._search_sync("b", 1) == [{"title": "b"}]
+    assert len(sessions) == 1
+
+    sessions[0].fail = True
+    with pytest.raises(RuntimeError):
+        ws._search_sync("c", 1)
+    assert ws._search_sync("d", 1) == [{"title": "d"}]
+    assert len(sessions) == 2
+
+    with ThreadPoolExecutor(1) as pool:
+        pool.submit(ws._search_sync, "e", 1).result()
+    assert len(sessions) == 3  # another thread gets its own session
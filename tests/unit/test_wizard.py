@@ -33,6 +33,14 @@ class TestSetupGraph:
         graph = build_setup_graph()
         assert graph is not None
 
+    def test_get_setup_graph_compiles_once(self) -> None:
+        from retrai.tui.setup_graph import build_setup_graph, get_setup_graph
+
+        graph = get_setup_graph()
+        assert get_setup_graph() is graph
+        assert build_setup_graph() is not graph
+        assert set(graph.get_graph().nodes) >= {"select_goal", "review"}
+
     def test_setup_steps_defined(self) -> None:
         from retrai.tui.setup_graph import SETUP_STEPS
 
@@ -117,6 +125,34 @@ class TestSetupGraph:
         result = route_after_review({"completed": False, "cancelled": False})  # type: ignore[arg-type]
         assert result == "select_goal"
 
+    def test_advance_setup_walks_steps_and_review_branches(self) -> None:
+        from retrai.tui.setup_graph import SETUP_STEPS, advance_setup, make_initial_setup_state
+
+        state = make_initial_setup_state(cwd="/tmp/p")
+        seen = [state["step"]]
+        while state["step"] != "review":
+            nxt = advance_setup(state)
+            assert nxt is not None
+            state = nxt
+            seen.append(state["step"])
+        assert seen == SETUP_STEPS
+        assert state["cwd"] == "/tmp/p"
+
+        back = advance_setup(state)
+        assert back is not None and back["step"] == "select_goal"
+        assert advance_setup({**state, "completed": True}) is None
+        assert advance_setup({**state, "cancelled": True}) is None
+        with pytest.raises(ValueError):
+            advance_setup({**state, "step": "bogus"})
+
+    def test_setup_module_does_not_import_langgraph(self) -> None:
+        import subprocess
+        import sys
+
+        code = "import sys, retrai.tui.setup_graph; print('langgraph' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+        assert out.stdout.strip() == "False", out.stderr
+
 
 # ── Wizard Step Indicator ─────────────────────────────────────
 
@@ -219,6 +255,43 @@ async def test_wizard_screen_opens_and_closes() -> None:
         await pilot.pause()
 
 
+@pytest.mark.asyncio
+async def test_wizard_steps_keep_inputs() -> None:
+    """Stepping through the wizard updates its chrome and keeps entered values."""
+    from textual.app import App, ComposeResult
+    from textual.widgets import Label
+
+    from retrai.tui.wizard import WizardScreen
+
+    class TestApp(App[None]):
+        def compose(self) -> ComposeResult:
+            yield Label("test")
+
+    app = TestApp()
+
+    async with app.run_test(size=(120, 40)) as pilot:
+        wizard = WizardScreen(cwd="/tmp/test")
+        app.push_screen(wizard)
+        await pilot.pause()
+        assert wizard._back_btn.disabled
+
+        # Straight to the parameters step: the model step loads LiteLLM's registry
+        wizard._current_step_idx = 2
+        wizard._rebuild_step()
+        await pilot.pause()
+        assert wizard._current_step == "set_parameters"
+        assert not wizard._back_btn.disabled
+        assert wizard._max_iter_input is not None
+        wizard._max_iter_input.value = "7"
+
+        wizard._save_current_step()
+        wizard._go_next()
+        await pilot.pause()
+        assert wizard._max_iterations == 7
+        assert "Launch" in str(wizard._next_btn.label)
+        assert "Set Parameters" in str(wizard._indicator.content)
+
+
 @pytest.mark.asyncio
 async def test_wizard_shows_goals() -> None:
     """WizardScreen shows the goal selection on step 1."""